@@ -0,0 +1,106 @@
+"""Compara a vazão da carga no MongoDB: insert_many síncrono em uma chamada x upsert atual x backfill assíncrono.
+
+Precisa de um mongod de verdade (local, de preferência; o banco `bench_carga`
+é apagado e recriado a cada medida). Os documentos são montados antes de cada
+medida, então só a escrita (e a criação dos índices) entra no tempo.
+
+Uso (a partir da raiz do repositório, depois de rodar o ETL):
+
+    python benchmarks/bench_carga_mongo.py --mongo-uri mongodb://localhost:27017 --fatores 10 100 --janelas 1 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import bson
+import pandas as pd
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts_etl"))
+
+import carga_assincrona  # noqa: E402
+from bench_documentos import escalar_processado  # noqa: E402
+from load_mongo import (  # noqa: E402
+    INDICES_DADOS, PATH_PARQUET, com_hash, garantir_indices, gerar_documentos, upsert_documentos
+)
+
+DB_BENCH = "bench_carga"
+COLECAO_BENCH = "dados_processados"
+
+
+def insert_many_unico(uri, documentos, **_):
+    """Caminho antigo do load_mongo.py: índices antes e todos os documentos em um único insert_many."""
+    client = MongoClient(uri)
+    try:
+        collection = client[DB_BENCH][COLECAO_BENCH]
+        collection.drop()
+        garantir_indices(collection)
+        collection.insert_many(documentos)
+    finally:
+        client.close()
+
+
+def upsert_atual(uri, documentos, **_):
+    """Modo upsert padrão (bulk_write síncrono em lotes, com verificação de hash)."""
+    client = MongoClient(uri)
+    try:
+        collection = client[DB_BENCH][COLECAO_BENCH]
+        collection.drop()
+        garantir_indices(collection)
+        upsert_documentos(collection, documentos)
+    finally:
+        client.close()
+
+
+def backfill_assincrono(uri, documentos, janela, bytes_lote):
+    return carga_assincrona.backfill(uri, DB_BENCH, COLECAO_BENCH, com_hash(documentos), indices=INDICES_DADOS,
+                                     janela=janela, bytes_lote=bytes_lote)
+
+
+def medir(funcao, uri, df, **opcoes):
+    documentos = list(gerar_documentos(df))
+    bytes_documentos = sum(len(bson.encode(documento)) for documento in documentos)
+    inicio = time.perf_counter()
+    funcao(uri, documentos, **opcoes)
+    duracao = time.perf_counter() - inicio
+
+    client = MongoClient(uri)
+    try:
+        gravados = client[DB_BENCH][COLECAO_BENCH].count_documents({})
+    finally:
+        client.close()
+    if gravados != len(documentos):
+        print(f"ERRO: {gravados} documentos gravados, {len(documentos)} esperados.")
+        sys.exit(1)
+    return duracao, len(documentos), bytes_documentos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--parquet", default=PATH_PARQUET)
+    parser.add_argument("--fatores", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--janelas", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--bytes-lote", type=int, default=carga_assincrona.BYTES_LOTE_PADRAO)
+    args = parser.parse_args()
+
+    df_base = pd.read_parquet(args.parquet)
+    print(f"{'fator':>6} {'método':<24} {'docs':>8} {'MiB':>8} {'segundos':>9} {'docs/s':>9} {'MiB/s':>7}")
+    for fator in args.fatores:
+        df = escalar_processado(df_base, fator)
+        metodos = [("insert_many (1 chamada)", insert_many_unico, {}), ("upsert atual", upsert_atual, {})]
+        metodos += [(f"backfill janela={janela}", backfill_assincrono, {"janela": janela, "bytes_lote": args.bytes_lote})
+                    for janela in args.janelas]
+        for nome, funcao, opcoes in metodos:
+            duracao, n, bytes_documentos = medir(funcao, args.mongo_uri, df, **opcoes)
+            print(f"{fator:>6} {nome:<24} {n:>8} {bytes_documentos / 2**20:>8.1f} {duracao:>9.2f} "
+                  f"{n / duracao:>9.0f} {bytes_documentos / 2**20 / duracao:>7.1f}")
+
+    client = MongoClient(args.mongo_uri)
+    client.drop_database(DB_BENCH)
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compara a montagem dos documentos do MongoDB: loop groupby antigo x gerador vetorizado.
+
+Uso (a partir da raiz do repositório, depois de rodar o ETL):
+
+    python benchmarks/bench_documentos.py --fatores 1 100 1000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import bson
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts_etl"))
+
+from load_mongo import PATH_PARQUET, gerar_documentos  # noqa: E402
+
+
+def construir_documentos_loop(df):
+    """Implementação original de load_mongo.py (groupby aninhado + to_dict), mantida como referência."""
+    df = df.rename(columns={
+        "SUBJECT": "tipo",
+        "KG_CAP": "consumo_per_capita_kg",
+        "THND_TONNE": "consumo_total_thnd_tonne",
+        "TIME": "ano",
+        "Pais_Nome": "pais"
+    })
+
+    documentos_mongo = []
+    for location, group_pais in df.groupby("LOCATION"):
+        registros_consumo = []
+        for ano, group_ano in group_pais.groupby("ano"):
+            carnes = group_ano[[
+                "tipo",
+                "consumo_per_capita_kg",
+                "consumo_total_thnd_tonne"
+            ]].to_dict('records')
+            # O loader atual grava null no lugar de NaN; a referência segue a mesma convenção.
+            for carne in carnes:
+                for campo in ("consumo_per_capita_kg", "consumo_total_thnd_tonne"):
+                    if carne[campo] != carne[campo]:
+                        carne[campo] = None
+            registros_consumo.append({"ano": int(ano), "carnes": carnes})
+        documentos_mongo.append({
+            "_id": location,
+            "pais": group_pais.iloc[0]['pais'],
+            "registros_consumo": registros_consumo
+        })
+    return documentos_mongo
+
+
+def escalar_processado(df, fator):
+    """Replica o Parquet processado `fator` vezes com novos códigos de país."""
+    if fator == 1:
+        return df
+    copias = []
+    for i in range(fator):
+        copia = df.copy()
+        copia["LOCATION"] = copia["LOCATION"] + f"_{i:05d}"
+        copia["Pais_Nome"] = copia["Pais_Nome"] + f" {i}"
+        copias.append(copia)
+    return pd.concat(copias, ignore_index=True)
+
+
+def medir(funcao, df, memoria=False):
+    """Tempo de uma execução e, se pedido, o pico de memória de uma segunda (tracemalloc distorce o tempo)."""
+    inicio = time.perf_counter()
+    resultado = funcao(df)
+    duracao = time.perf_counter() - inicio
+
+    pico = float("nan")
+    if memoria:
+        tracemalloc.start()
+        funcao(df)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return resultado, duracao, pico
+
+
+def formatar(valor, formato, sufixo=""):
+    return "-" if valor != valor else f"{valor:{formato}}{sufixo}"
+
+
+def consumir_gerador(df):
+    # Só conta os documentos: é assim que a carga em lotes os consome.
+    return sum(1 for _ in gerar_documentos(df))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--parquet", default=PATH_PARQUET)
+    parser.add_argument("--fatores", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--sem-loop-acima-de", type=int, default=100,
+                        help="Não executa o loop antigo para fatores maiores que este (é lento demais).")
+    parser.add_argument("--memoria", action="store_true",
+                        help="Mede também o pico de memória (execução extra com tracemalloc).")
+    args = parser.parse_args()
+
+    df_base = pd.read_parquet(args.parquet)
+
+    referencia = construir_documentos_loop(df_base)
+    # Compara o BSON, que é o que vai para o MongoDB.
+    if [bson.encode(d) for d in gerar_documentos(df_base)] != [bson.encode(d) for d in referencia]:
+        print("ERRO: o gerador vetorizado não produz os mesmos documentos do loop original.")
+        sys.exit(1)
+    print(f"Documentos idênticos ao loop original ({len(referencia)} países).")
+
+    print(f"{'fator':>6} {'linhas':>10} {'docs':>8} {'loop (s)':>10} {'loop pico':>11} "
+          f"{'gerador (s)':>12} {'gerador pico':>13}")
+    for fator in args.fatores:
+        df = escalar_processado(df_base, fator)
+
+        loop_s, loop_pico = float("nan"), float("nan")
+        if fator <= args.sem_loop_acima_de:
+            _, loop_s, loop_pico = medir(construir_documentos_loop, df, args.memoria)
+        documentos, gerador_s, gerador_pico = medir(consumir_gerador, df, args.memoria)
+
+        print(f"{fator:>6} {len(df):>10} {documentos:>8} {formatar(loop_s, '.2f'):>10} "
+              f"{formatar(loop_pico / 2**20, '.1f', 'MB'):>11} {gerador_s:>12.2f} "
+              f"{formatar(gerador_pico / 2**20, '.1f', 'MB'):>13}")
+
+
+if __name__ == "__main__":
+    main()
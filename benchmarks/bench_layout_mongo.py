@@ -0,0 +1,104 @@
+"""Compara a latência das consultas do dashboard nos dois layouts do MongoDB: aninhado x buckets.
+
+Para cada escala, carrega o Parquet processado (replicado com novos países) nas
+coleções 'dados_processados' (um documento por país) e 'consumo_buckets' (um
+por país, carne e década), com os índices de cada layout, e mede a mediana das
+consultas do mapa (média do período de uma carne, todos os países) e da aba de
+evolução (todas as carnes de alguns países no período).
+
+Uso (a partir da raiz do repositório, depois de rodar o ETL):
+
+    python benchmarks/bench_layout_mongo.py --fatores 1 10
+    python benchmarks/bench_layout_mongo.py --mongo-uri mongodb://localhost:27017 --fatores 10 100
+
+Sem --mongo-uri usa o mongomock, que não usa índices: os números só comparam o
+volume de documentos lidos. Com um mongod de verdade o banco `bench_layout` é
+apagado e recriado a cada escala.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import bson
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "scripts_etl"))
+sys.path.insert(0, os.path.join(RAIZ, "dashboard"))
+
+import consultas_mongo  # noqa: E402
+from aquecimento_cache import periodo_padrao  # noqa: E402
+from bench_documentos import escalar_processado  # noqa: E402
+from bench_pipeline import conectar_mongo  # noqa: E402
+from load_mongo import (  # noqa: E402
+    COLECOES_LAYOUT, GERADORES_LAYOUT, INDICES_LAYOUT, LAYOUTS, PATH_PARQUET, em_lotes, garantir_indices
+)
+
+DB_BENCH = "bench_layout"
+CARNE_MAPA = "POULTRY"
+PAISES_EVOLUCAO = 6
+
+
+def carregar_layout(db, df, layout):
+    """Recria a coleção do layout com os documentos de `df`. Retorna (documentos, bytes médios, bytes máximos)."""
+    collection = db[COLECOES_LAYOUT[layout]]
+    collection.drop()
+    garantir_indices(collection, INDICES_LAYOUT[layout])
+    tamanhos = []
+    for lote in em_lotes(GERADORES_LAYOUT[layout](df), 1000):
+        tamanhos.extend(len(bson.encode(documento)) for documento in lote)
+        collection.insert_many(lote)
+    return len(tamanhos), statistics.mean(tamanhos), max(tamanhos)
+
+
+def mediana_consulta(collection, pipeline, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        linhas = list(collection.aggregate(pipeline))
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), len(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-uri", help="MongoDB real (ex.: mongodb://localhost:27017); padrão: mongomock.")
+    parser.add_argument("--parquet", default=os.path.join(RAIZ, PATH_PARQUET))
+    parser.add_argument("--fatores", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    client, tipo_mongo = conectar_mongo(args.mongo_uri)
+    db = client[DB_BENCH]
+    df_base = pd.read_parquet(args.parquet)
+    print(f"MongoDB: {tipo_mongo}")
+    print(f"{'fator':>6} {'layout':<9} {'docs':>8} {'KiB/doc':>8} {'KiB máx':>8} "
+          f"{'mapa (ms)':>10} {'linhas':>7} {'evolução (ms)':>14} {'linhas':>7}")
+
+    try:
+        for fator in args.fatores:
+            df = escalar_processado(df_base, fator)
+            ano_inicio, ano_fim = periodo_padrao(int(df["TIME"].max()))
+            locations = sorted(df["LOCATION"].unique())[:PAISES_EVOLUCAO]
+
+            for layout in LAYOUTS:
+                documentos, bytes_medios, bytes_maximos = carregar_layout(db, df, layout)
+                collection = db[COLECOES_LAYOUT[layout]]
+                mapa, linhas_mapa = mediana_consulta(
+                    collection, consultas_mongo.pipeline_medias_periodo(ano_inicio, ano_fim, (CARNE_MAPA,), layout=layout),
+                    args.repeticoes)
+                evolucao, linhas_evolucao = mediana_consulta(
+                    collection, consultas_mongo.pipeline_registros(ano_inicio, ano_fim, locations=locations, layout=layout),
+                    args.repeticoes)
+                print(f"{fator:>6} {layout:<9} {documentos:>8} {bytes_medios / 1024:>8.1f} {bytes_maximos / 1024:>8.1f} "
+                      f"{mapa * 1000:>10.1f} {linhas_mapa:>7} {evolucao * 1000:>14.1f} {linhas_evolucao:>7}")
+                collection.drop()
+    finally:
+        client.drop_database(DB_BENCH)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
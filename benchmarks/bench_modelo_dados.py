@@ -0,0 +1,125 @@
+"""Compara o DataFrame do dashboard: formato antigo (object/float64 + máscaras) x `modelo_dados.compactar` + `fatiar`.
+
+Uso (a partir da raiz do repositório, depois de rodar o ETL):
+
+    python benchmarks/bench_modelo_dados.py --fatores 1 10 100
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "scripts_etl"))
+sys.path.insert(0, os.path.join(RAIZ, "dashboard"))
+
+from bench_documentos import escalar_processado, formatar  # noqa: E402
+from load_mongo import PATH_PARQUET  # noqa: E402
+from modelo_dados import compactar, fatiar, padronizar_dataframe  # noqa: E402
+
+# Mesma convenção de COLUNAS_PARQUET em modelo_dados.py.
+COLUNAS_DASHBOARD = {
+    "TIME": "Ano",
+    "LOCATION": "Pais_Codigo",
+    "SUBJECT": "Tipo_Carne_EN",
+    "KG_CAP": "Consumo_KG_Capita",
+    "THND_TONNE": "Consumo_Mil_Toneladas",
+    "Pais_Nome": "País"
+}
+
+PAISES_PADRAO = ["Brasil", "Estados Unidos", "Austrália", "Argentina", "China", "Índia"]
+
+
+def dataframe_dashboard(df):
+    """DataFrame achatado no formato antigo do dashboard, antes de `compactar`."""
+    df = df.rename(columns=COLUNAS_DASHBOARD)
+    df["Ano"] = df["Ano"].astype("int64")
+    return padronizar_dataframe(df)
+
+
+def filtros_mascara(df, paises, carne, ano_inicio, ano_fim):
+    """Os filtros de app.py como eram: uma máscara booleana sobre o DataFrame inteiro para cada visão."""
+    periodo = (df["Ano"] >= ano_inicio) & (df["Ano"] <= ano_fim)
+    return [
+        df[df["País"].isin(paises) & (df["Tipo_Carne"] == carne) & periodo],
+        df[periodo & (df["Tipo_Carne"] == carne)],
+        df[periodo & df["País"].isin(paises)],
+        df[df["País"].isin(paises) & df["Tipo_Carne_EN"].isin(["POULTRY", "BEEF"]) & periodo],
+    ]
+
+
+def filtros_fatia(df, paises, carne, ano_inicio, ano_fim):
+    return [
+        fatiar(df, carnes=[carne], paises=paises, ano_inicio=ano_inicio, ano_fim=ano_fim),
+        fatiar(df, carnes=[carne], ano_inicio=ano_inicio, ano_fim=ano_fim),
+        fatiar(df, paises=paises, ano_inicio=ano_inicio, ano_fim=ano_fim),
+        fatiar(df, carnes=["Aves", "Bovina"], paises=paises, ano_inicio=ano_inicio, ano_fim=ano_fim),
+    ]
+
+
+def normalizar(df):
+    """Mesmas linhas na mesma ordem e nos tipos antigos, para comparar os dois formatos."""
+    df = df.reset_index(drop=True).astype({
+        "País": "object", "Pais_Codigo": "object", "Tipo_Carne": "object", "Tipo_Carne_EN": "object",
+        "Ano": "int64", "Consumo_KG_Capita": "float32", "Consumo_Mil_Toneladas": "float32"
+    })
+    return df.sort_values(["Tipo_Carne", "País", "Ano"], ignore_index=True)[sorted(df.columns)]
+
+
+def medir_filtros(funcao, df, argumentos, repeticoes):
+    """Mediana do tempo de `repeticoes` execuções e pico de memória (tracemalloc) de uma execução extra."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(df, *argumentos)
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao(df, *argumentos)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(tempos), pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--parquet", default=PATH_PARQUET)
+    parser.add_argument("--fatores", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--periodo", type=int, nargs=2, default=None, metavar=("INICIO", "FIM"),
+                        help="Período filtrado (padrão: os últimos 6 anos, como o slider do dashboard).")
+    args = parser.parse_args()
+
+    df_base = dataframe_dashboard(pd.read_parquet(args.parquet))
+    ano_max = int(df_base["Ano"].max())
+    ano_inicio, ano_fim = args.periodo or (ano_max - 5, ano_max)
+    argumentos = (PAISES_PADRAO, "Aves", ano_inicio, ano_fim)
+
+    for antigo, novo in zip(filtros_mascara(df_base, *argumentos), filtros_fatia(compactar(df_base), *argumentos)):
+        if not normalizar(antigo).equals(normalizar(novo)):
+            print("ERRO: `fatiar` não seleciona as mesmas linhas das máscaras booleanas.")
+            sys.exit(1)
+    print("Filtros por fatia selecionam as mesmas linhas das máscaras booleanas.")
+
+    print(f"{'fator':>6} {'linhas':>10} {'antigo':>10} {'compacto':>10} {'máscaras (ms)':>14} {'pico':>9} "
+          f"{'fatias (ms)':>12} {'pico':>9}")
+    for fator in args.fatores:
+        df_antigo = dataframe_dashboard(escalar_processado(pd.read_parquet(args.parquet), fator))
+        df_compacto = compactar(df_antigo)
+
+        mascara_s, mascara_pico = medir_filtros(filtros_mascara, df_antigo, argumentos, args.repeticoes)
+        fatia_s, fatia_pico = medir_filtros(filtros_fatia, df_compacto, argumentos, args.repeticoes)
+
+        print(f"{fator:>6} {len(df_antigo):>10} "
+              f"{formatar(df_antigo.memory_usage(deep=True).sum() / 2**20, '.1f', 'MB'):>10} "
+              f"{formatar(df_compacto.memory_usage(deep=True).sum() / 2**20, '.1f', 'MB'):>10} "
+              f"{mascara_s * 1000:>14.2f} {formatar(mascara_pico / 2**20, '.1f', 'MB'):>9} "
+              f"{fatia_s * 1000:>12.2f} {formatar(fatia_pico / 2**20, '.1f', 'MB'):>9}")
+
+
+if __name__ == "__main__":
+    main()
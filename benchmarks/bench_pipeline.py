@@ -0,0 +1,290 @@
+"""Mede o pipeline completo (CSV -> ETL -> documentos -> MongoDB -> dashboard) com dados sintéticos em escala.
+
+Uso (a partir da raiz do repositório):
+
+    python benchmarks/bench_pipeline.py --fatores 10 100
+    python benchmarks/bench_pipeline.py --fatores 1000 10000 --ate etl
+    python benchmarks/bench_pipeline.py --fatores 10 100 --comparar-com benchmarks/resultados/<anterior>.json
+
+Sem --mongo-uri a carga e as leituras do dashboard usam o mongomock (em memória).
+Os resultados vão para um JSON em benchmarks/resultados/, que pode ser comparado
+com o de outra versão para detectar regressões.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "scripts_etl"))
+sys.path.insert(0, os.path.join(RAIZ, "dashboard"))
+
+from consultas_mongo import pipeline_registros  # noqa: E402
+from data_process import ENGINES, PATH_DATA_RAW, processar_dados_etl  # noqa: E402
+from dimensao_paises import agregados, ler_dimensao  # noqa: E402
+from instrumentacao import tamanho_em_disco  # noqa: E402
+from load_mongo import TAMANHO_LOTE_PADRAO, garantir_indices, gerar_documentos_parquet, upsert_documentos  # noqa: E402
+from modelo_dados import achatar_documentos, compactar, fatiar, padronizar_dataframe  # noqa: E402
+from tendencias import calcular_tendencias  # noqa: E402
+
+ETAPAS = ["etl", "documentos", "carga", "dashboard"]
+DIR_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+TOLERANCIA_REGRESSAO = 0.2
+# Diferenças absolutas menores que isso são ruído de medição, não regressão.
+PISO_REGRESSAO_SEGUNDOS = 0.05
+
+PAISES_PADRAO = ["Brasil", "Estados Unidos", "Austrália", "Argentina", "China", "Índia"]
+
+
+def decompor_fator(fator):
+    """Divide o fator de escala entre anos (até 4x), carnes (até 2x) e países (o restante)."""
+    anos = 4 if fator >= 40 else (2 if fator >= 4 else 1)
+    carnes = 2 if fator >= 10 else 1
+    paises = max(1, -(-fator // (anos * carnes)))
+    return {"paises": paises, "carnes": carnes, "anos": anos}
+
+
+def gerar_csv_sintetico(path_origem, path_destino, fator, semente=0):
+    """CSV no formato de meat_consumption_worldwide.csv com ~`fator` vezes mais linhas.
+
+    Os anos são estendidos para trás, as carnes ganham variantes (BEEF_1, ...) e
+    cada cópia dos países recebe um código novo (ARG_00001, ...) e valores
+    perturbados. Os agregados (WLD, OECD, ...) aparecem só na primeira cópia,
+    como no arquivo original. O arquivo é escrito cópia a cópia, sem montar o
+    resultado inteiro em memória.
+    """
+    df = pd.read_csv(path_origem, dtype={"TIME": "int32", "Value": "float64"}, float_precision="round_trip")
+    escala = decompor_fator(fator)
+    anos_por_copia = int(df["TIME"].max() - df["TIME"].min() + 1)
+
+    blocos = []
+    for k in range(escala["anos"]):
+        for c in range(escala["carnes"]):
+            bloco = df.copy()
+            bloco["TIME"] = bloco["TIME"] - k * anos_por_copia
+            if c:
+                bloco["SUBJECT"] = bloco["SUBJECT"] + f"_{c}"
+            blocos.append(bloco)
+    base = pd.concat(blocos, ignore_index=True)
+    base_paises = base[~base["LOCATION"].isin(agregados(ler_dimensao()))]
+
+    rng = np.random.default_rng(semente)
+    with open(path_destino, "w", newline="") as arquivo:
+        base.to_csv(arquivo, index=False)
+        linhas = len(base)
+        for i in range(1, escala["paises"]):
+            copia = base_paises.copy()
+            copia["LOCATION"] = copia["LOCATION"] + f"_{i:05d}"
+            copia["Value"] = copia["Value"] * rng.uniform(0.5, 1.5, len(copia))
+            copia.to_csv(arquivo, index=False, header=False)
+            linhas += len(copia)
+    return linhas, escala
+
+
+def cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def revisao_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def conectar_mongo(mongo_uri):
+    if mongo_uri:
+        from pymongo import MongoClient
+        return MongoClient(mongo_uri), "mongodb"
+    try:
+        import mongomock
+    except ImportError:
+        print("Instale o mongomock (pip install mongomock) ou informe --mongo-uri para medir a carga.")
+        sys.exit(1)
+    return mongomock.MongoClient(), "mongomock"
+
+
+def filtros_dashboard(df, paises, carne, ano_inicio, ano_fim):
+    """As visões calculadas a partir do DataFrame no modo "mongo_completo" do dashboard."""
+    df_base_paises = fatiar(df, carnes=[carne], paises=paises, ano_inicio=ano_inicio, ano_fim=ano_fim)
+    df_mapa = fatiar(df, carnes=[carne], ano_inicio=ano_inicio, ano_fim=ano_fim) \
+        .groupby(["País", "Pais_Codigo"], as_index=False, observed=True) \
+        .agg({"Consumo_KG_Capita": "mean", "Consumo_Mil_Toneladas": "mean"})
+    df_comp = fatiar(df, paises=paises, ano_inicio=ano_inicio, ano_fim=ano_fim) \
+        .groupby(["País", "Tipo_Carne"], as_index=False, observed=True) \
+        .agg({"Consumo_KG_Capita": "mean", "Consumo_Mil_Toneladas": "mean"})
+    tendencias = calcular_tendencias(df_base_paises, "Consumo_KG_Capita")
+    return df_mapa, df_comp, tendencias
+
+
+def medir_fator(fator, args, dir_trabalho, client):
+    path_csv = os.path.join(dir_trabalho, f"consumo_x{fator}.csv")
+    path_processado = os.path.join(dir_trabalho, f"processado_x{fator}.parquet")
+    path_cubo = os.path.join(dir_trabalho, f"cubo_x{fator}.parquet")
+    path_dimensao = os.path.join(dir_trabalho, f"dim_paises_x{fator}.parquet")
+    etapas = ETAPAS[:ETAPAS.index(args.ate) + 1]
+
+    (linhas_csv, escala), segundos = cronometrar(gerar_csv_sintetico, args.csv, path_csv, fator)
+    resultado = {
+        "fator": fator,
+        "escala": escala,
+        "csv": {"linhas": linhas_csv, "bytes": tamanho_em_disco(path_csv), "segundos_geracao": segundos},
+        "etapas": {},
+    }
+    medidas = resultado["etapas"]
+    print(f"[x{fator}] CSV sintético: {linhas_csv} linhas ({resultado['csv']['bytes'] / 2**20:.1f} MB).")
+
+    saida_etl = io.StringIO() if not args.verboso else sys.stdout
+    with contextlib.redirect_stdout(saida_etl):
+        _, segundos = cronometrar(processar_dados_etl, engine=args.engine, path_data_raw=path_csv,
+                                  path_data_processed=path_processado, incremental=False, path_cubo=path_cubo,
+                                  path_dimensao=path_dimensao)
+    locations = sorted(pd.read_parquet(path_processado, columns=["LOCATION"])["LOCATION"].unique())
+    medidas["etl"] = {
+        "segundos": segundos,
+        "linhas_entrada": linhas_csv,
+        "paises": len(locations),
+        "bytes_parquet": tamanho_em_disco(path_processado),
+        "bytes_cubo": tamanho_em_disco(path_cubo),
+    }
+
+    if "documentos" in etapas:
+        documentos, segundos = cronometrar(lambda: sum(1 for _ in gerar_documentos_parquet(path_processado, locations)))
+        medidas["documentos"] = {"segundos": segundos, "documentos": documentos}
+
+    if "carga" in etapas:
+        collection = client["bench_pipeline"][f"dados_x{fator}"]
+        collection.drop()
+        garantir_indices(collection)
+        for nome in ("carga", "carga_sem_mudancas"):
+            estatisticas = upsert_documentos(collection, gerar_documentos_parquet(path_processado, locations),
+                                             tamanho_lote=args.tamanho_lote)
+            medidas[nome] = {chave: valor for chave, valor in estatisticas.items() if chave != "ids"}
+
+    if "dashboard" in etapas:
+        dados, segundos = cronometrar(lambda: list(collection.find({})))
+        medidas["dashboard_leitura"] = {"segundos": segundos, "documentos": len(dados)}
+
+        df, segundos = cronometrar(lambda: compactar(padronizar_dataframe(achatar_documentos(dados))))
+        del dados
+        medidas["dashboard_achatamento"] = {
+            "segundos": segundos,
+            "linhas": len(df),
+            "bytes_memoria": int(df.memory_usage(deep=True).sum()),
+        }
+
+        paises = [pais for pais in PAISES_PADRAO if pais in set(df["País"].cat.categories)]
+        codigos = sorted(df.loc[df["País"].isin(paises), "Pais_Codigo"].astype(str).unique())
+        ano_fim = int(df["Ano"].max())
+        ano_inicio = ano_fim - 5
+        tempos = [cronometrar(filtros_dashboard, df, paises, "Aves", ano_inicio, ano_fim)[1]
+                  for _ in range(args.repeticoes)]
+        medidas["dashboard_filtros"] = {"segundos": statistics.median(tempos), "repeticoes": args.repeticoes}
+
+        pipeline = pipeline_registros(ano_inicio, ano_fim, locations=codigos)
+        registros, segundos = cronometrar(lambda: list(collection.aggregate(pipeline)))
+        medidas["dashboard_pipeline"] = {"segundos": segundos, "linhas": len(registros)}
+
+        collection.drop()
+
+    for nome, medida in medidas.items():
+        print(f"[x{fator}] {nome:<22} {medida['segundos']:>9.3f}s")
+    return resultado
+
+
+def comparar_resultados(anterior, atual, tolerancia=TOLERANCIA_REGRESSAO):
+    """Etapas (de fatores presentes nos dois arquivos) que ficaram mais de `tolerancia` mais lentas."""
+    por_fator = {resultado["fator"]: resultado for resultado in anterior["resultados"]}
+    regressoes = []
+    print(f"\nComparação com {anterior.get('revisao') or '?'} ({anterior.get('gerado_em')}):")
+    for resultado in atual["resultados"]:
+        referencia = por_fator.get(resultado["fator"])
+        if referencia is None:
+            continue
+        for nome, medida in resultado["etapas"].items():
+            if nome not in referencia["etapas"]:
+                continue
+            antes, depois = referencia["etapas"][nome]["segundos"], medida["segundos"]
+            razao = depois / antes if antes > 0 else float("inf")
+            regressao = razao > 1 + tolerancia and depois - antes > PISO_REGRESSAO_SEGUNDOS
+            marca = "  <-- REGRESSÃO" if regressao else ""
+            print(f"  x{resultado['fator']:<6} {nome:<22} {antes:>9.3f}s -> {depois:>9.3f}s ({razao:>5.2f}x){marca}")
+            if regressao:
+                regressoes.append((resultado["fator"], nome, antes, depois))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(RAIZ, PATH_DATA_RAW), help="CSV original usado como semente.")
+    parser.add_argument("--fatores", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--engine", choices=ENGINES, default="arrow")
+    parser.add_argument("--ate", choices=ETAPAS, default=ETAPAS[-1],
+                        help="Última etapa medida (as escalas maiores costumam parar no ETL ou na montagem dos documentos).")
+    parser.add_argument("--mongo-uri", help="MongoDB real (ex.: mongodb://localhost:27017); padrão: mongomock.")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_PADRAO)
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições dos filtros do dashboard (mediana).")
+    parser.add_argument("--saida", help="Arquivo JSON de resultados (padrão: benchmarks/resultados/pipeline-<revisão>-<data>.json).")
+    parser.add_argument("--comparar-com", metavar="JSON", help="Resultado anterior; sai com erro se alguma etapa regredir.")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_REGRESSAO,
+                        help=f"Aumento relativo de tempo tolerado na comparação (padrão: {TOLERANCIA_REGRESSAO}).")
+    parser.add_argument("--dir-trabalho", help="Diretório para os arquivos gerados (padrão: temporário, removido no fim).")
+    parser.add_argument("--verboso", action="store_true", help="Mostra as mensagens do ETL.")
+    args = parser.parse_args()
+
+    client, tipo_mongo = conectar_mongo(args.mongo_uri) if args.ate in ("carga", "dashboard") else (None, None)
+    dir_trabalho = args.dir_trabalho or tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.makedirs(dir_trabalho, exist_ok=True)
+
+    revisao = revisao_git()
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "revisao": revisao,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "pyarrow": pyarrow.__version__,
+        "engine": args.engine,
+        "mongo": tipo_mongo,
+        "resultados": [],
+    }
+    try:
+        for fator in args.fatores:
+            relatorio["resultados"].append(medir_fator(fator, args, dir_trabalho, client))
+    finally:
+        if not args.dir_trabalho:
+            shutil.rmtree(dir_trabalho, ignore_errors=True)
+
+    saida = args.saida or os.path.join(
+        DIR_RESULTADOS, f"pipeline-{revisao or 'sem-git'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}.")
+
+    if args.comparar_com:
+        with open(args.comparar_com, encoding="utf-8") as arquivo:
+            regressoes = comparar_resultados(json.load(arquivo), relatorio, args.tolerancia)
+        if regressoes:
+            print(f"{len(regressoes)} etapas regrediram mais de {args.tolerancia:.0%}.")
+            sys.exit(1)
+        print("Nenhuma regressão acima da tolerância.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Instrumentação por etapa, compartilhada pelo ETL, pela carga no MongoDB e pelo dashboard.
+
+Cada etapa registra tempo de parede, linhas de entrada/saída, bytes lidos/escritos
+e o pico de RSS do processo ao final dela. Os registros vão para quem chamou
+`iniciar_coleta` na thread atual (o painel de depuração do dashboard usa isso
+por rerun) e, se configurado, para um arquivo JSON Lines. Com um diretório de
+perfil, a etapa mais externa também roda sob cProfile e grava um `.prof` (para
+pstats/snakeviz). Os nomes das etapas seguem "<componente>.<etapa>", e cada
+registro leva a etapa que a contém em "pai".
+
+Configuração por variável de ambiente (ou `configurar`): METRICAS_ARQUIVO e
+METRICAS_PERFIL_DIR.
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_config = {
+    "arquivo": os.environ.get("METRICAS_ARQUIVO") or None,
+    "perfil": os.environ.get("METRICAS_PERFIL_DIR") or None,
+}
+_local = threading.local()
+_trava_arquivo = threading.Lock()
+# O cProfile só admite um perfilador ativo por processo.
+_trava_perfil = threading.Lock()
+
+
+def configurar(arquivo=None, perfil=None):
+    """Define o arquivo JSON Lines de métricas e/ou o diretório dos perfis cProfile."""
+    if arquivo is not None:
+        _config["arquivo"] = arquivo
+    if perfil is not None:
+        _config["perfil"] = perfil
+
+
+def configuracao():
+    """Cópia da configuração atual, para repassar a processos filhos (`configurar(**configuracao())`)."""
+    return dict(_config)
+
+
+def pico_rss_bytes():
+    """Maior RSS do processo até agora (None onde o módulo `resource` não existe)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+def tamanho_em_disco(path):
+    """Bytes de um arquivo ou da soma dos arquivos de um diretório (0 se não existir)."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(raiz, nome)) for raiz, _, nomes in os.walk(path) for nome in nomes)
+
+
+def iniciar_coleta():
+    """Passa a guardar os registros desta thread na lista devolvida (substitui a coleta anterior)."""
+    _local.coleta = []
+    return _local.coleta
+
+
+def _pilha():
+    if not hasattr(_local, "pilha"):
+        _local.pilha = []
+    return _local.pilha
+
+
+def _novo_registro(nome, medidas, inicio=None):
+    pilha = _pilha()
+    inicio = inicio or datetime.now(timezone.utc)
+    return {
+        "etapa": nome,
+        "pai": pilha[-1] if pilha else None,
+        "inicio": inicio.isoformat(timespec="milliseconds"),
+        **medidas,
+    }
+
+
+def _emitir(registro):
+    pico = pico_rss_bytes()
+    registro["pico_rss_mb"] = round(pico / 2**20, 1) if pico is not None else None
+
+    coleta = getattr(_local, "coleta", None)
+    if coleta is not None:
+        coleta.append(registro)
+
+    if _config["arquivo"]:
+        linha = json.dumps(registro, ensure_ascii=False, default=str)
+        with _trava_arquivo, open(_config["arquivo"], "a", encoding="utf-8") as arquivo:
+            arquivo.write(linha + "\n")
+
+
+def registrar(nome, segundos, **medidas):
+    """Registra uma etapa medida por fora (ex.: tempo acumulado ao longo de um laço)."""
+    registro = _novo_registro(nome, medidas, inicio=datetime.now(timezone.utc) - timedelta(seconds=segundos))
+    registro["segundos"] = segundos
+    _emitir(registro)
+    return registro
+
+
+def _iniciar_perfil():
+    if not _config["perfil"] or not _trava_perfil.acquire(blocking=False):
+        return None
+    perfilador = cProfile.Profile()
+    try:
+        perfilador.enable()
+    except ValueError:
+        # Outro perfilador (ex.: do próprio usuário) já está ativo.
+        _trava_perfil.release()
+        return None
+    return perfilador
+
+
+def _gravar_perfil(perfilador, nome):
+    perfilador.disable()
+    _trava_perfil.release()
+    os.makedirs(_config["perfil"], exist_ok=True)
+    perfilador.dump_stats(os.path.join(_config["perfil"], f"{nome}-{datetime.now():%Y%m%d-%H%M%S}.prof"))
+
+
+@contextmanager
+def etapa(nome, **medidas):
+    """Mede o bloco `with` como uma etapa.
+
+    O dicionário devolvido é o próprio registro: o bloco pode preencher
+    linhas_saida, bytes_lidos, bytes_escritos etc. antes de ele ser emitido.
+    """
+    registro = _novo_registro(nome, medidas)
+    pilha = _pilha()
+    perfilador = _iniciar_perfil()
+    pilha.append(nome)
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    except BaseException as e:
+        registro["erro"] = type(e).__name__
+        raise
+    finally:
+        registro["segundos"] = time.perf_counter() - inicio
+        pilha.pop()
+        if perfilador is not None:
+            _gravar_perfil(perfilador, nome)
+        _emitir(registro)
@@ -0,0 +1,208 @@
+"""API HTTP/JSON local sobre o motor_consultas.py, para relatórios e outros serviços sem o Streamlit.
+
+Rotas:
+
+    GET  /saude                      -> {"status": "ok", "versao": ...}
+    GET  /consultas                  -> consultas disponíveis e os parâmetros de cada uma
+    GET  /consulta/<nome>?parametros -> resultado da consulta
+    POST /lote                       -> [{"consulta": "mapa", "parametros": {...}}, ...]
+
+Na query string, `paises` é uma lista de códigos separados por vírgula (ex.:
+`paises=BRA,USA`) e os anos e `n` são inteiros. O /lote devolve a lista de
+respostas na ordem do pedido, cada uma com "resultado" ou "erro": um pedido
+com várias consultas paga uma ida e volta só, e as consultas repetidas no
+lote são executadas uma vez. As respostas ficam num cache LRU (JSON já
+serializado) por versão dos dados, então uma carga nova invalida tudo.
+
+Pedidos inválidos (consulta, tipo ou valor de parâmetro) recebem 400; uma
+falha inesperada, como um erro do MongoDB, recebe 500. No /lote, os dois
+casos ficam no "erro" do item, e os demais itens são respondidos normalmente.
+
+Uso (a partir da raiz do repositório):
+
+    python dashboard/api_consultas.py --fonte parquet --porta 8502
+    python dashboard/api_consultas.py --fonte mongo --mongo-uri "mongodb+srv://..."
+    curl "http://127.0.0.1:8502/consulta/top20?carne=BEEF&n=5"
+"""
+import argparse
+import inspect
+import json
+import threading
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from pymongo import MongoClient
+
+import motor_consultas
+
+PARAMETROS_INTEIROS = {"ano_inicio", "ano_fim", "n"}
+PARAMETROS_LISTA = {"paises"}
+CACHE_MAX_PADRAO = 256
+
+
+def criar_cache(limite=CACHE_MAX_PADRAO):
+    return {"limite": limite, "entradas": OrderedDict(), "trava": threading.Lock(), "hits": 0, "misses": 0}
+
+
+def parametros_da_query(query):
+    """Query string -> parâmetros do motor_consultas (inteiros e listas convertidos)."""
+    parametros = {}
+    for nome, valor in parse_qsl(query, keep_blank_values=True):
+        if nome in PARAMETROS_LISTA:
+            parametros[nome] = [item for item in valor.split(",") if item]
+        elif nome in PARAMETROS_INTEIROS:
+            try:
+                parametros[nome] = int(valor)
+            except ValueError:
+                raise ValueError(f"Parâmetro '{nome}' deve ser inteiro: '{valor}'.") from None
+        else:
+            parametros[nome] = valor
+    return parametros
+
+
+def _executar(fonte, cache, nome, parametros):
+    """Resultado da consulta já serializado em JSON, do cache quando a versão dos dados não mudou."""
+    if not isinstance(parametros, dict):
+        raise ValueError("'parametros' deve ser um objeto JSON.")
+    versao = motor_consultas.versao(fonte)
+    chave = (versao, nome, json.dumps(parametros, sort_keys=True))
+    if versao is not None:
+        with cache["trava"]:
+            conteudo = cache["entradas"].get(chave)
+            if conteudo is not None:
+                cache["entradas"].move_to_end(chave)
+                cache["hits"] += 1
+                return conteudo
+
+    conteudo = json.dumps(motor_consultas.consultar(fonte, nome, **parametros), ensure_ascii=False)
+    with cache["trava"]:
+        cache["misses"] += 1
+        if versao is not None:
+            cache["entradas"][chave] = conteudo
+            while len(cache["entradas"]) > cache["limite"]:
+                cache["entradas"].popitem(last=False)
+    return conteudo
+
+
+def executar_lote(fonte, cache, pedidos):
+    """Lista de {"consulta", "parametros"} -> JSON da lista de respostas, na mesma ordem."""
+    if not isinstance(pedidos, list):
+        raise ValueError("O corpo do /lote deve ser uma lista de consultas.")
+    respostas = {}
+    partes = []
+    for pedido in pedidos:
+        if not isinstance(pedido, dict) or "consulta" not in pedido:
+            partes.append(json.dumps({"erro": "Cada item precisa de 'consulta'."}, ensure_ascii=False))
+            continue
+        chave = json.dumps(pedido, sort_keys=True)
+        if chave not in respostas:
+            try:
+                respostas[chave] = '{"resultado": ' + \
+                    _executar(fonte, cache, pedido["consulta"], pedido.get("parametros", {})) + "}"
+            except ValueError as e:
+                respostas[chave] = json.dumps({"erro": str(e)}, ensure_ascii=False)
+            # Uma falha inesperada (ex.: do MongoDB) fica só na resposta deste item.
+            except Exception as e:
+                traceback.print_exc()
+                respostas[chave] = json.dumps({"erro": f"Erro interno: {e!r}"}, ensure_ascii=False)
+        partes.append(respostas[chave])
+    return "[" + ", ".join(partes) + "]"
+
+
+def descrever_consultas():
+    return {
+        nome: {
+            "descricao": (inspect.getdoc(funcao) or "").split("\n")[0],
+            "parametros": list(inspect.signature(funcao).parameters)[1:],
+        }
+        for nome, funcao in motor_consultas.CONSULTAS.items()
+    }
+
+
+def criar_handler(fonte, cache, verboso=False):
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, status, conteudo):
+            corpo = conteudo.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def _erro(self, status, mensagem):
+            self._responder(status, json.dumps({"erro": mensagem}, ensure_ascii=False))
+
+        def _erro_interno(self, erro):
+            traceback.print_exc()
+            self._erro(500, f"Erro interno: {erro!r}")
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            try:
+                if url.path == "/saude":
+                    self._responder(200, json.dumps({"status": "ok", "versao": motor_consultas.versao(fonte)}))
+                elif url.path == "/consultas":
+                    self._responder(200, json.dumps(descrever_consultas(), ensure_ascii=False))
+                elif url.path.startswith("/consulta/"):
+                    nome = url.path[len("/consulta/"):]
+                    self._responder(200, _executar(fonte, cache, nome, parametros_da_query(url.query)))
+                else:
+                    self._erro(404, f"Rota desconhecida: {url.path}")
+            except ValueError as e:
+                self._erro(400, str(e))
+            except Exception as e:
+                self._erro_interno(e)
+
+        def do_POST(self):
+            if urlsplit(self.path).path != "/lote":
+                self._erro(404, f"Rota desconhecida: {self.path}")
+                return
+            try:
+                tamanho = int(self.headers.get("Content-Length", 0))
+                pedidos = json.loads(self.rfile.read(tamanho) or b"null")
+                self._responder(200, executar_lote(fonte, cache, pedidos))
+            except ValueError as e:
+                self._erro(400, str(e))
+            except Exception as e:
+                self._erro_interno(e)
+
+        def log_message(self, formato, *args):
+            if verboso:
+                super().log_message(formato, *args)
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fonte", choices=["parquet", "mongo"], default="parquet")
+    parser.add_argument("--mongo-uri", help="Obrigatório com --fonte mongo.")
+    parser.add_argument("--db", default="consumo_carne")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8502)
+    parser.add_argument("--cache-max", type=int, default=CACHE_MAX_PADRAO, help="Respostas guardadas no cache LRU.")
+    parser.add_argument("--verboso", action="store_true", help="Registra cada requisição no terminal.")
+    args = parser.parse_args()
+
+    client = None
+    if args.fonte == "mongo":
+        if not args.mongo_uri:
+            parser.error("--mongo-uri é obrigatório com --fonte mongo.")
+        client = MongoClient(args.mongo_uri)
+        fonte = motor_consultas.abrir_mongo(client[args.db])
+    else:
+        fonte = motor_consultas.abrir_parquet()
+
+    servidor = ThreadingHTTPServer((args.host, args.porta), criar_handler(fonte, criar_cache(args.cache_max),
+                                                                         args.verboso))
+    print(f"API de consultas ({args.fonte}) em http://{args.host}:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        if client is not None:
+            client.close()
@@ -1,8 +1,22 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import numpy as np 
-from pymongo import MongoClient
+
+import aquecimento_cache
+import cache_disco
+import conexao_mongo
+import consultas_mongo
+import figuras
+import fonte_parquet
+import instrumentacao
+import motor_consultas
+from consultas_cubo import PATH_CUBO, composicao_do_cubo, mapa_do_cubo, preparar_cubo
+from figuras import ANO_PROJECAO_INICIA
+from fonte_parquet import PATH_PARQUET, ler_consumo
+from instrumentacao import etapa
+from modelo_dados import COLUNAS_PARQUET, TRADUCAO_CARNES, achatar_documentos, compactar, fatiar, padronizar_dataframe
 
 st.set_page_config(
     page_title="Consumo Mundial de Carne",
@@ -10,14 +24,18 @@ st.set_page_config(
     layout="wide"
 )
 
-ANO_PROJECAO_INICIA = 2018 
+registros_execucao = instrumentacao.iniciar_coleta()
+inicio_execucao = time.perf_counter()
 
-TRADUCAO_CARNES = {
-    "POULTRY": "Aves",
-    "BEEF": "Bovina",
-    "PIG": "Suína",
-    "SHEEP": "Ovinos"
-}
+# "mongo" (padrão): pipelines de agregação no Atlas, só com a fatia dos filtros;
+# "mongo_completo": carga antiga da coleção inteira (find + json_normalize), mantida para comparação;
+# "parquet": lê do ETL local só a fatia dos filtros.
+FONTE_DADOS = os.environ.get("FONTE_DADOS", "mongo")
+
+# Painel com os tempos de cada etapa do rerun: DASHBOARD_DEBUG=1 ou ?debug=1 na URL.
+PAINEL_DEBUG = os.environ.get("DASHBOARD_DEBUG") == "1" or st.query_params.get("debug") == "1"
+
+CONNECTION_STRING = ""
 
 EMOJIS_CARNE = {
     "Aves": "🐔",
@@ -26,13 +44,26 @@ EMOJIS_CARNE = {
     "Ovinos": "🐑"
 }
 
-@st.cache_data(show_spinner="Conectando ao MongoDB Atlas...")
-def carregar_dados():
-    
-    connection_string = ""
+COLUNAS_RANKING = {
+    "País": "País",
+    "Ano_Inicio": "Ano Inicial",
+    "Valor_Inicio": "Valor Inicial",
+    "Ano_Fim": "Ano Final",
+    "Valor_Fim": "Valor Final",
+    "Crescimento_Pct": "Variação (%)",
+    "CAGR_Pct": "CAGR (%)",
+    "Inclinacao": "Inclinação (por ano)"
+}
+
+@st.cache_resource(show_spinner="Conectando ao MongoDB Atlas...", validate=conexao_mongo.cliente_saudavel)
+def obter_cliente():
+    """MongoClient único do processo, compartilhado por todas as sessões (o pool fica dentro dele)."""
+    return conexao_mongo.criar_cliente(CONNECTION_STRING)
+
+def ler_dados_completos_mongo():
 
     try:
-        client = MongoClient(connection_string)
+        client = obter_cliente()
         db = client["consumo_carne"]
         collection = db["dados_processados"]
         
@@ -42,65 +73,145 @@ def carregar_dados():
             st.error("Erro: A coleção 'dados_processados' no MongoDB está vazia.")
             st.error("O script 'scripts_etl/load_mongo.py' falhou ou ainda não foi executado.")
             st.stop()
-        
-        client.close()
 
-        df_anos = pd.json_normalize(
-            data,
-            record_path=['registros_consumo'],
-            meta=['_id', 'pais']
-        )
-        
-        df_final_flat = pd.json_normalize(
-            df_anos.to_dict('records'),
-            record_path=['carnes'],
-            meta=['_id', 'pais', 'ano']
-        )
+        df = achatar_documentos(data)
 
     except Exception as e:
         st.error(f"Erro ao conectar ou ler do MongoDB: {e}")
         st.error(f"Verifique sua Connection String (senha) e se o seu IP está libertado no 'Network Access' do Atlas.")
         st.stop()
 
-    df = df_final_flat.rename(columns={
-        "ano": "Ano",
-        "_id": "Pais_Codigo",
-        "tipo": "Tipo_Carne_EN",
-        "consumo_per_capita_kg": "Consumo_KG_Capita",
-        "consumo_total_thnd_tonne": "Consumo_Mil_Toneladas",
-        "pais": "País"
-    })
-    
-    df['Consumo_KG_Capita'] = df['Consumo_KG_Capita'].fillna(0)
-    df['Consumo_Mil_Toneladas'] = df['Consumo_Mil_Toneladas'].fillna(0) 
-    
-    if 'País' not in df.columns:
-        df['País'] = df['Pais_Codigo']
-        
-    df['Tipo_Carne'] = df['Tipo_Carne_EN'].map(TRADUCAO_CARNES).fillna(df['Tipo_Carne_EN'])
-        
-    return df
+    return padronizar_dataframe(df)
+
+@st.cache_data(show_spinner="Conectando ao MongoDB Atlas...")
+def carregar_dados(versao):
+    return compactar(cache_disco.obter(cache_disco.chave_cache("dados_completos"), versao, ler_dados_completos_mongo))
 
-df_completo = carregar_dados()
+def consultar_mongo(consulta):
+    """Executa `consulta(collection)` na coleção de consumo da última carga, com o tratamento de erro do dashboard."""
+    try:
+        with etapa("dashboard.consulta_mongo"):
+            return consulta(consultas_mongo.colecao_consumo(obter_cliente()["consumo_carne"]))
+    except Exception as e:
+        st.error(f"Erro ao conectar ou ler do MongoDB: {e}")
+        st.error(f"Verifique sua Connection String (senha) e se o seu IP está libertado no 'Network Access' do Atlas.")
+        st.stop()
+
+def versao_dataset():
+    """Versão gravada pelo load_mongo.py em 'metadados'; sem ela o cache em disco não é usado."""
+    metadados = consultar_mongo(lambda collection: collection.database["metadados"].find_one({"_id": "versao_dataset"}))
+    return metadados["versao"] if metadados else None
+
+@st.cache_data(ttl=60, show_spinner=False)
+def versao_dados():
+    """Versão dos dados, relida no máximo a cada minuto.
+
+    É o primeiro argumento de todas as funções em cache abaixo (e a versão do
+    cache de figuras): uma carga nova invalida dados e figuras juntos. No modo
+    parquet, vem dos arquivos gravados pelo ETL.
+    """
+    if FONTE_DADOS == "parquet":
+        return motor_consultas.versao(motor_consultas.abrir_parquet(PATH_PARQUET, PATH_CUBO))
+    return versao_dataset()
+
+@st.cache_data(show_spinner="Lendo filtros disponíveis...")
+def carregar_dimensoes(versao):
+    if FONTE_DADOS == "parquet":
+        try:
+            return fonte_parquet.ler_dimensoes(PATH_PARQUET)
+        except Exception as e:
+            st.error(f"Erro ao ler o Parquet em {PATH_PARQUET}: {e}")
+            st.error("Execute 'python scripts_etl/data_process.py' antes de usar FONTE_DADOS=parquet.")
+            st.stop()
+
+    dimensoes = consultar_mongo(consultas_mongo.ler_dimensoes)
+    if dimensoes is None:
+        st.error("Erro: A coleção 'dados_processados' no MongoDB está vazia.")
+        st.error("O script 'scripts_etl/load_mongo.py' falhou ou ainda não foi executado.")
+        st.stop()
+    return dimensoes
+
+@st.cache_data(show_spinner="Carregando dados do período...")
+def carregar_fatia(versao, ano_inicio, ano_fim, tipos=None, locations=None):
+    if FONTE_DADOS == "parquet":
+        with etapa("dashboard.ler_parquet") as registro:
+            df = ler_consumo(PATH_PARQUET, tipos=tipos, locations=locations, ano_inicio=ano_inicio, ano_fim=ano_fim)
+            registro["linhas_saida"] = len(df)
+        return compactar(padronizar_dataframe(df.rename(columns=COLUNAS_PARQUET)))
+
+    def consultar():
+        return consultar_mongo(
+            lambda collection: aquecimento_cache.consultar_fatia(collection, ano_inicio, ano_fim, tipos, locations))
+
+    chave = aquecimento_cache.chave_fatia(ano_inicio, ano_fim, tipos, locations)
+    return compactar(cache_disco.obter(chave, versao, consultar))
+
+@st.cache_data(show_spinner="Agregando no MongoDB Atlas...")
+def carregar_medias_mongo(versao, ano_inicio, ano_fim, tipos):
+    def consultar():
+        medias = consultar_mongo(lambda collection: list(collection.aggregate(consultas_mongo.pipeline_medias_periodo(
+            ano_inicio, ano_fim, tipos, layout=consultas_mongo.layout_da_colecao(collection)))))
+        return pd.DataFrame(medias, columns=["País", "Pais_Codigo", "Consumo_KG_Capita", "Consumo_Mil_Toneladas"]) \
+            .sort_values(['País', 'Pais_Codigo'], ignore_index=True)
+
+    chave = cache_disco.chave_cache("medias", ano_inicio, ano_fim, tipos)
+    return cache_disco.obter(chave, versao, consultar)
+
+@st.cache_data(show_spinner="Carregando cubo pré-agregado...")
+def carregar_cubo(versao):
+    """Cubo (país, carne, ano) com somas prefixadas gerado pelo ETL, ou None se ainda não existir."""
+    if FONTE_DADOS == "parquet":
+        if not os.path.exists(PATH_CUBO):
+            return None
+        cubo = pd.read_parquet(PATH_CUBO)
+    else:
+        def consultar():
+            return aquecimento_cache.consultar_cubo(obter_cliente()["consumo_carne"])
+
+        try:
+            cubo = cache_disco.obter(aquecimento_cache.chave_cubo(), versao, consultar)
+        except Exception:
+            return None
+        if cubo.empty:
+            return None
+    return preparar_cubo(cubo)
+
+# O modo "mongo_completo" reproduz o caminho antigo por inteiro, sem o cubo.
+with etapa("dashboard.carregar_dados", fonte=FONTE_DADOS):
+    versao = versao_dados()
+    # Sem cache de figuras no modo parquet.
+    versao_figuras = versao if FONTE_DADOS != "parquet" else None
+    cubo = carregar_cubo(versao) if FONTE_DADOS != "mongo_completo" else None
+
+    if FONTE_DADOS == "mongo_completo":
+        df_completo = carregar_dados(versao)
+        opcoes_paises = df_completo['País'].unique()
+        ano_min = int(df_completo['Ano'].min())
+        ano_max = int(df_completo['Ano'].max())
+        opcoes_carnes = df_completo['Tipo_Carne'].unique()
+    else:
+        dimensoes = carregar_dimensoes(versao)
+        codigos_paises = dimensoes["paises"]
+        opcoes_paises = list(codigos_paises)
+        ano_min = int(dimensoes["ano_min"])
+        ano_max = int(dimensoes["ano_max"])
+        opcoes_carnes = [TRADUCAO_CARNES.get(tipo, tipo) for tipo in dimensoes["tipos"]]
 
 st.sidebar.title("Filtros 🌎")
 
-paises_pt = sorted(df_completo['País'].unique())
+paises_pt = sorted(opcoes_paises)
 paises_selecionados_nomes = st.sidebar.multiselect(
     "1. Países para Análise:",
     help="Selecione os países que deseja analisar nas abas 'Análise de Evolução' e 'Comparativos'.",
     options=paises_pt,
-    default=["Brasil", "Estados Unidos", "Austrália", "Argentina", "China", "Índia"]
+    default=aquecimento_cache.PAISES_PADRAO
 )
 
-ano_min = int(df_completo['Ano'].min())
-ano_max = int(df_completo['Ano'].max())
-
 intervalo_anos = st.sidebar.slider( 
     "2. Período de Análise:", 
     min_value=ano_min,
     max_value=ano_max,
-    value=(ano_max - 5, ano_max)
+    value=aquecimento_cache.periodo_padrao(ano_max)
 )
 start_ano, end_ano = intervalo_anos
 
@@ -108,7 +219,7 @@ if end_ano >= ANO_PROJECAO_INICIA:
     st.sidebar.warning(f"**Aviso:** O período selecionado (até {end_ano}) inclui **projeções**.")
 
 
-tipos_carne_pt = sorted(df_completo['Tipo_Carne'].unique())
+tipos_carne_pt = sorted(opcoes_carnes)
 carne_selecionada_pt = st.sidebar.selectbox(
     "3. Tipo de Carne:",
     help="Filtro global para todo o dashboard.",
@@ -119,53 +230,50 @@ carne_selecionada_pt = st.sidebar.selectbox(
 metrica_selecionada_label = st.sidebar.radio(
     "4. Métrica de Análise:",
     help="Selecione a métrica que irá colorir o mapa e será usada em todos os gráficos e KPIs.",
-    options=["KG por Capita", "Milhares de Toneladas"],
+    options=list(figuras.ROTULOS_METRICAS.values()),
     format_func=lambda x: "KG p/ Capita" if x == "KG por Capita" else "Milhares de Toneladas"
 )
-coluna_metrica = "Consumo_KG_Capita" if metrica_selecionada_label == "KG por Capita" else "Consumo_Mil_Toneladas"
-
-df_base_filtrado = df_completo[
-    (df_completo['Ano'] >= start_ano) &
-    (df_completo['Ano'] <= end_ano) &
-    (df_completo['Tipo_Carne'] == carne_selecionada_pt)
-]
-
-df_base_paises = df_completo[
-    (df_completo['País'].isin(paises_selecionados_nomes)) &
-    (df_completo['Tipo_Carne'] == carne_selecionada_pt) &
-    (df_completo['Ano'] >= start_ano) &
-    (df_completo['Ano'] <= end_ano)
-]
-
-df_filtrado_mapa = df_base_filtrado \
-    .groupby(['País', 'Pais_Codigo'], as_index=False) \
-    .agg({
-        'Consumo_KG_Capita': 'mean',
-        'Consumo_Mil_Toneladas': 'mean'
-    })
-
-df_filtrado_top20 = df_filtrado_mapa.sort_values(by=coluna_metrica, ascending=False).head(20)
-
-df_comp_carnes_bruto = df_completo[
-    (df_completo['Ano'] >= start_ano) &
-    (df_completo['Ano'] <= end_ano) &
-    (df_completo['País'].isin(paises_selecionados_nomes))
-]
-df_filtrado_comp_carnes = df_comp_carnes_bruto \
-    .groupby(['País', 'Tipo_Carne'], as_index=False) \
-    .agg({
-        'Consumo_KG_Capita': 'mean',
-        'Consumo_Mil_Toneladas': 'mean'
-    })
+coluna_metrica = {rotulo: coluna for coluna, rotulo in figuras.ROTULOS_METRICAS.items()}[metrica_selecionada_label]
+
+carne_selecionada_en = {pt: en for en, pt in TRADUCAO_CARNES.items()}.get(carne_selecionada_pt, carne_selecionada_pt)
+
+with etapa("dashboard.carregar_fatia", fonte=FONTE_DADOS) as registro:
+    if FONTE_DADOS == "mongo_completo":
+        df_fatia_paises = df_completo
+    else:
+        # Evolução, composição e tendências precisam de todas as carnes dos países escolhidos no período.
+        df_fatia_paises = carregar_fatia(
+            versao, start_ano, end_ano,
+            locations=tuple(sorted(codigos_paises[pais] for pais in paises_selecionados_nomes))
+        )
+
+    df_base_paises = fatiar(df_fatia_paises, carnes=[carne_selecionada_pt], paises=paises_selecionados_nomes,
+                            ano_inicio=start_ano, ano_fim=end_ano)
+    registro["linhas_saida"] = len(df_fatia_paises)
+
+with etapa("dashboard.agregar_mapa_composicao", usa_cubo=cubo is not None):
+    if cubo is not None:
+        df_filtrado_mapa = mapa_do_cubo(cubo, start_ano, end_ano, carne_selecionada_en)
+    elif FONTE_DADOS == "mongo":
+        df_filtrado_mapa = carregar_medias_mongo(versao, start_ano, end_ano, (carne_selecionada_en,))
+    else:
+        df_fatia_carne = df_completo if FONTE_DADOS == "mongo_completo" \
+            else carregar_fatia(versao, start_ano, end_ano, tipos=(carne_selecionada_en,))
+
+        df_filtrado_mapa = motor_consultas.medias_por_pais(df_fatia_carne, carne_selecionada_pt, start_ano, end_ano)
+
+    df_filtrado_top20 = motor_consultas.top_paises(df_filtrado_mapa, coluna_metrica)
+
+    if cubo is not None:
+        df_filtrado_comp_carnes = composicao_do_cubo(cubo, start_ano, end_ano, paises_selecionados_nomes)
+    else:
+        df_filtrado_comp_carnes = motor_consultas.medias_por_carne(df_fatia_paises, paises_selecionados_nomes,
+                                                                   start_ano, end_ano)
 
 df_filtrado_evolucao = df_base_paises
 
-df_filtrado_shift = df_completo[
-    (df_completo['País'].isin(paises_selecionados_nomes)) &
-    (df_completo['Tipo_Carne_EN'].isin(["POULTRY", "BEEF"])) &
-    (df_completo['Ano'] >= start_ano) &
-    (df_completo['Ano'] <= end_ano)
-]
+df_filtrado_shift = fatiar(df_fatia_paises, carnes=[TRADUCAO_CARNES["POULTRY"], TRADUCAO_CARNES["BEEF"]],
+                           paises=paises_selecionados_nomes, ano_inicio=start_ano, ano_fim=end_ano)
 
 st.title("Dashboard de Consumo Mundial de Carne")
 
@@ -175,35 +283,15 @@ tab_mapa, tab_analise, tab_comparativo, tab_relatorio = st.tabs(
     ["🗺️ Mapa Mundial", "📈 Análise de Evolução", "📊 Comparativos", "📝 Relatório Executivo"]
 )
 
-with tab_mapa:
+with tab_mapa, etapa("dashboard.aba_mapa"):
     st.header(f"Consumo Mundial (Média {start_ano}-{end_ano})")
     
     if end_ano >= ANO_PROJECAO_INICIA:
         st.warning(f"**Aviso:** Os dados exibidos (a partir de {ANO_PROJECAO_INICIA}) incluem **projeções**.")
     
-    hover_data_config = { "Pais_Codigo": False }
-    if coluna_metrica == "Consumo_KG_Capita":
-        hover_data_config["Consumo_Mil_Toneladas"] = ':.0f'
-        hover_data_config["Consumo_KG_Capita"] = ':.2f' 
-    else:
-        hover_data_config["Consumo_KG_Capita"] = ':.2f'
-        hover_data_config["Consumo_Mil_Toneladas"] = ':.0f' 
-
-    
-    fig_mapa = px.choropleth(
-        df_filtrado_mapa,
-        locations="Pais_Codigo",
-        locationmode="ISO-3",
-        color=coluna_metrica, 
-        hover_name="País",
-        hover_data=hover_data_config, 
-        color_continuous_scale=px.colors.sequential.YlOrRd,
-        title=f"Média de Consumo de {carne_selecionada_pt}"
-    )
-    
-    fig_mapa.update_layout(
-        geo=dict(showframe=False, showcoastlines=False, projection_type='equirectangular'),
-        margin={"r":0,"t":40,"l":0,"b":0}
+    fig_mapa = figuras.obter(
+        figuras.chave_figura("mapa", carne_selecionada_en, coluna_metrica, start_ano, end_ano), versao_figuras,
+        lambda: figuras.figura_mapa(df_filtrado_mapa, coluna_metrica, carne_selecionada_pt)
     )
     
     st.plotly_chart(fig_mapa, use_container_width=True)
@@ -214,34 +302,22 @@ with tab_mapa:
         "- **Milhares de Toneladas:** Mostra o volume total. Países com populações enormes (ex: EUA, China) se destacam."
     )
 
-with tab_analise:
+with tab_analise, etapa("dashboard.aba_evolucao"):
     st.header(f"Análise de Evolução Temporal ({start_ano}-{end_ano})")
     
     if not df_filtrado_evolucao.empty:
-        fig_tendencia = px.line(
-            df_filtrado_evolucao.sort_values(by="Ano"),
-            x="Ano",
-            y=coluna_metrica,
-            color="País",
-            title=f"Evolução do Consumo de {carne_selecionada_pt}"
+        fig_tendencia = figuras.obter(
+            figuras.chave_figura("evolucao", carne_selecionada_en, coluna_metrica, start_ano, end_ano,
+                                 tuple(sorted(paises_selecionados_nomes))),
+            versao_figuras,
+            lambda: figuras.figura_evolucao(df_filtrado_evolucao, coluna_metrica, carne_selecionada_pt, start_ano, end_ano)
         )
         
-        if end_ano >= ANO_PROJECAO_INICIA:
-            fig_tendencia.add_vrect(
-                x0=max(start_ano, ANO_PROJECAO_INICIA - 0.5), 
-                x1=end_ano + 0.5, 
-                fillcolor="gray",
-                opacity=0.1,
-                line_width=0,
-                annotation_text="Projeção",
-                annotation_position="top left"
-            )
-        
         st.plotly_chart(fig_tendencia, use_container_width=True)
     else:
         st.info("Selecione pelo menos um país no Filtro 1 para ver a tendência.")
 
-with tab_comparativo:
+with tab_comparativo, etapa("dashboard.aba_comparativos"):
     st.header(f"Comparativos (Média do Período {start_ano}-{end_ano})") 
     
     if end_ano >= ANO_PROJECAO_INICIA:
@@ -251,20 +327,11 @@ with tab_comparativo:
     st.markdown(f"*(Média para: {', '.join(paises_selecionados_nomes)})*")
     
     if not df_filtrado_comp_carnes.empty:
-        df_totals = df_filtrado_comp_carnes.groupby("País")["Consumo_KG_Capita"].sum().reset_index(name="Total_KG_Pais")
-        df_comp_percent = df_filtrado_comp_carnes.merge(df_totals, on="País")
-        
-        df_comp_percent = df_comp_percent[df_comp_percent["Total_KG_Pais"] > 0]
-        df_comp_percent["Participação"] = df_comp_percent["Consumo_KG_Capita"] / df_comp_percent["Total_KG_Pais"]
-
-        fig_bar_carnes = px.bar(
-            df_comp_percent,
-            x="País",
-            y="Participação", 
-            color="Tipo_Carne",
-            title=f"Participação de Cada Tipo de Carne no Consumo (Média KG p/ Capita)"
+        fig_bar_carnes = figuras.obter(
+            figuras.chave_figura("composicao", start_ano, end_ano, tuple(sorted(paises_selecionados_nomes))),
+            versao_figuras,
+            lambda: figuras.figura_composicao(df_filtrado_comp_carnes)
         )
-        fig_bar_carnes.update_layout(yaxis_tickformat='.0%')
         st.plotly_chart(fig_bar_carnes, use_container_width=True)
     else:
         st.warning("Não há dados para esta combinação de filtros.")
@@ -273,17 +340,16 @@ with tab_comparativo:
     st.subheader(f"Top 20 Países Consumidores") 
     
     if not df_filtrado_top20.empty:
-        fig_bar_paises = px.bar(
-            df_filtrado_top20,
-            x="País",
-            y=coluna_metrica,
-            title=f"Top 20 Países (Média de {metrica_selecionada_label}, {start_ano}-{end_ano})"
+        fig_bar_paises = figuras.obter(
+            figuras.chave_figura("top20", carne_selecionada_en, coluna_metrica, start_ano, end_ano),
+            versao_figuras,
+            lambda: figuras.figura_top20(df_filtrado_top20, coluna_metrica, metrica_selecionada_label, start_ano, end_ano)
         )
         st.plotly_chart(fig_bar_paises, use_container_width=True)
     else:
         st.warning("Não há dados para esta combinação de filtros.")
 
-with tab_relatorio:
+with tab_relatorio, etapa("dashboard.aba_relatorio"):
     st.header("Relatório Executivo") 
 
     st.subheader(f"Panorama Global (Média {start_ano}-{end_ano})")
@@ -292,11 +358,10 @@ with tab_relatorio:
         
     col_g1, col_g2 = st.columns(2)
 
-    if not df_filtrado_mapa.empty:
-        df_mapa_sem_duplicados = df_filtrado_mapa.drop_duplicates(subset=['Pais_Codigo'])
-        
-        top_capita_global = df_mapa_sem_duplicados.loc[df_mapa_sem_duplicados['Consumo_KG_Capita'].idxmax()]
-        top_total_global = df_mapa_sem_duplicados.loc[df_mapa_sem_duplicados['Consumo_Mil_Toneladas'].idxmax()]
+    destaques_globais = motor_consultas.destaques_globais(df_filtrado_mapa)
+    if destaques_globais is not None:
+        top_capita_global = destaques_globais["per_capita"]
+        top_total_global = destaques_globais["total"]
 
         with col_g1:
             st.metric(
@@ -327,18 +392,19 @@ with tab_relatorio:
     if not paises_selecionados_nomes:
         st.warning("Selecione pelo menos um país no Filtro 1 para ver a análise de tendências.")
     else:
+        tendencias = motor_consultas.tendencias_crescimento(df_base_paises, carne_selecionada_pt, coluna_metrica) \
+            .set_index("País")
+
         for pais in paises_selecionados_nomes:
-            df_pais_evolucao = df_base_paises[df_base_paises['País'] == pais].sort_values(by="Ano")
-            
-            if not df_pais_evolucao.empty:
-                val_inicio = df_pais_evolucao.iloc[0][coluna_metrica]
-                ano_inicio_real = df_pais_evolucao.iloc[0]['Ano']
-                val_fim = df_pais_evolucao.iloc[-1][coluna_metrica]
-                ano_fim_real = df_pais_evolucao.iloc[-1]['Ano']
-                
-                if val_inicio > 0 and ano_fim_real > ano_inicio_real:
-                    crescimento = ((val_fim - val_inicio) / val_inicio) * 100
-                    
+            if pais in tendencias.index:
+                tendencia = tendencias.loc[pais]
+                val_inicio = tendencia["Valor_Inicio"]
+                ano_inicio_real = int(tendencia["Ano_Inicio"])
+                val_fim = tendencia["Valor_Fim"]
+                ano_fim_real = int(tendencia["Ano_Fim"])
+                crescimento = tendencia["Crescimento_Pct"]
+
+                if pd.notna(crescimento):
                     if crescimento >= 0:
                         delta_str = f"+{crescimento:.1f}%"
                         delta_color = "normal" 
@@ -366,4 +432,40 @@ with tab_relatorio:
                 with cols_tendencia[col_idx % 3]:
                     st.metric(label=f"Variação de {pais}", value="N/A", delta="Sem dados", delta_color="off")
                     st.caption(f"Nenhum dado neste período.")
-                col_idx += 1
\ No newline at end of file
+                col_idx += 1
+
+    if st.checkbox(f"Ranking de crescimento de {carne_selecionada_pt} em todos os países", key="ranking_todos"):
+        df_todos_paises = df_completo if FONTE_DADOS == "mongo_completo" \
+            else carregar_fatia(versao, start_ano, end_ano, tipos=(carne_selecionada_en,))
+        ranking = motor_consultas.tendencias_crescimento(df_todos_paises, carne_selecionada_pt, coluna_metrica,
+                                                         ano_inicio=start_ano, ano_fim=end_ano)
+        st.dataframe(
+            ranking.rename(columns=COLUNAS_RANKING)[list(COLUNAS_RANKING.values())],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "Valor Inicial": st.column_config.NumberColumn(format="%.2f"),
+                "Valor Final": st.column_config.NumberColumn(format="%.2f"),
+                "Variação (%)": st.column_config.NumberColumn(format="%.1f"),
+                "CAGR (%)": st.column_config.NumberColumn(format="%.2f"),
+                "Inclinação (por ano)": st.column_config.NumberColumn(format="%.3f"),
+            }
+        )
+
+if FONTE_DADOS != "parquet":
+    metricas_cache = cache_disco.METRICAS
+    st.sidebar.caption(
+        f"Cache em disco (este processo): {metricas_cache['hits']} hits, {metricas_cache['misses']} misses "
+        f"({metricas_cache['expirados']} expirados). Figuras: {figuras.METRICAS['hits_memoria']} hits em memória, "
+        f"{figuras.METRICAS['hits_disco']} em disco, {figuras.METRICAS['misses']} montadas."
+    )
+
+instrumentacao.registrar("dashboard.rerun", time.perf_counter() - inicio_execucao, fonte=FONTE_DADOS)
+
+if PAINEL_DEBUG:
+    with st.sidebar.expander("Depuração: tempos deste rerun", expanded=True):
+        df_registros = pd.DataFrame(registros_execucao) \
+            .reindex(columns=["etapa", "pai", "segundos", "linhas_saida", "pico_rss_mb"])
+        df_registros["ms"] = df_registros.pop("segundos") * 1000
+        st.dataframe(df_registros, hide_index=True, use_container_width=True,
+                     column_config={"ms": st.column_config.NumberColumn(format="%.1f")})
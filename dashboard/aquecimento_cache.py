@@ -0,0 +1,127 @@
+"""Consultas do dashboard guardadas no cache em disco e o pré-aquecimento delas.
+
+Depois de uma carga no MongoDB a versão do dataset muda e o primeiro usuário
+pagaria todas as consultas. `aquecer` grava antes as entradas que a primeira
+tela usa (cubo e fatia dos filtros padrão), com as mesmas chaves e os mesmos
+DataFrames que o app.py calcularia, e as figuras Plotly dos filtros padrão
+para cada carne e métrica (`figuras`).
+
+Uso (a partir da raiz do repositório, depois do load_mongo.py):
+
+    python dashboard/aquecimento_cache.py --mongo-uri "mongodb+srv://..."
+"""
+import argparse
+
+import pandas as pd
+from pymongo import MongoClient
+
+import cache_disco
+import consultas_mongo
+from consultas_cubo import composicao_do_cubo, mapa_do_cubo, preparar_cubo
+from modelo_dados import TRADUCAO_CARNES, compactar, fatiar, padronizar_dataframe
+
+COLUNAS_REGISTROS = ["Pais_Codigo", "País", "Ano", "Tipo_Carne_EN", "Consumo_KG_Capita", "Consumo_Mil_Toneladas"]
+
+# Seleção com que o dashboard abre.
+PAISES_PADRAO = ["Brasil", "Estados Unidos", "Austrália", "Argentina", "China", "Índia"]
+ANOS_PADRAO = 6
+
+
+def periodo_padrao(ano_max):
+    return (ano_max - ANOS_PADRAO + 1, ano_max)
+
+
+def chave_fatia(ano_inicio, ano_fim, tipos=None, locations=None):
+    return cache_disco.chave_cache("fatia", ano_inicio, ano_fim, tipos, locations)
+
+
+def chave_cubo():
+    return cache_disco.chave_cache("cubo")
+
+
+def consultar_fatia(collection, ano_inicio, ano_fim, tipos=None, locations=None):
+    """Linhas (país, ano, carne) do período, já no formato do dashboard (antes de `compactar`)."""
+    pipeline = consultas_mongo.pipeline_registros(ano_inicio, ano_fim, tipos=tipos, locations=locations,
+                                                  layout=consultas_mongo.layout_da_colecao(collection))
+    return padronizar_dataframe(pd.DataFrame(list(collection.aggregate(pipeline)), columns=COLUNAS_REGISTROS))
+
+
+def consultar_cubo(db):
+    return pd.DataFrame(list(db["cubo_consumo"].find({}, {"_id": 0, "hash_documento": 0})))
+
+
+def aquecer(db):
+    """Grava no cache em disco as consultas da tela inicial. Retorna as chaves gravadas."""
+    metadados = db["metadados"].find_one({"_id": "versao_dataset"})
+    collection = consultas_mongo.colecao_consumo(db)
+    dimensoes = consultas_mongo.ler_dimensoes(collection)
+    if metadados is None or dimensoes is None:
+        print("Nenhuma carga registrada no MongoDB; nada a aquecer.")
+        return []
+
+    versao = metadados["versao"]
+    ano_inicio, ano_fim = periodo_padrao(int(dimensoes["ano_max"]))
+    locations = tuple(sorted(dimensoes["paises"][pais] for pais in PAISES_PADRAO if pais in dimensoes["paises"]))
+
+    cubo = consultar_cubo(db)
+    fatia = consultar_fatia(collection, ano_inicio, ano_fim, None, locations)
+    entradas = {chave_cubo(): cubo, chave_fatia(ano_inicio, ano_fim, None, locations): fatia}
+    for chave, df in entradas.items():
+        cache_disco.gravar(chave, versao, df)
+    print(f"{len(entradas)} consultas gravadas no cache para a versão {versao}.")
+
+    chaves_figuras = aquecer_figuras(versao, cubo, fatia, dimensoes["tipos"], ano_inicio, ano_fim)
+    return list(entradas) + chaves_figuras
+
+
+def aquecer_figuras(versao, cubo, fatia, tipos, ano_inicio, ano_fim, paises=PAISES_PADRAO):
+    """Monta as figuras da tela inicial para cada carne e métrica, com os mesmos dados do app.py.
+
+    Usa o cubo (mapa, Top 20, composição) e a fatia dos países padrão
+    (evolução) já lidos por `aquecer`. Retorna as chaves gravadas.
+    """
+    # Importados aqui: o motor_consultas importa este módulo e não deve carregar o plotly e o streamlit do figuras.
+    import figuras
+    from motor_consultas import top_paises
+
+    if cubo.empty:
+        print("Sem cubo no MongoDB; as figuras serão montadas no primeiro acesso.")
+        return []
+
+    cubo = preparar_cubo(cubo)
+    fatia = compactar(fatia)
+    chaves = []
+
+    def gravar(chave, df, construir):
+        if not df.empty:
+            figuras.gravar(chave, versao, construir(df))
+            chaves.append(chave)
+
+    gravar(figuras.chave_figura("composicao", ano_inicio, ano_fim, tuple(sorted(paises))),
+           composicao_do_cubo(cubo, ano_inicio, ano_fim, paises), figuras.figura_composicao)
+    for tipo in tipos:
+        carne_pt = TRADUCAO_CARNES.get(tipo, tipo)
+        df_mapa = mapa_do_cubo(cubo, ano_inicio, ano_fim, tipo)
+        df_evolucao = fatiar(fatia, carnes=[carne_pt], paises=paises, ano_inicio=ano_inicio, ano_fim=ano_fim)
+        for coluna, rotulo in figuras.ROTULOS_METRICAS.items():
+            gravar(figuras.chave_figura("mapa", tipo, coluna, ano_inicio, ano_fim), df_mapa,
+                   lambda df: figuras.figura_mapa(df, coluna, carne_pt))
+            gravar(figuras.chave_figura("top20", tipo, coluna, ano_inicio, ano_fim), top_paises(df_mapa, coluna),
+                   lambda df: figuras.figura_top20(df, coluna, rotulo, ano_inicio, ano_fim))
+            gravar(figuras.chave_figura("evolucao", tipo, coluna, ano_inicio, ano_fim, tuple(sorted(paises))),
+                   df_evolucao, lambda df: figuras.figura_evolucao(df, coluna, carne_pt, ano_inicio, ano_fim))
+    print(f"{len(chaves)} figuras gravadas no cache para a versão {versao}.")
+    return chaves
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-aquece o cache em disco do dashboard.")
+    parser.add_argument("--mongo-uri", required=True)
+    parser.add_argument("--db", default="consumo_carne")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri)
+    try:
+        aquecer(client[args.db])
+    finally:
+        client.close()
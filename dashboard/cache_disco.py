@@ -0,0 +1,101 @@
+import argparse
+import glob
+import hashlib
+import os
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Diretório compartilhado por todos os workers do Streamlit no mesmo host.
+CACHE_DIR = os.environ.get("CACHE_DASHBOARD_DIR", ".cache_dashboard")
+CACHE_TTL_SEGUNDOS = int(os.environ.get("CACHE_DASHBOARD_TTL", "3600"))
+
+METRICAS = {"hits": 0, "misses": 0, "expirados": 0, "gravacoes": 0}
+
+
+def chave_cache(nome, *parametros):
+    """Chave de arquivo estável para uma consulta e seus parâmetros."""
+    resumo = hashlib.sha256(repr(parametros).encode("utf-8")).hexdigest()[:16]
+    return f"{nome}-{resumo}"
+
+
+def _caminho(chave, versao):
+    return os.path.join(CACHE_DIR, f"{chave}--{versao}.feather")
+
+
+def ler(chave, versao, ttl=CACHE_TTL_SEGUNDOS):
+    """DataFrame em cache para a versão do dataset, ou None (ausente, expirado ou ilegível).
+
+    O arquivo Feather é gravado sem compressão, então a leitura é mapeada em
+    memória em vez de copiada. Um arquivo removido por outro worker entre a
+    checagem e a leitura, ou corrompido, conta como miss.
+    """
+    caminho = _caminho(chave, versao)
+    try:
+        idade = time.time() - os.path.getmtime(caminho)
+        if idade > ttl:
+            METRICAS["expirados"] += 1
+            METRICAS["misses"] += 1
+            return None
+        df = feather.read_table(caminho, memory_map=True).to_pandas()
+    except (OSError, pa.ArrowInvalid):
+        METRICAS["misses"] += 1
+        return None
+
+    METRICAS["hits"] += 1
+    return df
+
+
+def gravar(chave, versao, df):
+    """Grava o DataFrame e remove as versões antigas da mesma chave."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    caminho = _caminho(chave, versao)
+    caminho_temp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), caminho_temp, compression="uncompressed")
+    os.replace(caminho_temp, caminho)
+    METRICAS["gravacoes"] += 1
+
+    for antigo in glob.glob(os.path.join(CACHE_DIR, f"{chave}--*.feather")):
+        if antigo != caminho:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+
+
+def obter(chave, versao, carregar):
+    """Lê do cache ou chama `carregar()` e grava o resultado. Sem versão conhecida, não usa o cache."""
+    if versao is None:
+        return carregar()
+    df = ler(chave, versao)
+    if df is None:
+        df = carregar()
+        gravar(chave, versao, df)
+    return df
+
+
+def invalidar(prefixo=""):
+    """Remove as entradas do cache (todas, ou só as cujo nome começa com `prefixo`), inclusive as figuras."""
+    removidos = 0
+    caminhos = glob.glob(os.path.join(CACHE_DIR, f"{prefixo}*.feather")) + glob.glob(os.path.join(CACHE_DIR, f"{prefixo}*.json"))
+    for caminho in caminhos:
+        try:
+            os.remove(caminho)
+            removidos += 1
+        except OSError:
+            pass
+    return removidos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerencia o cache em disco do dashboard.")
+    parser.add_argument("--invalidar", nargs="?", const="", metavar="PREFIXO",
+                        help="Remove todas as entradas (ou só as que começam com PREFIXO).")
+    args = parser.parse_args()
+
+    if args.invalidar is not None:
+        print(f"{invalidar(args.invalidar)} entradas removidas de {CACHE_DIR}.")
+    else:
+        parser.print_help()
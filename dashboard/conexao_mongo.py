@@ -0,0 +1,53 @@
+import os
+import time
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+INTERVALO_VERIFICACAO_SEGUNDOS = float(os.environ.get("MONGO_INTERVALO_VERIFICACAO", "30"))
+
+_ultimas_verificacoes = {}
+
+
+def _inteiro_ou_nulo(nome, padrao):
+    valor = os.environ.get(nome, padrao)
+    return int(valor) if valor not in (None, "") else None
+
+
+def opcoes_cliente():
+    """Parâmetros do pool de conexões, ajustáveis por variáveis de ambiente."""
+    return {
+        "maxPoolSize": _inteiro_ou_nulo("MONGO_MAX_POOL_SIZE", "50"),
+        "minPoolSize": _inteiro_ou_nulo("MONGO_MIN_POOL_SIZE", "0"),
+        "maxIdleTimeMS": _inteiro_ou_nulo("MONGO_MAX_IDLE_TIME_MS", "300000"),
+        "serverSelectionTimeoutMS": _inteiro_ou_nulo("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"),
+        "connectTimeoutMS": _inteiro_ou_nulo("MONGO_CONNECT_TIMEOUT_MS", "10000"),
+        "socketTimeoutMS": _inteiro_ou_nulo("MONGO_SOCKET_TIMEOUT_MS", "30000"),
+        "readPreference": os.environ.get("MONGO_READ_PREFERENCE", "primaryPreferred"),
+        "retryReads": os.environ.get("MONGO_RETRY_READS", "true").lower() == "true",
+        "appName": "dashboard-consumo-carne",
+    }
+
+
+def criar_cliente(connection_string):
+    return MongoClient(connection_string, **opcoes_cliente())
+
+
+def cliente_saudavel(client, intervalo=INTERVALO_VERIFICACAO_SEGUNDOS):
+    """Faz um `ping` no máximo a cada `intervalo` segundos; False se o servidor não responder.
+
+    Com False, o st.cache_resource cria outro cliente: este é fechado aqui para
+    não deixar para trás o pool de conexões e as threads de monitoramento.
+    """
+    agora = time.monotonic()
+    ultima = _ultimas_verificacoes.get(id(client))
+    if ultima is not None and agora - ultima < intervalo:
+        return True
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        _ultimas_verificacoes.pop(id(client), None)
+        client.close()
+        return False
+    _ultimas_verificacoes[id(client)] = agora
+    return True
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from modelo_dados import COLUNAS_PARQUET, TRADUCAO_CARNES
+
+PATH_CUBO = "data_processed/cubo_consumo.parquet"
+MEDIDAS_CUBO = ["KG_CAP", "THND_TONNE"]
+
+
+def preparar_cubo(cubo):
+    """Indexa o cubo por ano, mantendo a ordem (LOCATION, SUBJECT) dentro de cada ano.
+
+    Como a grade é densa, todos os anos têm as mesmas chaves na mesma ordem e as
+    fatias de dois anos podem ser subtraídas posição a posição.
+    """
+    return cubo.sort_values(["TIME", "LOCATION", "SUBJECT"]).set_index("TIME")
+
+
+def _fatia_ano(cubo, ano):
+    return cubo.loc[[ano]]
+
+
+def media_periodo(cubo, ano_inicio, ano_fim, tipos=None):
+    """Média de cada (país, carne) no período [ano_inicio, ano_fim] a partir das somas prefixadas.
+
+    Lê só duas fatias do cubo (anos `ano_fim` e `ano_inicio - 1`), sem percorrer
+    os anos intermediários. Pares sem nenhum registro no período ficam de fora,
+    como aconteceria num groupby sobre os dados filtrados.
+    """
+    ano_min, ano_max = cubo.index.min(), cubo.index.max()
+    ano_inicio, ano_fim = max(ano_inicio, ano_min), min(ano_fim, ano_max)
+    if ano_inicio > ano_fim:
+        return pd.DataFrame(columns=["LOCATION", "Pais_Nome", "SUBJECT"] + MEDIDAS_CUBO)
+
+    fim = _fatia_ano(cubo, ano_fim)
+    colunas_acumuladas = ["N_REGISTROS"] + [f"SOMA_{medida}" for medida in MEDIDAS_CUBO]
+    acumulado = fim[colunas_acumuladas].to_numpy()
+    if ano_inicio > ano_min:
+        acumulado = acumulado - _fatia_ano(cubo, ano_inicio - 1)[colunas_acumuladas].to_numpy()
+
+    registros = acumulado[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        medias = acumulado[:, 1:] / registros[:, None]
+
+    resultado = fim[["LOCATION", "Pais_Nome", "SUBJECT"]].reset_index(drop=True)
+    for i, medida in enumerate(MEDIDAS_CUBO):
+        resultado[medida] = medias[:, i]
+
+    manter = registros > 0
+    if tipos is not None:
+        manter &= resultado["SUBJECT"].isin(list(tipos)).to_numpy()
+    return resultado[manter].reset_index(drop=True)
+
+
+def medias_do_cubo(cubo, ano_inicio, ano_fim, tipos=None):
+    """`media_periodo` com os nomes de colunas do dashboard e o tipo de carne traduzido."""
+    df = media_periodo(cubo, ano_inicio, ano_fim, tipos=tipos).rename(columns=COLUNAS_PARQUET)
+    df['Tipo_Carne'] = df['Tipo_Carne_EN'].map(TRADUCAO_CARNES).fillna(df['Tipo_Carne_EN'])
+    return df
+
+
+def mapa_do_cubo(cubo, ano_inicio, ano_fim, tipo):
+    """Dados do mapa e do Top 20: média do período por país para uma carne."""
+    return medias_do_cubo(cubo, ano_inicio, ano_fim, tipos=[tipo]) \
+        .sort_values(['País', 'Pais_Codigo'], ignore_index=True) \
+        [['País', 'Pais_Codigo', 'Consumo_KG_Capita', 'Consumo_Mil_Toneladas']]
+
+
+def composicao_do_cubo(cubo, ano_inicio, ano_fim, paises):
+    """Dados da composição da dieta: média do período por (país, carne) para os países escolhidos."""
+    df_medias_carnes = medias_do_cubo(cubo, ano_inicio, ano_fim)
+    return df_medias_carnes[df_medias_carnes['País'].isin(paises)] \
+        .sort_values(['País', 'Tipo_Carne'], ignore_index=True) \
+        [['País', 'Tipo_Carne', 'Consumo_KG_Capita', 'Consumo_Mil_Toneladas']]
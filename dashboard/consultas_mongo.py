@@ -0,0 +1,199 @@
+"""Pipelines de agregação do MongoDB para o dashboard.
+
+Em vez de trazer a coleção inteira e achatar os documentos no cliente, o
+servidor filtra países, anos e carnes, desaninha só o que sobrou e devolve as
+linhas já com os nomes de colunas do dashboard.
+
+Os pipelines funcionam nos dois layouts do load_mongo.py: "aninhado" (um
+documento por país em 'dados_processados') e "buckets" (um documento por
+(país, carne, década) em 'consumo_buckets').
+"""
+
+CAMPO_REGISTRO = "$registros_consumo"
+CAMPO_CARNE = "$registros_consumo.carnes"
+
+COLECOES_LAYOUT = {"aninhado": "dados_processados", "buckets": "consumo_buckets"}
+
+
+def colecao_consumo(db):
+    """Coleção da última carga, segundo o layout que o load_mongo.py grava em 'metadados'."""
+    metadados = db["metadados"].find_one({"_id": "versao_dataset"}) or {}
+    return db[COLECOES_LAYOUT.get(metadados.get("layout"), COLECOES_LAYOUT["aninhado"])]
+
+
+def layout_da_colecao(collection):
+    return "buckets" if collection.name == COLECOES_LAYOUT["buckets"] else "aninhado"
+
+
+def _medida(campo):
+    # O loader grava null nas medidas ausentes; o dashboard as trata como 0.
+    return {"$ifNull": [f"{CAMPO_CARNE}.{campo}", 0]}
+
+
+def _estagios_registros(ano_inicio, ano_fim, tipos=None, locations=None):
+    """Estágios comuns: seleciona documentos e desaninha (ano, carne) já filtrados."""
+    filtro_documentos = {"registros_consumo.ano": {"$gte": ano_inicio, "$lte": ano_fim}}
+    if locations is not None:
+        filtro_documentos["_id"] = {"$in": list(locations)}
+    if tipos is not None:
+        filtro_documentos["registros_consumo.carnes.tipo"] = {"$in": list(tipos)}
+
+    estagios = [
+        {"$match": filtro_documentos},
+        # Descarta os anos fora do período antes do $unwind, para não multiplicar documentos à toa.
+        {"$project": {
+            "pais": 1,
+            "registros_consumo": {"$filter": {
+                "input": CAMPO_REGISTRO,
+                "as": "registro",
+                "cond": {"$and": [
+                    {"$gte": ["$$registro.ano", ano_inicio]},
+                    {"$lte": ["$$registro.ano", ano_fim]}
+                ]}
+            }}
+        }},
+        {"$unwind": CAMPO_REGISTRO},
+        {"$unwind": CAMPO_CARNE},
+    ]
+    if tipos is not None:
+        estagios.append({"$match": {"registros_consumo.carnes.tipo": {"$in": list(tipos)}}})
+    return estagios
+
+
+def _estagios_buckets(ano_inicio, ano_fim, tipos=None, locations=None):
+    """Mesmo resultado de `_estagios_registros` no layout de buckets: um documento por (país, carne, ano)."""
+    filtro_documentos = {}
+    if tipos is not None:
+        filtro_documentos["tipo"] = {"$in": list(tipos)}
+    # $elemMatch dá limites fechados no índice multikey (tipo, registros.ano, _id).
+    filtro_documentos["registros"] = {"$elemMatch": {"ano": {"$gte": ano_inicio, "$lte": ano_fim}}}
+    if locations is not None:
+        filtro_documentos["pais_codigo"] = {"$in": list(locations)}
+
+    return [
+        {"$match": filtro_documentos},
+        {"$project": {
+            "pais_codigo": 1,
+            "pais": 1,
+            "tipo": 1,
+            "registros": {"$filter": {
+                "input": "$registros",
+                "as": "registro",
+                "cond": {"$and": [
+                    {"$gte": ["$$registro.ano", ano_inicio]},
+                    {"$lte": ["$$registro.ano", ano_fim]}
+                ]}
+            }}
+        }},
+        {"$unwind": "$registros"},
+    ]
+
+
+def _medida_bucket(campo):
+    return {"$ifNull": [f"$registros.{campo}", 0]}
+
+
+def pipeline_registros(ano_inicio, ano_fim, tipos=None, locations=None, layout="aninhado"):
+    """Linhas (país, ano, carne) do período, no formato plano usado pelo dashboard."""
+    if layout == "buckets":
+        return _estagios_buckets(ano_inicio, ano_fim, tipos=tipos, locations=locations) + [
+            {"$project": {
+                "_id": 0,
+                "Pais_Codigo": "$pais_codigo",
+                "País": "$pais",
+                "Ano": "$registros.ano",
+                "Tipo_Carne_EN": "$tipo",
+                "Consumo_KG_Capita": _medida_bucket("consumo_per_capita_kg"),
+                "Consumo_Mil_Toneladas": _medida_bucket("consumo_total_thnd_tonne"),
+            }}
+        ]
+    return _estagios_registros(ano_inicio, ano_fim, tipos=tipos, locations=locations) + [
+        {"$project": {
+            "_id": 0,
+            "Pais_Codigo": "$_id",
+            "País": "$pais",
+            "Ano": "$registros_consumo.ano",
+            "Tipo_Carne_EN": f"{CAMPO_CARNE}.tipo",
+            "Consumo_KG_Capita": _medida("consumo_per_capita_kg"),
+            "Consumo_Mil_Toneladas": _medida("consumo_total_thnd_tonne"),
+        }}
+    ]
+
+
+def pipeline_medias_periodo(ano_inicio, ano_fim, tipos, layout="aninhado"):
+    """Média do período por país para as carnes pedidas (dados do mapa e do Top 20)."""
+    if layout == "buckets":
+        estagios = _estagios_buckets(ano_inicio, ano_fim, tipos=tipos)
+        grupo = {
+            "_id": "$pais_codigo",
+            "País": {"$first": "$pais"},
+            "Consumo_KG_Capita": {"$avg": _medida_bucket("consumo_per_capita_kg")},
+            "Consumo_Mil_Toneladas": {"$avg": _medida_bucket("consumo_total_thnd_tonne")},
+        }
+    else:
+        estagios = _estagios_registros(ano_inicio, ano_fim, tipos=tipos)
+        grupo = {
+            "_id": "$_id",
+            "País": {"$first": "$pais"},
+            "Consumo_KG_Capita": {"$avg": _medida("consumo_per_capita_kg")},
+            "Consumo_Mil_Toneladas": {"$avg": _medida("consumo_total_thnd_tonne")},
+        }
+    return estagios + [
+        {"$group": grupo},
+        {"$project": {
+            "_id": 0,
+            "País": 1,
+            "Pais_Codigo": "$_id",
+            "Consumo_KG_Capita": 1,
+            "Consumo_Mil_Toneladas": 1,
+        }}
+    ]
+
+
+def pipeline_dimensoes(layout="aninhado"):
+    """Intervalo de anos e tipos de carne disponíveis, sem trazer as medidas."""
+    if layout == "buckets":
+        return [
+            {"$project": {"registros.ano": 1, "tipo": 1}},
+            {"$unwind": "$registros"},
+            {"$group": {
+                "_id": None,
+                "ano_min": {"$min": "$registros.ano"},
+                "ano_max": {"$max": "$registros.ano"},
+                "tipos": {"$addToSet": "$tipo"},
+            }}
+        ]
+    return [
+        {"$project": {"registros_consumo.ano": 1, "registros_consumo.carnes.tipo": 1}},
+        {"$unwind": CAMPO_REGISTRO},
+        {"$unwind": CAMPO_CARNE},
+        {"$group": {
+            "_id": None,
+            "ano_min": {"$min": "$registros_consumo.ano"},
+            "ano_max": {"$max": "$registros_consumo.ano"},
+            "tipos": {"$addToSet": f"{CAMPO_CARNE}.tipo"},
+        }}
+    ]
+
+
+def ler_dimensoes(collection):
+    """Mesmo formato de `fonte_parquet.ler_dimensoes`: anos, tipos e {nome do país: código}."""
+    layout = layout_da_colecao(collection)
+    resultado = list(collection.aggregate(pipeline_dimensoes(layout)))
+    if not resultado:
+        return None
+    # A dimensão sincronizada pelo load_mongo.py é pequena; sem ela, os nomes vêm dos próprios documentos.
+    dimensao = collection.database["dim_paises"]
+    if dimensao.estimated_document_count():
+        paises = {documento["pais"]: documento["_id"] for documento in dimensao.find({}, {"pais": 1})}
+    elif layout == "buckets":
+        paises = {documento["pais"]: documento["pais_codigo"]
+                  for documento in collection.find({}, {"pais": 1, "pais_codigo": 1})}
+    else:
+        paises = {documento["pais"]: documento["_id"] for documento in collection.find({}, {"pais": 1})}
+    return {
+        "ano_min": resultado[0]["ano_min"],
+        "ano_max": resultado[0]["ano_max"],
+        "tipos": sorted(resultado[0]["tipos"]),
+        "paises": paises,
+    }
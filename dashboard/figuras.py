@@ -0,0 +1,205 @@
+"""Figuras Plotly do dashboard e o cache delas, serializadas em JSON.
+
+A montagem com plotly.express (principalmente o choropleth) custa mais que os
+dados de cada aba. Cada figura é guardada pelo nome e pela tupla de filtros de
+que ela depende, junto com a versão do dataset. O cache tem dois níveis, ambos
+com descarte LRU: um dicionário no processo (compartilhado pelas sessões do
+worker) e arquivos JSON no diretório do cache em disco, que o
+aquecimento_cache.py preenche depois de cada carga.
+"""
+import glob
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import plotly
+import plotly.express as px
+# Importar o streamlit registra o template "streamlit" como padrão do Plotly: o
+# aquecimento (fora do app) monta as figuras com o mesmo template do dashboard.
+import streamlit  # noqa: F401
+
+import cache_disco
+from motor_consultas import participacao_carnes
+
+ANO_PROJECAO_INICIA = 2018
+ROTULOS_METRICAS = {"Consumo_KG_Capita": "KG por Capita", "Consumo_Mil_Toneladas": "Milhares de Toneladas"}
+
+# Incrementar ao mudar a montagem de alguma figura, para não servir a versão antiga do cache.
+VERSAO_FIGURAS = 1
+LIMITE_MEMORIA = int(os.environ.get("CACHE_FIGURAS_MEMORIA", "128"))
+LIMITE_DISCO = int(os.environ.get("CACHE_FIGURAS_DISCO", "512"))
+
+METRICAS = {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "descartes": 0}
+_memoria = OrderedDict()
+# As sessões do Streamlit rodam em threads do mesmo processo e compartilham o `_memoria`.
+_trava_memoria = threading.Lock()
+
+
+# --- Montagem ----------------------------------------------------------------------
+
+def figura_mapa(df_mapa, coluna_metrica, carne_pt):
+    hover_data_config = {"Pais_Codigo": False}
+    if coluna_metrica == "Consumo_KG_Capita":
+        hover_data_config["Consumo_Mil_Toneladas"] = ':.0f'
+        hover_data_config["Consumo_KG_Capita"] = ':.2f'
+    else:
+        hover_data_config["Consumo_KG_Capita"] = ':.2f'
+        hover_data_config["Consumo_Mil_Toneladas"] = ':.0f'
+
+    fig = px.choropleth(
+        df_mapa,
+        locations="Pais_Codigo",
+        locationmode="ISO-3",
+        color=coluna_metrica,
+        hover_name="País",
+        hover_data=hover_data_config,
+        color_continuous_scale=px.colors.sequential.YlOrRd,
+        title=f"Média de Consumo de {carne_pt}"
+    )
+    fig.update_layout(
+        geo=dict(showframe=False, showcoastlines=False, projection_type='equirectangular'),
+        margin={"r": 0, "t": 40, "l": 0, "b": 0}
+    )
+    return fig
+
+
+def figura_evolucao(df_evolucao, coluna_metrica, carne_pt, ano_inicio, ano_fim):
+    fig = px.line(
+        df_evolucao.sort_values(by="Ano"),
+        x="Ano",
+        y=coluna_metrica,
+        color="País",
+        title=f"Evolução do Consumo de {carne_pt}"
+    )
+    if ano_fim >= ANO_PROJECAO_INICIA:
+        fig.add_vrect(
+            x0=max(ano_inicio, ANO_PROJECAO_INICIA - 0.5),
+            x1=ano_fim + 0.5,
+            fillcolor="gray",
+            opacity=0.1,
+            line_width=0,
+            annotation_text="Projeção",
+            annotation_position="top left"
+        )
+    return fig
+
+
+def figura_composicao(df_comp_carnes):
+    fig = px.bar(
+        participacao_carnes(df_comp_carnes),
+        x="País",
+        y="Participação",
+        color="Tipo_Carne",
+        title=f"Participação de Cada Tipo de Carne no Consumo (Média KG p/ Capita)"
+    )
+    fig.update_layout(yaxis_tickformat='.0%')
+    return fig
+
+
+def figura_top20(df_top20, coluna_metrica, metrica_label, ano_inicio, ano_fim):
+    return px.bar(
+        df_top20,
+        x="País",
+        y=coluna_metrica,
+        title=f"Top 20 Países (Média de {metrica_label}, {ano_inicio}-{ano_fim})"
+    )
+
+
+# --- Cache -------------------------------------------------------------------------
+
+def chave_figura(nome, *filtros):
+    return cache_disco.chave_cache(f"figura_{nome}", VERSAO_FIGURAS, plotly.__version__, *filtros)
+
+
+def _caminho(chave, versao):
+    return os.path.join(cache_disco.CACHE_DIR, f"{chave}--{versao}.json")
+
+
+def _guardar_memoria(chave, versao, conteudo):
+    with _trava_memoria:
+        _memoria[(chave, versao)] = conteudo
+        _memoria.move_to_end((chave, versao))
+        while len(_memoria) > LIMITE_MEMORIA:
+            _memoria.popitem(last=False)
+            METRICAS["descartes"] += 1
+
+
+def _ler_memoria(chave, versao):
+    with _trava_memoria:
+        conteudo = _memoria.get((chave, versao))
+        if conteudo is not None:
+            _memoria.move_to_end((chave, versao))
+            METRICAS["hits_memoria"] += 1
+    return conteudo
+
+
+def _ler_disco(chave, versao):
+    caminho = _caminho(chave, versao)
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            conteudo = arquivo.read()
+        # O mtime marca o último uso: é por ele que o LRU em disco descarta.
+        os.utime(caminho)
+    except OSError:
+        return None
+    return conteudo
+
+
+def _descartar_disco(limite=LIMITE_DISCO):
+    arquivos = glob.glob(os.path.join(cache_disco.CACHE_DIR, "figura_*.json"))
+    if len(arquivos) <= limite:
+        return
+    usos = []
+    for caminho in arquivos:
+        try:
+            usos.append((os.path.getmtime(caminho), caminho))
+        except OSError:
+            pass
+    for _, caminho in sorted(usos)[:len(usos) - limite]:
+        try:
+            os.remove(caminho)
+            METRICAS["descartes"] += 1
+        except OSError:
+            pass
+
+
+def gravar(chave, versao, fig):
+    """Grava a figura (JSON) nos dois níveis e remove as versões antigas da mesma chave. Retorna o JSON."""
+    conteudo = fig.to_json()
+    _guardar_memoria(chave, versao, conteudo)
+
+    os.makedirs(cache_disco.CACHE_DIR, exist_ok=True)
+    caminho = _caminho(chave, versao)
+    caminho_temp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(caminho_temp, "w", encoding="utf-8") as arquivo:
+        arquivo.write(conteudo)
+    os.replace(caminho_temp, caminho)
+    for antigo in glob.glob(os.path.join(cache_disco.CACHE_DIR, f"{chave}--*.json")):
+        if antigo != caminho:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+    _descartar_disco()
+    return conteudo
+
+
+def obter(chave, versao, construir):
+    """Figura para o st.plotly_chart: do cache (dict) ou `construir()`, gravada no cache.
+
+    Sem versão do dataset (ex.: FONTE_DADOS=parquet) não usa o cache.
+    """
+    if versao is None:
+        return construir()
+
+    conteudo = _ler_memoria(chave, versao)
+    if conteudo is None:
+        conteudo = _ler_disco(chave, versao)
+        if conteudo is not None:
+            METRICAS["hits_disco"] += 1
+            _guardar_memoria(chave, versao, conteudo)
+        else:
+            METRICAS["misses"] += 1
+            conteudo = gravar(chave, versao, construir())
+    return json.loads(conteudo)
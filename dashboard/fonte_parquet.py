@@ -0,0 +1,104 @@
+import os
+
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PATH_PARQUET = "data_processed/consumo_processado.parquet"
+# Dimensão de países gravada pelo ETL (scripts_etl/dimensao_paises.py).
+PATH_DIMENSAO = "data_processed/dim_paises.parquet"
+
+
+def _arquivos_carnes(path_parquet, tipos=None):
+    """Arquivos Parquet por tipo de carne (`<SUBJECT>/dados.parquet`), só dos tipos pedidos.
+
+    É aqui que acontece a poda por arquivo: outros tipos de carne nem chegam a
+    ser abertos. Arquivos soltos na raiz (layout antigo, um único part-file do
+    Spark) ficam na chave None, sem poda.
+    """
+    arquivos = {}
+    for nome in sorted(os.listdir(path_parquet)):
+        caminho = os.path.join(path_parquet, nome)
+        if nome.startswith(("_", ".")):
+            continue
+        if os.path.isfile(caminho) and nome.endswith(".parquet"):
+            arquivos.setdefault(None, []).append(caminho)
+            continue
+        if not os.path.isdir(caminho) or (tipos is not None and nome not in tipos):
+            continue
+        arquivos_carne = [os.path.join(caminho, nome_arquivo) for nome_arquivo in sorted(os.listdir(caminho))
+                          if nome_arquivo.endswith(".parquet") and not nome_arquivo.startswith(("_", "."))]
+        if arquivos_carne:
+            arquivos[nome] = arquivos_carne
+    return arquivos
+
+
+def _filtro_consumo(tipos=None, locations=None, ano_inicio=None, ano_fim=None):
+    filtros = []
+    if tipos is not None:
+        filtros.append(ds.field("SUBJECT").isin(list(tipos)))
+    if locations is not None:
+        filtros.append(ds.field("LOCATION").isin(list(locations)))
+    if ano_inicio is not None:
+        filtros.append(ds.field("TIME") >= ano_inicio)
+    if ano_fim is not None:
+        filtros.append(ds.field("TIME") <= ano_fim)
+    if not filtros:
+        return None
+    filtro = filtros[0]
+    for outro in filtros[1:]:
+        filtro = filtro & outro
+    return filtro
+
+
+def ler_consumo(path_parquet=PATH_PARQUET, tipos=None, locations=None, ano_inicio=None, ano_fim=None, colunas=None):
+    """Lê do Parquet processado apenas a fatia pedida.
+
+    Tipos de carne podam arquivos inteiros; países e período são empurrados para
+    o scanner, que descarta row groups pelas estatísticas min/max de LOCATION e
+    TIME (cada arquivo é ordenado por LOCATION, TIME).
+    """
+    arquivos = [arquivo for lista in _arquivos_carnes(path_parquet, tipos=tipos).values() for arquivo in lista]
+    if not arquivos:
+        return ds.dataset(path_parquet, format="parquet").schema.empty_table().to_pandas()
+
+    dataset = ds.dataset(arquivos, format="parquet")
+    filtro = _filtro_consumo(tipos=tipos, locations=locations, ano_inicio=ano_inicio, ano_fim=ano_fim)
+    return dataset.to_table(columns=colunas, filter=filtro).to_pandas()
+
+
+def ler_dimensoes(path_parquet=PATH_PARQUET, path_dimensao=PATH_DIMENSAO):
+    """Valores disponíveis para os filtros do dashboard, sem ler as medidas.
+
+    Os tipos de carne vêm dos nomes dos diretórios, o intervalo de anos só dos
+    rodapés (estatísticas dos row groups) e os nomes dos países, da dimensão
+    gravada pelo ETL (se ela existir).
+    """
+    arquivos_por_carne = _arquivos_carnes(path_parquet)
+    arquivos = [arquivo for lista in arquivos_por_carne.values() for arquivo in lista]
+    tipos = {tipo for tipo in arquivos_por_carne if tipo is not None}
+    if None in arquivos_por_carne:
+        tipos.update(ds.dataset(arquivos_por_carne[None], format="parquet")
+                     .to_table(columns=["SUBJECT"])["SUBJECT"].to_pylist())
+    ano_min, ano_max = None, None
+    for arquivo in arquivos:
+        metadados = pq.read_metadata(arquivo)
+        indice_time = metadados.schema.names.index("TIME")
+        for i in range(metadados.num_row_groups):
+            estatisticas = metadados.row_group(i).column(indice_time).statistics
+            if estatisticas is None or not estatisticas.has_min_max:
+                continue
+            ano_min = estatisticas.min if ano_min is None else min(ano_min, estatisticas.min)
+            ano_max = estatisticas.max if ano_max is None else max(ano_max, estatisticas.max)
+
+    if os.path.exists(path_dimensao):
+        df_paises = pq.read_table(path_dimensao, columns=["LOCATION", "Pais_Nome"]).to_pandas()
+    else:
+        df_paises = ds.dataset(arquivos, format="parquet").to_table(columns=["LOCATION", "Pais_Nome"]).to_pandas()
+    paises = df_paises.drop_duplicates(subset=["LOCATION"]).set_index("Pais_Nome")["LOCATION"].to_dict()
+
+    return {
+        "ano_min": ano_min,
+        "ano_max": ano_max,
+        "tipos": sorted(tipos),
+        "paises": paises,
+    }
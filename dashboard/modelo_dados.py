@@ -0,0 +1,100 @@
+import pandas as pd
+
+TRADUCAO_CARNES = {
+    "POULTRY": "Aves",
+    "BEEF": "Bovina",
+    "PIG": "Suína",
+    "SHEEP": "Ovinos"
+}
+
+COLUNAS_DOCUMENTOS = {
+    "ano": "Ano",
+    "_id": "Pais_Codigo",
+    "tipo": "Tipo_Carne_EN",
+    "consumo_per_capita_kg": "Consumo_KG_Capita",
+    "consumo_total_thnd_tonne": "Consumo_Mil_Toneladas",
+    "pais": "País"
+}
+
+COLUNAS_PARQUET = {
+    "TIME": "Ano",
+    "LOCATION": "Pais_Codigo",
+    "SUBJECT": "Tipo_Carne_EN",
+    "KG_CAP": "Consumo_KG_Capita",
+    "THND_TONNE": "Consumo_Mil_Toneladas",
+    "Pais_Nome": "País"
+}
+
+DIMENSOES = ["País", "Pais_Codigo", "Tipo_Carne", "Tipo_Carne_EN"]
+MEDIDAS = ["Consumo_KG_Capita", "Consumo_Mil_Toneladas"]
+NIVEIS_INDICE = ["idx_carne", "idx_pais", "idx_ano"]
+
+
+def achatar_documentos(documentos):
+    """Documentos aninhados da coleção 'dados_processados' -> uma linha por (país, ano, carne)."""
+    df_anos = pd.json_normalize(
+        documentos,
+        record_path=['registros_consumo'],
+        meta=['_id', 'pais']
+    )
+
+    df_final_flat = pd.json_normalize(
+        df_anos.to_dict('records'),
+        record_path=['carnes'],
+        meta=['_id', 'pais', 'ano']
+    )
+    return df_final_flat.rename(columns=COLUNAS_DOCUMENTOS)
+
+
+def padronizar_dataframe(df):
+    df['Consumo_KG_Capita'] = df['Consumo_KG_Capita'].fillna(0)
+    df['Consumo_Mil_Toneladas'] = df['Consumo_Mil_Toneladas'].fillna(0)
+
+    if 'País' not in df.columns:
+        df['País'] = df['Pais_Codigo']
+
+    df['Tipo_Carne'] = df['Tipo_Carne_EN'].map(TRADUCAO_CARNES).fillna(df['Tipo_Carne_EN'])
+
+    return df
+
+
+def compactar(df):
+    """Representação compacta do DataFrame do dashboard.
+
+    Dimensões viram categóricas, o ano vira int16 e as medidas float32. As linhas
+    ficam ordenadas num MultiIndex (carne, país, ano), de modo que os filtros do
+    dashboard são buscas binárias por fatia (`fatiar`) em vez de máscaras
+    booleanas sobre o DataFrame inteiro. Os níveis do índice têm nomes próprios
+    para não conflitar com as colunas usadas nos groupby.
+    """
+    df = df.copy()
+    for coluna in DIMENSOES:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype("category")
+    df["Ano"] = df["Ano"].astype("int16")
+    for coluna in MEDIDAS:
+        df[coluna] = df[coluna].astype("float32")
+
+    df.index = pd.MultiIndex.from_arrays([df["Tipo_Carne"], df["País"], df["Ano"]], names=NIVEIS_INDICE)
+    return df.sort_index()
+
+
+def _rotulos_existentes(rotulos, nivel):
+    existentes = set(nivel)
+    return [rotulo for rotulo in rotulos if rotulo in existentes]
+
+
+def fatiar(df, carnes=None, paises=None, ano_inicio=None, ano_fim=None):
+    """Seleciona (carnes x países x [ano_inicio, ano_fim]) pelo índice ordenado de `compactar`."""
+    todos = slice(None)
+    chave = []
+    for rotulos, nivel in ((carnes, df.index.levels[0]), (paises, df.index.levels[1])):
+        if rotulos is None:
+            chave.append(todos)
+            continue
+        rotulos = _rotulos_existentes(rotulos, nivel)
+        if not rotulos:
+            return df.iloc[0:0]
+        chave.append(rotulos)
+    chave.append(slice(ano_inicio, ano_fim))
+    return df.loc[tuple(chave), :]
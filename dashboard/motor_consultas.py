@@ -0,0 +1,365 @@
+"""Motor de consultas do dashboard, sem Streamlit.
+
+As análises do app.py (médias do período para o mapa, Top 20, composição da
+dieta, migração aves x bovina, tendências de crescimento e destaques globais)
+ficam aqui em dois níveis:
+
+* funções puras sobre o DataFrame compacto do dashboard (`compactar`), usadas
+  pelo próprio app.py com os dados que ele já tem em cache;
+* funções sobre uma fonte (Parquet do ETL ou MongoDB) com parâmetros simples
+  (códigos de carne e de país, anos), usadas por jobs de relatório e pelo
+  api_consultas.py. `consultar(fonte, nome, **parametros)` devolve o
+  resultado já serializável em JSON.
+
+Exemplo:
+
+    import motor_consultas
+    fonte = motor_consultas.abrir_parquet()
+    motor_consultas.top20(fonte, carne="BEEF", metrica="Consumo_Mil_Toneladas")
+"""
+import inspect
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import aquecimento_cache
+import cache_disco
+import consultas_mongo
+import fonte_parquet
+from consultas_cubo import PATH_CUBO, composicao_do_cubo, mapa_do_cubo, preparar_cubo
+from modelo_dados import COLUNAS_PARQUET, MEDIDAS, TRADUCAO_CARNES, compactar, fatiar, padronizar_dataframe
+from tendencias import calcular_tendencias, ranking_crescimento
+
+CARNE_PADRAO = "POULTRY"
+METRICA_PADRAO = "Consumo_KG_Capita"
+# A versão da fonte é relida no máximo a cada tantos segundos (uma consulta ao MongoDB ou alguns stat).
+INTERVALO_VERSAO_SEGUNDOS = 5
+
+
+# --- Análises sobre o DataFrame do dashboard ------------------------------------
+
+def medias_por_pais(df, carne, ano_inicio, ano_fim):
+    """Média do período por país para uma carne (nome em português): dados do mapa e do Top 20."""
+    return fatiar(df, carnes=[carne], ano_inicio=ano_inicio, ano_fim=ano_fim) \
+        .groupby(['País', 'Pais_Codigo'], as_index=False, observed=True) \
+        .agg({
+            'Consumo_KG_Capita': 'mean',
+            'Consumo_Mil_Toneladas': 'mean'
+        })
+
+
+def medias_por_carne(df, paises, ano_inicio, ano_fim):
+    """Média do período por (país, carne) para os países escolhidos: dados da composição da dieta."""
+    return fatiar(df, paises=paises, ano_inicio=ano_inicio, ano_fim=ano_fim) \
+        .groupby(['País', 'Tipo_Carne'], as_index=False, observed=True) \
+        .agg({
+            'Consumo_KG_Capita': 'mean',
+            'Consumo_Mil_Toneladas': 'mean'
+        })
+
+
+def top_paises(df_mapa, coluna_metrica, n=20):
+    return df_mapa.sort_values(by=coluna_metrica, ascending=False).head(n)
+
+
+def participacao_carnes(df_comp_carnes):
+    """Participação de cada carne no total de KG per capita de cada país (países sem consumo ficam de fora)."""
+    df_totals = df_comp_carnes.groupby("País", observed=True)["Consumo_KG_Capita"].sum().reset_index(name="Total_KG_Pais")
+    df_comp_percent = df_comp_carnes.merge(df_totals, on="País")
+    df_comp_percent = df_comp_percent[df_comp_percent["Total_KG_Pais"] > 0]
+    df_comp_percent["Participação"] = df_comp_percent["Consumo_KG_Capita"] / df_comp_percent["Total_KG_Pais"]
+    return df_comp_percent
+
+
+def destaques_globais(df_mapa):
+    """Linhas do país com a maior média per capita e do com o maior volume total (None sem dados)."""
+    if df_mapa.empty:
+        return None
+    df_mapa_sem_duplicados = df_mapa.drop_duplicates(subset=['Pais_Codigo'])
+    return {
+        "per_capita": df_mapa_sem_duplicados.loc[df_mapa_sem_duplicados['Consumo_KG_Capita'].idxmax()],
+        "total": df_mapa_sem_duplicados.loc[df_mapa_sem_duplicados['Consumo_Mil_Toneladas'].idxmax()],
+    }
+
+
+def tendencias_crescimento(df, carne, coluna_metrica, paises=None, ano_inicio=None, ano_fim=None):
+    """Tendência de cada país para a carne (nome em português), do maior para o menor crescimento."""
+    df_carne = fatiar(df, carnes=[carne], paises=paises, ano_inicio=ano_inicio, ano_fim=ano_fim)
+    return ranking_crescimento(calcular_tendencias(df_carne, coluna_metrica), carne)
+
+
+def migracao_aves_bovina(df, coluna_metrica, paises=None, ano_inicio=None, ano_fim=None):
+    """Participação de aves em aves + bovina no primeiro e no último ano do período, por país.
+
+    Só entram os anos com as duas carnes e total positivo. `Variacao_pp` é a
+    diferença em pontos percentuais; os países que mais trocaram bovina por
+    aves vêm primeiro.
+    """
+    colunas_saida = ["País", "Ano_Inicio", "Participacao_Aves_Inicio", "Ano_Fim", "Participacao_Aves_Fim", "Variacao_pp"]
+    base = fatiar(df, carnes=[TRADUCAO_CARNES["POULTRY"], TRADUCAO_CARNES["BEEF"]], paises=paises,
+                  ano_inicio=ano_inicio, ano_fim=ano_fim)
+    if base.empty:
+        return pd.DataFrame(columns=colunas_saida)
+
+    valores = pd.DataFrame({
+        "País": base["País"].astype(str).to_numpy(),
+        "Ano": base["Ano"].to_numpy(dtype="int64"),
+        "carne": base["Tipo_Carne_EN"].astype(str).to_numpy(),
+        "valor": base[coluna_metrica].to_numpy(dtype="float64"),
+    }).pivot_table(index=["País", "Ano"], columns="carne", values="valor", aggfunc="sum") \
+        .reindex(columns=["POULTRY", "BEEF"])
+    total = valores["POULTRY"] + valores["BEEF"]
+    participacao = (valores["POULTRY"] / total * 100).where(total > 0).dropna().reset_index(name="participacao")
+    if participacao.empty:
+        return pd.DataFrame(columns=colunas_saida)
+
+    resultado = participacao.sort_values(["País", "Ano"]).groupby("País").agg(
+        Ano_Inicio=("Ano", "first"),
+        Participacao_Aves_Inicio=("participacao", "first"),
+        Ano_Fim=("Ano", "last"),
+        Participacao_Aves_Fim=("participacao", "last"),
+    ).reset_index()
+    resultado["Variacao_pp"] = resultado["Participacao_Aves_Fim"] - resultado["Participacao_Aves_Inicio"]
+    return resultado.sort_values("Variacao_pp", ascending=False, ignore_index=True)[colunas_saida]
+
+
+# --- Fontes de dados -------------------------------------------------------------
+
+def abrir_parquet(path_parquet=fonte_parquet.PATH_PARQUET, path_cubo=PATH_CUBO,
+                  path_dimensao=fonte_parquet.PATH_DIMENSAO):
+    """Fonte sobre os arquivos do ETL local (Parquet processado, cubo e dimensão de países)."""
+    return {"tipo": "parquet", "path_parquet": path_parquet, "path_cubo": path_cubo, "path_dimensao": path_dimensao,
+            "memo": {}, "trava": threading.Lock()}
+
+
+def abrir_mongo(db):
+    """Fonte sobre o banco do MongoDB carregado pelo load_mongo.py (qualquer layout)."""
+    return {"tipo": "mongo", "db": db, "memo": {}, "trava": threading.Lock()}
+
+
+def _assinatura_arquivo(caminho):
+    try:
+        estatisticas = os.stat(caminho)
+    except OSError:
+        return None
+    return [estatisticas.st_size, estatisticas.st_mtime_ns]
+
+
+def versao(fonte):
+    """Versão dos dados da fonte, ou None se ainda não houver carga.
+
+    No MongoDB é a versão que o load_mongo.py grava em 'metadados'; no Parquet,
+    tamanho e mtime do manifesto, do cubo e da dimensão de países gravados pelo ETL.
+    """
+    lida = fonte.get("versao_lida")
+    if lida is not None and time.monotonic() - lida[0] < INTERVALO_VERSAO_SEGUNDOS:
+        return lida[1]
+
+    if fonte["tipo"] == "mongo":
+        metadados = fonte["db"]["metadados"].find_one({"_id": "versao_dataset"})
+        atual = metadados["versao"] if metadados else None
+    else:
+        arquivos = [os.path.join(fonte["path_parquet"], "_manifesto.json"), fonte["path_cubo"],
+                    fonte["path_dimensao"]]
+        assinaturas = [_assinatura_arquivo(caminho) for caminho in arquivos]
+        atual = cache_disco.chave_cache("parquet", assinaturas) if any(assinaturas) else None
+    fonte["versao_lida"] = (time.monotonic(), atual)
+    return atual
+
+
+def _memo(fonte, chave, carregar):
+    """Resultado de `carregar()` guardado na fonte enquanto a versão dos dados não mudar."""
+    versao_atual = versao(fonte)
+    memo = fonte["memo"]
+    with fonte["trava"]:
+        if memo.get("versao") != versao_atual:
+            memo.clear()
+            memo["versao"] = versao_atual
+        if chave in memo:
+            return memo[chave]
+    valor = carregar()
+    with fonte["trava"]:
+        if memo.get("versao") == versao_atual:
+            memo[chave] = valor
+    return valor
+
+
+def dimensoes(fonte):
+    """Anos, tipos de carne e {nome do país: código} disponíveis (mesmo formato de `fonte_parquet.ler_dimensoes`)."""
+    def carregar():
+        if fonte["tipo"] == "mongo":
+            return consultas_mongo.ler_dimensoes(consultas_mongo.colecao_consumo(fonte["db"]))
+        return fonte_parquet.ler_dimensoes(fonte["path_parquet"], fonte["path_dimensao"])
+    return _memo(fonte, "dimensoes", carregar)
+
+
+def cubo(fonte):
+    """Cubo pré-agregado já indexado (`preparar_cubo`), ou None se a fonte não tiver."""
+    def carregar():
+        if fonte["tipo"] == "mongo":
+            df = aquecimento_cache.consultar_cubo(fonte["db"])
+        elif os.path.exists(fonte["path_cubo"]):
+            df = pd.read_parquet(fonte["path_cubo"])
+        else:
+            return None
+        return None if df.empty else preparar_cubo(df)
+    return _memo(fonte, "cubo", carregar)
+
+
+def fatia(fonte, ano_inicio, ano_fim, tipos=None, locations=None):
+    """Linhas (país, ano, carne) do período, no formato compacto do dashboard."""
+    if fonte["tipo"] == "mongo":
+        collection = consultas_mongo.colecao_consumo(fonte["db"])
+        df = aquecimento_cache.consultar_fatia(collection, ano_inicio, ano_fim, tipos, locations)
+    else:
+        df = fonte_parquet.ler_consumo(fonte["path_parquet"], tipos=tipos, locations=locations,
+                                       ano_inicio=ano_inicio, ano_fim=ano_fim)
+        df = padronizar_dataframe(df.rename(columns=COLUNAS_PARQUET))
+    return compactar(df)
+
+
+# --- Consultas com parâmetros simples -------------------------------------------
+
+def _inteiro(nome, valor, minimo=None):
+    if isinstance(valor, bool) or not isinstance(valor, (int, np.integer)):
+        raise ValueError(f"Parâmetro '{nome}' deve ser inteiro: {valor!r}.")
+    if minimo is not None and valor < minimo:
+        raise ValueError(f"Parâmetro '{nome}' deve ser pelo menos {minimo}: {valor}.")
+    return int(valor)
+
+
+def _periodo(fonte, ano_inicio, ano_fim):
+    ano_inicio = None if ano_inicio is None else _inteiro("ano_inicio", ano_inicio)
+    ano_fim = None if ano_fim is None else _inteiro("ano_fim", ano_fim)
+    if ano_inicio is None or ano_fim is None:
+        inicio_padrao, fim_padrao = aquecimento_cache.periodo_padrao(int(dimensoes(fonte)["ano_max"]))
+        ano_inicio = inicio_padrao if ano_inicio is None else ano_inicio
+        ano_fim = fim_padrao if ano_fim is None else ano_fim
+    if ano_inicio > ano_fim:
+        raise ValueError(f"Período inválido: {ano_inicio} > {ano_fim}.")
+    return int(ano_inicio), int(ano_fim)
+
+
+def _carne(carne):
+    if not isinstance(carne, str) or carne not in TRADUCAO_CARNES:
+        raise ValueError(f"Carne desconhecida: '{carne}'. Opções: {', '.join(TRADUCAO_CARNES)}")
+    return TRADUCAO_CARNES[carne]
+
+
+def _metrica(metrica):
+    if not isinstance(metrica, str) or metrica not in MEDIDAS:
+        raise ValueError(f"Métrica desconhecida: '{metrica}'. Opções: {', '.join(MEDIDAS)}")
+    return metrica
+
+
+def _paises(fonte, paises):
+    """Códigos de país -> (códigos, nomes) ordenados; None (todos os países) passa direto."""
+    if paises is None:
+        return None, None
+    if not isinstance(paises, (list, tuple)) or not all(isinstance(codigo, str) for codigo in paises):
+        raise ValueError(f"Parâmetro 'paises' deve ser uma lista de códigos de país: {paises!r}.")
+    nomes_por_codigo = {codigo: nome for nome, codigo in dimensoes(fonte)["paises"].items()}
+    desconhecidos = [codigo for codigo in paises if codigo not in nomes_por_codigo]
+    if desconhecidos:
+        raise ValueError(f"Países desconhecidos: {', '.join(desconhecidos)}")
+    codigos = tuple(sorted(set(paises)))
+    return codigos, [nomes_por_codigo[codigo] for codigo in codigos]
+
+
+def mapa(fonte, carne=CARNE_PADRAO, ano_inicio=None, ano_fim=None):
+    """Média do período por país para a carne (código em inglês, ex.: "BEEF")."""
+    carne_pt = _carne(carne)
+    ano_inicio, ano_fim = _periodo(fonte, ano_inicio, ano_fim)
+    cubo_fonte = cubo(fonte)
+    if cubo_fonte is not None:
+        return mapa_do_cubo(cubo_fonte, ano_inicio, ano_fim, carne)
+    return medias_por_pais(fatia(fonte, ano_inicio, ano_fim, tipos=(carne,)), carne_pt, ano_inicio, ano_fim)
+
+
+def top20(fonte, carne=CARNE_PADRAO, metrica=METRICA_PADRAO, ano_inicio=None, ano_fim=None, n=20):
+    return top_paises(mapa(fonte, carne, ano_inicio, ano_fim), _metrica(metrica), _inteiro("n", n, minimo=1))
+
+
+def destaques(fonte, carne=CARNE_PADRAO, ano_inicio=None, ano_fim=None):
+    """Maior média per capita e maior volume total do período para a carne."""
+    return destaques_globais(mapa(fonte, carne, ano_inicio, ano_fim))
+
+
+def composicao(fonte, paises=None, ano_inicio=None, ano_fim=None):
+    """Média do período e participação de cada carne por país (`paises`: códigos; None = todos)."""
+    codigos, nomes = _paises(fonte, paises)
+    ano_inicio, ano_fim = _periodo(fonte, ano_inicio, ano_fim)
+    cubo_fonte = cubo(fonte)
+    if cubo_fonte is not None:
+        if nomes is None:
+            nomes = list(dimensoes(fonte)["paises"])
+        df_comp = composicao_do_cubo(cubo_fonte, ano_inicio, ano_fim, nomes)
+    else:
+        df_comp = medias_por_carne(fatia(fonte, ano_inicio, ano_fim, locations=codigos), nomes, ano_inicio, ano_fim)
+    return participacao_carnes(df_comp)
+
+
+def migracao(fonte, metrica=METRICA_PADRAO, paises=None, ano_inicio=None, ano_fim=None):
+    """Troca de bovina por aves no período (`migracao_aves_bovina`) para os países (códigos; None = todos)."""
+    codigos, nomes = _paises(fonte, paises)
+    ano_inicio, ano_fim = _periodo(fonte, ano_inicio, ano_fim)
+    df = fatia(fonte, ano_inicio, ano_fim, tipos=("POULTRY", "BEEF"), locations=codigos)
+    return migracao_aves_bovina(df, _metrica(metrica), nomes, ano_inicio, ano_fim)
+
+
+def tendencias(fonte, carne=CARNE_PADRAO, metrica=METRICA_PADRAO, paises=None, ano_inicio=None, ano_fim=None):
+    """Variação, CAGR e inclinação no período por país para a carne (códigos; None = ranking de todos)."""
+    carne_pt = _carne(carne)
+    codigos, nomes = _paises(fonte, paises)
+    ano_inicio, ano_fim = _periodo(fonte, ano_inicio, ano_fim)
+    df = fatia(fonte, ano_inicio, ano_fim, tipos=(carne,), locations=codigos)
+    return tendencias_crescimento(df, carne_pt, _metrica(metrica), nomes, ano_inicio, ano_fim)
+
+
+CONSULTAS = {
+    "dimensoes": dimensoes,
+    "mapa": mapa,
+    "top20": top20,
+    "destaques": destaques,
+    "composicao": composicao,
+    "migracao": migracao,
+    "tendencias": tendencias,
+}
+
+
+def _valor_json(valor):
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not np.isfinite(valor):
+        return None
+    return valor
+
+
+def para_json(resultado):
+    """DataFrames viram listas de registros, Series viram dicionários; NaN e inf viram None."""
+    if isinstance(resultado, pd.DataFrame):
+        df = resultado.reset_index(drop=True)
+        return [{str(chave): _valor_json(valor) for chave, valor in registro.items()}
+                for registro in df.astype(object).to_dict("records")]
+    if isinstance(resultado, pd.Series):
+        return {str(chave): _valor_json(valor) for chave, valor in resultado.astype(object).items()}
+    if isinstance(resultado, dict):
+        return {str(chave): para_json(valor) for chave, valor in resultado.items()}
+    if isinstance(resultado, (list, tuple)):
+        return [para_json(valor) for valor in resultado]
+    return _valor_json(resultado)
+
+
+def consultar(fonte, nome, **parametros):
+    """Executa a consulta `nome` e devolve o resultado pronto para json.dumps. ValueError para pedido inválido."""
+    if not isinstance(nome, str) or nome not in CONSULTAS:
+        raise ValueError(f"Consulta desconhecida: '{nome}'. Opções: {', '.join(CONSULTAS)}")
+    funcao = CONSULTAS[nome]
+    try:
+        inspect.signature(funcao).bind(fonte, **parametros)
+    except TypeError as e:
+        raise ValueError(f"Parâmetros inválidos para '{nome}': {e}") from e
+    return para_json(funcao(fonte, **parametros))
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+CHAVES_TENDENCIA = ["Tipo_Carne", "País"]
+
+
+def calcular_tendencias(df, coluna):
+    """Tendência de `coluna` por (carne, país) em uma única passada agrupada.
+
+    Para cada grupo: primeiro e último ano com dado e seus valores, variação
+    percentual entre eles, CAGR e inclinação da reta de mínimos quadrados
+    (unidades por ano). Variação e CAGR ficam NaN quando o valor inicial não é
+    positivo ou há um ano só; a inclinação, quando há menos de dois anos.
+    """
+    colunas_saida = ["Ano_Inicio", "Valor_Inicio", "Ano_Fim", "Valor_Fim", "N_Anos",
+                     "Crescimento_Pct", "CAGR_Pct", "Inclinacao"]
+    if df.empty:
+        return pd.DataFrame(columns=colunas_saida,
+                            index=pd.MultiIndex.from_arrays([[], []], names=CHAVES_TENDENCIA))
+
+    anos = df["Ano"].to_numpy(dtype="int64")
+    base = pd.DataFrame({
+        "Tipo_Carne": df["Tipo_Carne"].to_numpy(),
+        "País": df["País"].to_numpy(),
+        "ano": anos,
+        # Anos deslocados para perto de zero, para as somas de quadrados não perderem precisão.
+        "x": (anos - anos.min()).astype("float64"),
+        "y": df[coluna].to_numpy(dtype="float64"),
+    }).sort_values(CHAVES_TENDENCIA + ["ano"], kind="stable")
+    base["xy"] = base["x"] * base["y"]
+    base["xx"] = base["x"] * base["x"]
+
+    grupos = base.groupby(CHAVES_TENDENCIA, sort=True, observed=True)
+    t = grupos.agg(
+        Ano_Inicio=("ano", "first"),
+        Valor_Inicio=("y", "first"),
+        Ano_Fim=("ano", "last"),
+        Valor_Fim=("y", "last"),
+        N_Anos=("x", "size"),
+        soma_x=("x", "sum"),
+        soma_y=("y", "sum"),
+        soma_xy=("xy", "sum"),
+        soma_xx=("xx", "sum"),
+    )
+
+    periodo = t["Ano_Fim"] - t["Ano_Inicio"]
+    valido = (t["Valor_Inicio"] > 0) & (periodo > 0)
+    t["Crescimento_Pct"] = ((t["Valor_Fim"] - t["Valor_Inicio"]) / t["Valor_Inicio"] * 100).where(valido)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        razao = (t["Valor_Fim"] / t["Valor_Inicio"]).where(valido & (t["Valor_Fim"] >= 0))
+        t["CAGR_Pct"] = (razao ** (1 / periodo.where(periodo > 0)) - 1) * 100
+
+        n = t["N_Anos"]
+        variancia_x = t["soma_xx"] - t["soma_x"] ** 2 / n
+        covariancia = t["soma_xy"] - t["soma_x"] * t["soma_y"] / n
+        t["Inclinacao"] = (covariancia / variancia_x).where((n >= 2) & (variancia_x > 0))
+
+    return t[colunas_saida]
+
+
+def ranking_crescimento(tendencias, carne, coluna="Crescimento_Pct", ascendente=False):
+    """Países da `carne` ordenados por `coluna`; os sem tendência calculável ficam no fim."""
+    if carne not in tendencias.index.get_level_values("Tipo_Carne"):
+        return tendencias.iloc[0:0].reset_index()
+    return tendencias.xs(carne, level="Tipo_Carne") \
+        .sort_values(coluna, ascending=ascendente, na_position="last") \
+        .reset_index()
@@ -0,0 +1,172 @@
+"""Carga assíncrona e concorrente no MongoDB (Motor), usada pelo modo "backfill" do load_mongo.py.
+
+Os documentos são codificados em BSON uma única vez e agrupados em lotes
+limitados por bytes (e não só por quantidade), sempre abaixo dos limites do
+servidor: 16 MiB por documento e 48 MB por mensagem. Até `janela` lotes ficam
+em voo ao mesmo tempo, cada um em uma conexão do pool. Os lotes são montados em
+uma thread e entram numa fila de `janela` posições: quando a fila enche, a
+montagem espera (contrapressão), então a memória fica limitada a cerca de
+2 x janela x bytes_lote, qualquer que seja o total.
+"""
+import asyncio
+import time
+
+import bson
+from bson.raw_bson import RawBSONDocument
+from pymongo import IndexModel, ReplaceOne
+
+# Valores padrão do servidor; os reais vêm do comando "hello" quando disponíveis.
+LIMITE_DOCUMENTO_BYTES = 16 * 2**20
+LIMITE_MENSAGEM_BYTES = 48_000_000
+LIMITE_DOCS_POR_LOTE = 100_000
+# Folga para o cabeçalho do comando insert/update na mesma mensagem.
+MARGEM_MENSAGEM_BYTES = 64 * 2**10
+
+JANELA_PADRAO = 4
+BYTES_LOTE_PADRAO = 8 * 2**20
+DOCS_LOTE_PADRAO = 1000
+MODOS = ["insert", "upsert"]
+
+
+def lotes_por_tamanho(documentos, bytes_lote=BYTES_LOTE_PADRAO, docs_lote=DOCS_LOTE_PADRAO,
+                      limite_documento=LIMITE_DOCUMENTO_BYTES):
+    """Agrupa os documentos em lotes de até `bytes_lote` bytes e `docs_lote` documentos.
+
+    Cada documento é codificado uma vez (RawBSONDocument), e o driver envia os
+    bytes sem recodificar. Gera (lote, bytes do lote). ValueError se um
+    documento sozinho passa do limite do servidor.
+    """
+    lote, tamanho = [], 0
+    for documento in documentos:
+        bruto = RawBSONDocument(bson.encode(documento))
+        n = len(bruto.raw)
+        if n > limite_documento:
+            raise ValueError(f"Documento {documento.get('_id')!r} tem {n} bytes; o limite do MongoDB é {limite_documento}.")
+        if lote and (tamanho + n > bytes_lote or len(lote) >= docs_lote):
+            yield lote, tamanho
+            lote, tamanho = [], 0
+        lote.append(bruto)
+        tamanho += n
+    if lote:
+        yield lote, tamanho
+
+
+async def _limites_servidor(db):
+    try:
+        hello = await db.command("hello")
+    except Exception:
+        hello = {}
+    return {
+        "documento": hello.get("maxBsonObjectSize", LIMITE_DOCUMENTO_BYTES),
+        "mensagem": hello.get("maxMessageSizeBytes", LIMITE_MENSAGEM_BYTES),
+        "docs": hello.get("maxWriteBatchSize", LIMITE_DOCS_POR_LOTE),
+    }
+
+
+async def carregar(collection, documentos, modo="insert", janela=JANELA_PADRAO, bytes_lote=BYTES_LOTE_PADRAO,
+                   docs_lote=DOCS_LOTE_PADRAO):
+    """Envia `documentos` (qualquer iterável) para a coleção Motor com até `janela` lotes em voo.
+
+    "insert" usa insert_many não ordenado (coleção vazia, backfill); "upsert"
+    substitui por `_id`. Retorna estatísticas da carga.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconhecido: '{modo}'. Opções: {', '.join(MODOS)}")
+
+    limites = await _limites_servidor(collection.database)
+    bytes_lote = min(bytes_lote, limites["mensagem"] - MARGEM_MENSAGEM_BYTES)
+    docs_lote = min(docs_lote, limites["docs"])
+    lotes = lotes_por_tamanho(documentos, bytes_lote, docs_lote, limites["documento"])
+
+    fila = asyncio.Queue(maxsize=janela)
+    estatisticas = {"documentos": 0, "lotes": 0, "bytes_enviados": 0, "maior_lote_bytes": 0,
+                    "max_em_voo": 0, "segundos_espera_fila": 0.0}
+    em_voo = 0
+
+    async def produzir():
+        while True:
+            # A montagem (leitura do Parquet + BSON) roda fora do loop de eventos.
+            item = await asyncio.to_thread(next, lotes, None)
+            if item is None:
+                break
+            inicio = time.perf_counter()
+            await fila.put(item)
+            estatisticas["segundos_espera_fila"] += time.perf_counter() - inicio
+        for _ in range(janela):
+            await fila.put(None)
+
+    async def enviar():
+        nonlocal em_voo
+        while (item := await fila.get()) is not None:
+            lote, tamanho = item
+            em_voo += 1
+            estatisticas["max_em_voo"] = max(estatisticas["max_em_voo"], em_voo)
+            try:
+                if modo == "insert":
+                    await collection.insert_many(lote, ordered=False)
+                else:
+                    await collection.bulk_write(
+                        [ReplaceOne({"_id": documento["_id"]}, documento, upsert=True) for documento in lote],
+                        ordered=False)
+            finally:
+                em_voo -= 1
+            estatisticas["documentos"] += len(lote)
+            estatisticas["lotes"] += 1
+            estatisticas["bytes_enviados"] += tamanho
+            estatisticas["maior_lote_bytes"] = max(estatisticas["maior_lote_bytes"], tamanho)
+
+    inicio = time.perf_counter()
+    tarefas = [asyncio.create_task(produzir())] + [asyncio.create_task(enviar()) for _ in range(janela)]
+    try:
+        await asyncio.gather(*tarefas)
+    except BaseException:
+        for tarefa in tarefas:
+            tarefa.cancel()
+        raise
+    duracao = time.perf_counter() - inicio
+
+    estatisticas.update(
+        segundos=duracao,
+        docs_por_segundo=estatisticas["documentos"] / duracao if duracao > 0 else 0.0,
+        mb_por_segundo=estatisticas["bytes_enviados"] / 2**20 / duracao if duracao > 0 else 0.0,
+    )
+    return estatisticas
+
+
+async def _backfill(connection_string, db_name, collection_name, documentos, indices, **opcoes):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(connection_string, maxPoolSize=max(opcoes.get("janela", JANELA_PADRAO), 1) + 2)
+    try:
+        db = client[db_name]
+        # A carga vai para uma coleção temporária, sem índices secundários (cada insert
+        # só atualiza o _id); a coleção em uso continua servindo leituras até o rename.
+        temporaria = db[f"{collection_name}_backfill"]
+        await temporaria.drop()
+        await db.create_collection(temporaria.name)
+        try:
+            estatisticas = await carregar(temporaria, documentos, modo="insert", **opcoes)
+
+            inicio = time.perf_counter()
+            if indices:
+                await temporaria.create_indexes([IndexModel(campo) for campo in indices])
+            estatisticas["segundos_indices"] = time.perf_counter() - inicio
+        except Exception:
+            await temporaria.drop()
+            raise
+        await temporaria.rename(collection_name, dropTarget=True)
+        return estatisticas
+    finally:
+        client.close()
+
+
+def backfill(connection_string, db_name, collection_name, documentos, indices=(), janela=JANELA_PADRAO,
+             bytes_lote=BYTES_LOTE_PADRAO, docs_lote=DOCS_LOTE_PADRAO):
+    """Recria a coleção com os documentos, com carga concorrente e índices criados só no final.
+
+    Os documentos são carregados em `<collection_name>_backfill`, que substitui
+    a coleção atual num único renameCollection: se a carga falhar, a coleção
+    atual fica como estava.
+    """
+    return asyncio.run(_backfill(connection_string, db_name, collection_name, documentos, indices,
+                                 janela=janela, bytes_lote=bytes_lote, docs_lote=docs_lote))
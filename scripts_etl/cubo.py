@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+PATH_CUBO = "data_processed/cubo_consumo.parquet"
+CHAVES_CUBO = ["LOCATION", "Pais_Nome", "SUBJECT"]
+MEDIDAS_CUBO = ["KG_CAP", "THND_TONNE"]
+
+
+def construir_cubo(df, faixa_anos=None):
+    """Cubo (país, carne, ano) com somas prefixadas ao longo dos anos.
+
+    Cada (LOCATION, SUBJECT) recebe uma linha para todos os anos do intervalo
+    global, mesmo sem dado. As colunas SOMA_<medida> e N_REGISTROS acumulam,
+    até o ano da linha, a soma da medida (nulos contam como 0, como no
+    dashboard) e o número de registros existentes. Assim a média de qualquer
+    período [a, b] é (SOMA[b] - SOMA[a-1]) / (N[b] - N[a-1]).
+
+    `faixa_anos` (mínimo, máximo) fixa o intervalo quando `df` é só uma parte
+    dos países (construção em blocos); por padrão vem do próprio `df`.
+    """
+    ano_min, ano_max = faixa_anos or (df["TIME"].min(), df["TIME"].max())
+    anos = pd.DataFrame({"TIME": np.arange(ano_min, ano_max + 1, dtype="int32")})
+    grade = df[CHAVES_CUBO].drop_duplicates().merge(anos, how="cross")
+
+    cubo = grade.merge(df[CHAVES_CUBO + ["TIME"] + MEDIDAS_CUBO], on=CHAVES_CUBO + ["TIME"], how="left", indicator=True)
+    cubo = cubo.sort_values(["LOCATION", "SUBJECT", "TIME"]).reset_index(drop=True)
+
+    grupos = [cubo["LOCATION"], cubo["SUBJECT"]]
+    cubo["N_REGISTROS"] = (cubo.pop("_merge") == "both").astype("int32").groupby(grupos).cumsum()
+    for medida in MEDIDAS_CUBO:
+        cubo[f"SOMA_{medida}"] = cubo[medida].fillna(0).groupby(grupos).cumsum()
+
+    return cubo
+
+
+def salvar_cubo(cubo, path_cubo=PATH_CUBO):
+    os.makedirs(os.path.dirname(path_cubo), exist_ok=True)
+    cubo.to_parquet(path_cubo, index=False)
+
+
+def _faixa_anos_arquivos(arquivos):
+    """Menor e maior TIME dos arquivos Parquet, pelas estatísticas do rodapé (sem ler os dados)."""
+    import pyarrow.parquet as pq
+
+    minimos, maximos = [], []
+    for arquivo in arquivos:
+        metadados = pq.ParquetFile(arquivo).metadata
+        indice = metadados.schema.to_arrow_schema().get_field_index("TIME")
+        for i in range(metadados.num_row_groups):
+            estatisticas = metadados.row_group(i).column(indice).statistics
+            minimos.append(estatisticas.min)
+            maximos.append(estatisticas.max)
+    return min(minimos), max(maximos)
+
+
+def construir_cubo_em_blocos(arquivos, locations, path_cubo=PATH_CUBO, locations_por_bloco=200):
+    """Mesmo cubo de `construir_cubo`, montado a partir dos arquivos gravados, um bloco de países por vez.
+
+    Os arquivos estão ordenados por LOCATION, então o filtro de cada bloco poda
+    os row groups dos demais países. Retorna o número de linhas do cubo.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(path_cubo), exist_ok=True)
+    locations = sorted(locations)
+    faixa_anos = _faixa_anos_arquivos(arquivos)
+    dataset = ds.dataset(arquivos, format="parquet")
+
+    linhas = 0
+    writer = None
+    try:
+        for i in range(0, len(locations), locations_por_bloco):
+            bloco = locations[i:i + locations_por_bloco]
+            df = dataset.to_table(filter=ds.field("LOCATION").isin(bloco)).to_pandas()
+            tabela = pa.Table.from_pandas(construir_cubo(df, faixa_anos), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path_cubo, tabela.schema)
+            writer.write_table(tabela)
+            linhas += tabela.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return linhas
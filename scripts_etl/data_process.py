@@ -1,75 +1,558 @@
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import col, lit, when, expr, struct, collect_list
+import argparse
 import os
+import shutil
+import tempfile
+
+from cubo import PATH_CUBO, construir_cubo, construir_cubo_em_blocos, salvar_cubo
+from dimensao_paises import PATH_DIMENSAO, agregados, caminhos_fonte, dimensao_para, ler_dimensao, salvar_dimensao
+from instrumentacao import configurar, etapa, tamanho_em_disco
+from manifesto import (
+    carregar_manifesto, chave_particao, fingerprint_particao, hash_arquivo, hash_objeto,
+    salvar_manifesto
+)
+
+MEDIDAS = ["KG_CAP", "THND_TONNE"]
+COLUNAS_SAIDA = ["LOCATION", "Pais_Nome", "SUBJECT", "TIME"] + MEDIDAS
+ENGINES = ["spark", "pandas", "arrow", "streaming"]
+
+# Layout do CSV bruto da OCDE (e de qualquer arquivo no mesmo formato). Com os
+# tipos explícitos, nenhuma engine precisa de uma passada extra para inferi-los.
+SCHEMA_BRUTO = {
+    "LOCATION": "string",
+    "SUBJECT": "string",
+    "MEASURE": "string",
+    "TIME": "int32",
+    "Value": "float64",
+}
+
+# Um arquivo por SUBJECT (`<SUBJECT>/dados.parquet`), em row groups deste tamanho.
+ARQUIVO_CARNE = "dados.parquet"
+LINHAS_POR_ROW_GROUP = 100_000
+
+PATH_DATA_RAW = "data_raw/meat_consumption_worldwide.csv"
+PATH_DATA_PROCESSED = "data_processed/consumo_processado.parquet"
+
+
+def schema_processado():
+    """Schema do Parquet final, idêntico ao que o Spark grava (TIME inferido como int)."""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("LOCATION", pa.string()),
+        ("Pais_Nome", pa.string()),
+        ("SUBJECT", pa.string()),
+        ("TIME", pa.int32()),
+        ("KG_CAP", pa.float64()),
+        ("THND_TONNE", pa.float64()),
+    ])
+
+
+def schema_bruto():
+    import pyarrow as pa
+
+    tipos = {"string": pa.string(), "int32": pa.int32(), "float64": pa.float64()}
+    return pa.schema([(coluna, tipos[tipo]) for coluna, tipo in SCHEMA_BRUTO.items()])
+
+
+def _schema_bruto_spark():
+    from pyspark.sql.types import DoubleType, IntegerType, StringType, StructField, StructType
+
+    tipos = {"string": StringType(), "int32": IntegerType(), "float64": DoubleType()}
+    return StructType([StructField(coluna, tipos[tipo]) for coluna, tipo in SCHEMA_BRUTO.items()])
+
+
+def _caminho_carne(path_data_processed, subject):
+    return os.path.join(path_data_processed, subject, ARQUIVO_CARNE)
+
+
+def salvar_particoes(tabelas, path_data_processed, manifesto_anterior=None):
+    """Grava um arquivo Parquet por SUBJECT, reescrevendo só os das carnes com alguma partição alterada.
+
+    Cada arquivo fica ordenado por (LOCATION, TIME), em row groups de até
+    LINHAS_POR_ROW_GROUP linhas: as estatísticas min/max de cada row group
+    permitem que leitores com filtro de país ou de período pulem os demais. O
+    manifesto continua com um fingerprint por partição (LOCATION, SUBJECT), então
+    as LOCATIONs alteradas (pendentes para o MongoDB) são exatas; só a
+    regravação é feita por carne.
+
+    `tabelas` é um iterável de blocos (pa.Table) em que cada (SUBJECT,
+    LOCATION) aparece inteiro em um único bloco; só um bloco fica em memória
+    por vez. Cada carne é gravada num arquivo temporário à medida que os blocos
+    chegam, e ele só substitui o atual se a carne mudou. Retorna o dicionário
+    de fingerprints das partições e o conjunto de LOCATIONs cujo conteúdo mudou
+    (inclusive as que deixaram de existir).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if manifesto_anterior is None:
+        # Sem manifesto (primeira execução ou layout antigo): reescreve tudo.
+        if os.path.isdir(path_data_processed):
+            shutil.rmtree(path_data_processed)
+        particoes_anteriores = {}
+    else:
+        particoes_anteriores = manifesto_anterior.get("particoes", {})
+    os.makedirs(path_data_processed, exist_ok=True)
+
+    particoes = {}
+    locations_alteradas = set()
+    carnes_alteradas = set()
+    escritores = {}
+    linhas_por_carne = {}
+
+    with etapa("etl.gravar_parquet") as registro:
+        linhas_lidas = 0
+        try:
+            for tabela in tabelas:
+                df = tabela.to_pandas().sort_values(["SUBJECT", "LOCATION", "TIME"], kind="stable")
+                linhas_lidas += len(df)
+                for (subject, location), df_particao in df.groupby(["SUBJECT", "LOCATION"], sort=False):
+                    chave = chave_particao(location, subject)
+                    fingerprint = fingerprint_particao(df_particao)
+                    particoes[chave] = {"hash": fingerprint, "linhas": len(df_particao)}
+                    if particoes_anteriores.get(chave, {}).get("hash") != fingerprint:
+                        locations_alteradas.add(location)
+                        carnes_alteradas.add(subject)
+
+                for subject, df_carne in df.groupby("SUBJECT", sort=False):
+                    if subject not in escritores:
+                        os.makedirs(os.path.join(path_data_processed, subject), exist_ok=True)
+                        escritores[subject] = pq.ParquetWriter(
+                            _caminho_carne(path_data_processed, subject) + ".tmp", schema_processado())
+                    escritores[subject].write_table(
+                        pa.Table.from_pandas(df_carne, schema=schema_processado(), preserve_index=False),
+                        row_group_size=LINHAS_POR_ROW_GROUP)
+                    linhas_por_carne[subject] = linhas_por_carne.get(subject, 0) + len(df_carne)
+        finally:
+            for escritor in escritores.values():
+                escritor.close()
+
+        for chave in set(particoes_anteriores) - set(particoes):
+            subject, location = chave.split("/")
+            locations_alteradas.add(location)
+            carnes_alteradas.add(subject)
+
+        reescritas = 0
+        linhas_escritas = 0
+        bytes_escritos = 0
+        for subject in escritores:
+            path_carne = _caminho_carne(path_data_processed, subject)
+            if subject in carnes_alteradas or not os.path.exists(path_carne):
+                os.replace(path_carne + ".tmp", path_carne)
+                reescritas += 1
+                linhas_escritas += linhas_por_carne[subject]
+                bytes_escritos += os.path.getsize(path_carne)
+            else:
+                os.remove(path_carne + ".tmp")
+        for subject in carnes_alteradas - set(escritores):
+            shutil.rmtree(os.path.join(path_data_processed, subject), ignore_errors=True)
+
+        registro["linhas_entrada"] = linhas_lidas
+        registro["linhas_saida"] = linhas_escritas
+        registro["bytes_escritos"] = bytes_escritos
+
+    print(f"{reescritas} de {len(escritores)} arquivos de carne reescritos "
+          f"({len(locations_alteradas)} países alterados, {len(particoes)} partições).")
+    return particoes, locations_alteradas
+
+
+def _processar_spark(path_data_raw, dimensao):
+    import pyarrow as pa
+    from pyspark.sql import SparkSession
+    from pyspark.sql.functions import broadcast, coalesce, col
+
+    # Sem SPARK_HOME no ambiente, o pyspark usa a própria instalação (pip).
+    spark_home = os.environ.get('SPARK_HOME')
+    if spark_home:
+        os.environ.setdefault('HADOOP_HOME', spark_home)
 
-def create_country_name_mapping():
-    mapping = {
-        "ARG": "Argentina", "BRA": "Brasil", "CAN": "Canadá", "CHL": "Chile",
-        "COL": "Colômbia", "HTI": "Haiti", "MEX": "México", "PER": "Peru",
-        "PRY": "Paraguai", "URY": "Uruguai", "USA": "Estados Unidos",
-        "EU28": "União Europeia (28)", "GBR": "Reino Unido", "NOR": "Noruega",
-        "RUS": "Rússia", "CHE": "Suíça", "TUR": "Turquia", "UKR": "Ucrânia",
-        "AUS": "Austrália", "BGD": "Bangladesh", "CHN": "China", "IND": "Índia",
-        "IDN": "Indonésia", "IRN": "Irã", "ISR": "Israel", "JPN": "Japão",
-        "KAZ": "Cazaquistão", "KOR": "Coreia do Sul", "MYS": "Malásia",
-        "NZL": "Nova Zelândia", "PAK": "Paquistão", "PHL": "Filipinas",
-        "SAU": "Arábia Saudita", "THA": "Tailândia", "VNM": "Vietnã",
-        "DZA": "Argélia", "EGY": "Egito", "ETH": "Etiópia", "MOZ": "Moçambique",
-        "NGA": "Nigéria", "SDN": "Sudão", "ZAF": "África do Sul",
-        "TZA": "Tanzânia", "ZMB": "Zâmbia", "SSA": "África Subsaariana",
-        "OECD": "OCDE", "WLD": "Mundo", "BRICS": "BRICS"
-    }
-    
-    case_expression = "CASE "
-    for code, name in mapping.items():
-        case_expression += f"WHEN LOCATION = '{code}' THEN '{name}' "
-    case_expression += "ELSE LOCATION END"
-    return expr(case_expression)
-
-def processar_dados_etl():
-    spark_home = r'C:\spark-4.0.1-bin-hadoop3\spark-4.0.1-bin-hadoop3'
-    os.environ['SPARK_HOME'] = spark_home
-    os.environ['HADOOP_HOME'] = spark_home
-    
     print("Iniciando sessão Spark (para ETL em Parquet)...")
-    
+
     spark = SparkSession.builder \
         .appName("ETL_Consumo_Carne_Parquet") \
         .master("local[*]") \
-        .getOrCreate() 
-
-    path_data_raw = "data_raw/meat_consumption_worldwide.csv"
-    path_data_processed = "data_processed/consumo_processado.parquet" 
+        .getOrCreate()
 
     print(f"Carregando dados de {path_data_raw}...")
-    df = spark.read.csv(path_data_raw, header=True, inferSchema=True)
-
-    print("Adicionando nomes de países...")
-    all_locations = df.select("LOCATION").distinct()
-    map_expr_nome = create_country_name_mapping()
-    df_nomes = all_locations.withColumn("Pais_Nome", map_expr_nome)
-    df_com_nomes = df.join(df_nomes, "LOCATION", "left")
+    with etapa("etl.ler_csv", bytes_lidos=tamanho_em_disco(path_data_raw)):
+        df = spark.read.csv(path_data_raw, header=True, schema=_schema_bruto_spark())
 
+    # O Spark só executa o plano no toPandas: mapeamento, filtro e pivot são medidos juntos em "etl.pivotar".
     print("Filtrando dados agregados...")
-    agregados = ['WLD', 'OECD', 'BRICS', 'EU28', 'SSA']
-    df_limpo = df_com_nomes.filter(~col("LOCATION").isin(agregados))
+    df_limpo = df.filter(~col("LOCATION").isin(agregados(dimensao)))
+
+    print("Adicionando nomes de países...")
+    # A dimensão tem poucas dezenas de linhas: vai inteira para cada executor, sem shuffle.
+    df_nomes = spark.createDataFrame(dimensao.select(["LOCATION", "Pais_Nome"]).to_pandas())
+    df_limpo = df_limpo.join(broadcast(df_nomes), "LOCATION", "left") \
+        .withColumn("Pais_Nome", coalesce(col("Pais_Nome"), col("LOCATION")))
 
     print("Pivotando dados...")
     df_pivotado = df_limpo.groupBy("LOCATION", "Pais_Nome", "SUBJECT", "TIME") \
-        .pivot("MEASURE", ["KG_CAP", "THND_TONNE"]) \
+        .pivot("MEASURE", MEDIDAS) \
         .sum("Value") \
         .orderBy("LOCATION", "TIME")
-    
+
     print("Schema final (plano) para o Parquet:")
     df_pivotado.printSchema()
 
+    with etapa("etl.pivotar") as registro:
+        tabela = pa.Table.from_pandas(df_pivotado.toPandas(), schema=schema_processado(), preserve_index=False)
+        registro["linhas_saida"] = tabela.num_rows
+    spark.stop()
+    return tabela
+
+
+def _processar_pandas(path_data_raw, dimensao):
+    import pandas as pd
+    import pyarrow as pa
+
+    print(f"Carregando dados de {path_data_raw}...")
+    with etapa("etl.ler_csv", bytes_lidos=tamanho_em_disco(path_data_raw)) as registro:
+        tipos_pandas = {"string": "str", "int32": "int32", "float64": "float64"}
+        df = pd.read_csv(path_data_raw, usecols=list(SCHEMA_BRUTO), float_precision="round_trip",
+                         dtype={coluna: tipos_pandas[tipo] for coluna, tipo in SCHEMA_BRUTO.items()})
+        registro["linhas_saida"] = len(df)
+
+    print("Filtrando dados agregados...")
+    with etapa("etl.filtrar_agregados", linhas_entrada=len(df)) as registro:
+        df_limpo = df[~df["LOCATION"].isin(agregados(dimensao))]
+        registro["linhas_saida"] = len(df_limpo)
+
+    print("Adicionando nomes de países...")
+    with etapa("etl.mapear_nomes", linhas_entrada=len(df_limpo), linhas_saida=len(df_limpo)):
+        df_nomes = dimensao.select(["LOCATION", "Pais_Nome"]).to_pandas()
+        df_limpo = df_limpo.merge(df_nomes, on="LOCATION", how="left")
+        df_limpo["Pais_Nome"] = df_limpo["Pais_Nome"].fillna(df_limpo["LOCATION"])
+
+    print("Pivotando dados...")
+    with etapa("etl.pivotar", linhas_entrada=len(df_limpo)) as registro:
+        df_pivotado = df_limpo \
+            .groupby(["LOCATION", "Pais_Nome", "SUBJECT", "TIME", "MEASURE"])["Value"] \
+            .sum(min_count=1) \
+            .unstack("MEASURE") \
+            .reindex(columns=MEDIDAS) \
+            .reset_index() \
+            .sort_values(["LOCATION", "TIME", "SUBJECT"], kind="stable")
+        registro["linhas_saida"] = len(df_pivotado)
+
+    return pa.Table.from_pandas(df_pivotado[COLUNAS_SAIDA], schema=schema_processado(), preserve_index=False)
+
+
+def _processar_arrow(path_data_raw, dimensao):
+    from pyarrow import csv
+
+    print(f"Carregando dados de {path_data_raw}...")
+    with etapa("etl.ler_csv", bytes_lidos=tamanho_em_disco(path_data_raw)) as registro:
+        tabela = csv.read_csv(
+            path_data_raw,
+            convert_options=csv.ConvertOptions(column_types=schema_bruto(), include_columns=list(SCHEMA_BRUTO))
+        )
+        registro["linhas_saida"] = tabela.num_rows
+
+    return _transformar_arrow(tabela, dimensao)
+
+
+def _transformar_arrow(tabela, dimensao):
+    """Filtro dos agregados, pivot das medidas e nomes dos países sobre uma tabela bruta do Arrow."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    print("Filtrando dados agregados...")
+    with etapa("etl.filtrar_agregados", linhas_entrada=tabela.num_rows) as registro:
+        tabela = tabela.filter(pc.invert(pc.is_in(tabela["LOCATION"], value_set=pa.array(agregados(dimensao), pa.string()))))
+        registro["linhas_saida"] = tabela.num_rows
+
+    print("Pivotando dados...")
+    with etapa("etl.pivotar", linhas_entrada=tabela.num_rows) as registro:
+        for medida in MEDIDAS:
+            valores = pc.if_else(pc.equal(tabela["MEASURE"], medida), tabela["Value"], pa.scalar(None, pa.float64()))
+            tabela = tabela.append_column(medida, valores)
+        tabela_pivotada = tabela.group_by(["LOCATION", "SUBJECT", "TIME"], use_threads=False) \
+            .aggregate([(medida, "sum") for medida in MEDIDAS]) \
+            .rename_columns(["LOCATION", "SUBJECT", "TIME"] + MEDIDAS)
+        registro["linhas_saida"] = tabela_pivotada.num_rows
+
+    print("Adicionando nomes de países...")
+    with etapa("etl.mapear_nomes", linhas_entrada=tabela_pivotada.num_rows, linhas_saida=tabela_pivotada.num_rows):
+        tabela_pivotada = tabela_pivotada.join(dimensao.select(["LOCATION", "Pais_Nome"]), "LOCATION",
+                                               join_type="left outer")
+        pais_nome = pc.coalesce(tabela_pivotada["Pais_Nome"], tabela_pivotada["LOCATION"])
+        return tabela_pivotada.drop_columns(["Pais_Nome"]).append_column("Pais_Nome", pais_nome) \
+            .select(COLUNAS_SAIDA) \
+            .sort_by([("LOCATION", "ascending"), ("TIME", "ascending"), ("SUBJECT", "ascending")]) \
+            .cast(schema_processado())
+
+
+def _processar_streaming(caminhos, dimensao, n_baldes=None):
+    """Gera o resultado em blocos (um por balde de países), com memória limitada.
+
+    Aceita vários CSVs (ex.: uma edição da OCDE por arquivo, da mais antiga para
+    a mais recente), comprimidos ou não. Ver `leitura_streaming`.
+    """
+    from leitura_streaming import distribuir_em_baldes, estimar_baldes, ler_baldes, manter_ultima_origem
+
+    n_baldes = n_baldes or estimar_baldes(caminhos)
+    with tempfile.TemporaryDirectory(prefix="etl_baldes_") as dir_baldes:
+        print(f"Distribuindo {len(caminhos)} arquivo(s) em até {n_baldes} baldes de países...")
+        with etapa("etl.ler_csv", bytes_lidos=sum(tamanho_em_disco(c) for c in caminhos)) as registro:
+            baldes, estatisticas = distribuir_em_baldes(caminhos, schema_bruto(), dir_baldes, n_baldes,
+                                                        excluir_locations=agregados(dimensao))
+            registro.update(linhas_saida=estatisticas["linhas_gravadas"], **estatisticas)
+
+        for i, tabela in enumerate(ler_baldes(baldes), start=1):
+            print(f"Balde {i}/{len(baldes)}: {tabela.num_rows} linhas.")
+            yield _transformar_arrow(manter_ultima_origem(tabela, ["LOCATION", "SUBJECT", "MEASURE", "TIME"]), dimensao)
+
+
+def comparar_saidas(path_referencia, path_candidato, tolerancia=1e-9):
+    """Verifica se dois Parquets processados têm o mesmo schema e os mesmos valores.
+
+    A ordem das linhas não é comparada (o Spark não garante a ordem de SUBJECT
+    dentro de um mesmo LOCATION/TIME).
+    """
+    import numpy as np
+    import pandas as pd
+
+    chaves = ["LOCATION", "SUBJECT", "TIME"]
+    df_ref = pd.read_parquet(path_referencia)
+    df_cand = pd.read_parquet(path_candidato)
+
+    divergencias = []
+    if list(df_ref.columns) != list(df_cand.columns):
+        divergencias.append(f"Colunas diferentes: {list(df_ref.columns)} != {list(df_cand.columns)}")
+    else:
+        for coluna in df_ref.columns:
+            if df_ref[coluna].dtype != df_cand[coluna].dtype:
+                divergencias.append(f"Tipo da coluna {coluna}: {df_ref[coluna].dtype} != {df_cand[coluna].dtype}")
+
+    if len(df_ref) != len(df_cand):
+        divergencias.append(f"Número de linhas diferente: {len(df_ref)} != {len(df_cand)}")
+
+    if not divergencias:
+        df_ref = df_ref.sort_values(chaves).reset_index(drop=True)
+        df_cand = df_cand.sort_values(chaves).reset_index(drop=True)
+        for coluna in ["LOCATION", "Pais_Nome", "SUBJECT", "TIME"]:
+            if not df_ref[coluna].equals(df_cand[coluna]):
+                divergencias.append(f"Valores diferentes na coluna {coluna}")
+        for coluna in MEDIDAS:
+            if not np.allclose(df_ref[coluna], df_cand[coluna], rtol=0, atol=tolerancia, equal_nan=True):
+                divergencias.append(f"Valores diferentes na coluna {coluna}")
+
+    return divergencias
+
+
+def _lista_entradas(path_data_raw):
+    return [path_data_raw] if isinstance(path_data_raw, (str, os.PathLike)) else list(path_data_raw)
+
+
+def fingerprint_entradas(path_data_raw, paths_dimensao=None):
+    """Hash dos CSVs brutos e da configuração que altera a saída (dimensão de países, medidas)."""
+    paths_dimensao = paths_dimensao or caminhos_fonte()
+    return {
+        "arquivos": {caminho: hash_arquivo(caminho) for caminho in _lista_entradas(path_data_raw)},
+        "configuracao": hash_objeto({
+            "dimensao": {caminho: hash_arquivo(caminho) for caminho in paths_dimensao}, "medidas": MEDIDAS
+        }),
+    }
+
+
+def entradas_inalteradas(manifesto_anterior, entradas, path_cubo=PATH_CUBO, path_dimensao=PATH_DIMENSAO):
+    """True se a última execução já processou exatamente estas entradas e as saídas derivadas existem."""
+    return manifesto_anterior is not None and manifesto_anterior.get("entradas") == entradas \
+        and os.path.exists(path_cubo) and os.path.exists(path_dimensao)
+
+
+def registrar_execucao(path_data_processed, engine, entradas, particoes, locations_alteradas, manifesto_anterior):
+    """Grava o manifesto, acumulando os países ainda pendentes para a carga no MongoDB."""
+    pendentes = set(locations_alteradas)
+    if manifesto_anterior is not None:
+        pendentes |= set(manifesto_anterior.get("locations_pendentes", []))
+    else:
+        pendentes |= {chave.split("/")[1] for chave in particoes}
+
+    salvar_manifesto(path_data_processed, {
+        "engine": engine,
+        "entradas": entradas,
+        "particoes": particoes,
+        "locations_pendentes": sorted(pendentes),
+    })
+
+
+def ingerir_csv(caminho, path_saida, origem=0):
+    """Lê um CSV bruto (comprimido ou não) em blocos e grava as linhas tipadas em Arrow IPC.
+
+    É a etapa de ingestão do orquestrador: cada arquivo de entrada é ingerido
+    separadamente (e em paralelo), e `origem` é a posição do arquivo entre as
+    edições, usada por `pivotar_ingeridos`. Retorna o número de linhas.
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    from leitura_streaming import COLUNA_ORIGEM, abrir_csv
+
+    schema_saida = schema_bruto().append(pa.field(COLUNA_ORIGEM, pa.int16()))
+    linhas = 0
+    with etapa("etl.ler_csv", bytes_lidos=tamanho_em_disco(caminho)) as registro:
+        with abrir_csv(caminho, schema_bruto()) as leitor, pa.ipc.new_file(path_saida, schema_saida) as escritor:
+            for lote in leitor:
+                escritor.write_batch(pa.RecordBatch.from_arrays(
+                    lote.columns + [pa.array(np.full(lote.num_rows, origem, dtype="int16"))],
+                    schema=schema_saida
+                ))
+                linhas += lote.num_rows
+        registro.update(linhas_saida=linhas, bytes_escritos=tamanho_em_disco(path_saida))
+    return linhas
+
+
+def pivotar_ingeridos(arquivos_ingeridos, path_dimensao_completa, path_data_raw=PATH_DATA_RAW,
+                      path_data_processed=PATH_DATA_PROCESSED, incremental=True, path_cubo=PATH_CUBO,
+                      path_dimensao=PATH_DIMENSAO):
+    """Pivot, partições, dimensão de saída e manifesto a partir dos arquivos de `ingerir_csv`.
+
+    `path_dimensao_completa` é a dimensão de `ler_dimensao` gravada em Parquet.
+    Com várias edições, a mais recente vence por (LOCATION, SUBJECT, MEASURE,
+    TIME), como na engine streaming. O cubo não é montado aqui: se algum país
+    mudou, o cubo anterior é removido para não ficar defasado. Retorna os
+    LOCATIONs alterados, ou None se as entradas não mudaram.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from leitura_streaming import ler_baldes, manter_ultima_origem
+
+    entradas = fingerprint_entradas(path_data_raw)
+    manifesto_anterior = carregar_manifesto(path_data_processed) if incremental else None
+    if entradas_inalteradas(manifesto_anterior, entradas, path_cubo, path_dimensao):
+        print("Entradas inalteradas desde a última execução. Nada a processar.")
+        return None
+
+    dimensao = pq.read_table(path_dimensao_completa)
+    with etapa("etl.transformar", engine="arrow") as registro:
+        tabela = pa.concat_tables(ler_baldes(arquivos_ingeridos))
+        tabela = _transformar_arrow(manter_ultima_origem(tabela, ["LOCATION", "SUBJECT", "MEASURE", "TIME"]), dimensao)
+        registro["linhas_saida"] = tabela.num_rows
+
     print(f"Salvando dados processados em {path_data_processed}...")
-    df_pivotado.repartition(1).write \
-        .mode("overwrite") \
-        .parquet(path_data_processed)
+    particoes, locations_alteradas = salvar_particoes([tabela], path_data_processed, manifesto_anterior)
+    salvar_dimensao(dimensao_para(dimensao, {chave.split("/")[1] for chave in particoes}), path_dimensao)
+    if locations_alteradas and os.path.exists(path_cubo):
+        os.remove(path_cubo)
+    registrar_execucao(path_data_processed, "arrow", entradas, particoes, locations_alteradas, manifesto_anterior)
+    return sorted(locations_alteradas)
+
+
+def construir_cubo_processado(path_data_processed=PATH_DATA_PROCESSED, path_cubo=PATH_CUBO):
+    """Monta o cubo a partir do Parquet processado já gravado. Retorna o número de linhas."""
+    import pandas as pd
+
+    with etapa("etl.cubo") as registro:
+        cubo = construir_cubo(pd.read_parquet(path_data_processed))
+        salvar_cubo(cubo, path_cubo)
+        registro.update(linhas_saida=len(cubo), bytes_escritos=tamanho_em_disco(path_cubo))
+    return len(cubo)
+
+
+def processar_dados_etl(engine="spark", path_data_raw=PATH_DATA_RAW, path_data_processed=PATH_DATA_PROCESSED,
+                        incremental=True, path_cubo=PATH_CUBO, n_baldes=None, path_dimensao=PATH_DIMENSAO):
+    """Executa o ETL e retorna a lista de LOCATIONs cujos dados mudaram nesta execução.
+
+    `path_data_raw` pode ser um caminho ou, na engine "streaming", uma lista de
+    CSVs (da edição mais antiga para a mais recente). `n_baldes` (só streaming)
+    fixa em quantos blocos de países a entrada é dividida; por padrão é estimado
+    pelo tamanho dos arquivos. A dimensão dos países presentes na saída é gravada
+    em `path_dimensao`.
+    """
+    processadores = {
+        "spark": _processar_spark,
+        "pandas": _processar_pandas,
+        "arrow": _processar_arrow,
+        "streaming": _processar_streaming,
+    }
+    if engine not in processadores:
+        raise ValueError(f"Engine desconhecida: '{engine}'. Opções: {', '.join(ENGINES)}")
+    caminhos = _lista_entradas(path_data_raw)
+    if len(caminhos) > 1 and engine != "streaming":
+        raise ValueError("Só a engine 'streaming' aceita vários arquivos de entrada.")
+
+    entradas = fingerprint_entradas(path_data_raw)
+    manifesto_anterior = carregar_manifesto(path_data_processed) if incremental else None
+
+    if entradas_inalteradas(manifesto_anterior, entradas, path_cubo, path_dimensao):
+        print("Entradas inalteradas desde a última execução. Nada a processar.")
+        return []
+
+    with etapa("etl.dimensao") as registro:
+        dimensao = ler_dimensao()
+        registro["linhas_saida"] = dimensao.num_rows
+
+    print(f"Executando ETL com a engine '{engine}'...")
+    if engine == "streaming":
+        # Os blocos são gerados sob demanda enquanto as partições são gravadas.
+        tabela = None
+        tabelas = _processar_streaming(caminhos, dimensao, n_baldes)
+    else:
+        with etapa("etl.transformar", engine=engine) as registro:
+            tabela = processadores[engine](caminhos[0], dimensao)
+            registro["linhas_saida"] = tabela.num_rows
+        tabelas = [tabela]
+
+    print(f"Salvando dados processados em {path_data_processed}...")
+    particoes, locations_alteradas = salvar_particoes(tabelas, path_data_processed, manifesto_anterior)
+
+    print(f"Gravando a dimensão de países em {path_dimensao}...")
+    salvar_dimensao(dimensao_para(dimensao, {chave.split("/")[1] for chave in particoes}), path_dimensao)
+
+    if locations_alteradas or not os.path.exists(path_cubo):
+        print(f"Construindo cubo pré-agregado em {path_cubo}...")
+        with etapa("etl.cubo") as registro:
+            if tabela is not None:
+                cubo = construir_cubo(tabela.to_pandas())
+                salvar_cubo(cubo, path_cubo)
+                registro["linhas_saida"] = len(cubo)
+            else:
+                subjects = sorted({chave.split("/")[0] for chave in particoes})
+                locations = sorted({chave.split("/")[1] for chave in particoes})
+                registro["linhas_saida"] = construir_cubo_em_blocos(
+                    [_caminho_carne(path_data_processed, subject) for subject in subjects], locations, path_cubo)
+            registro["bytes_escritos"] = tamanho_em_disco(path_cubo)
+
+    registrar_execucao(path_data_processed, engine, entradas, particoes, locations_alteradas, manifesto_anterior)
+
+    print(f"Processo ETL ({engine} -> Parquet) concluído com sucesso! "
+          f"{len(locations_alteradas)} países alterados.")
+    return sorted(locations_alteradas)
 
-    print("Processo ETL (Spark -> Parquet) concluído com sucesso!")
-    spark.stop()
 
 if __name__ == "__main__":
-    processar_dados_etl()
+    parser = argparse.ArgumentParser(description="ETL do consumo mundial de carne (CSV -> Parquet).")
+    parser.add_argument("--engine", choices=ENGINES, default="spark",
+                        help="Motor de processamento (padrão: spark).")
+    parser.add_argument("--entrada", nargs="+", default=[PATH_DATA_RAW], metavar="CSV",
+                        help="CSV(s) brutos, opcionalmente .gz/.zst; mais de um só com --engine streaming "
+                             "(da edição mais antiga para a mais recente).")
+    parser.add_argument("--baldes", type=int, metavar="N",
+                        help="Engine streaming: divide a entrada em N blocos de países (mais baldes, menos memória).")
+    parser.add_argument("--completo", action="store_true",
+                        help="Ignora o manifesto e reescreve todas as partições.")
+    parser.add_argument("--comparar-com", metavar="PARQUET",
+                        help="Parquet de referência (ex.: gerado pelo Spark) para verificar a paridade da saída.")
+    parser.add_argument("--metricas", metavar="ARQUIVO",
+                        help="Grava as métricas de cada etapa neste arquivo (JSON Lines).")
+    parser.add_argument("--perfil", metavar="DIR",
+                        help="Perfila a execução com cProfile e grava o .prof neste diretório.")
+    args = parser.parse_args()
+    configurar(arquivo=args.metricas, perfil=args.perfil)
+
+    with etapa("etl", engine=args.engine):
+        processar_dados_etl(engine=args.engine, path_data_raw=args.entrada, incremental=not args.completo,
+                            n_baldes=args.baldes)
+
+    if args.comparar_com:
+        divergencias = comparar_saidas(args.comparar_com, PATH_DATA_PROCESSED)
+        if divergencias:
+            print("Saída divergente da referência:")
+            for divergencia in divergencias:
+                print(f"  - {divergencia}")
+            raise SystemExit(1)
+        print(f"Saída idêntica à referência em {args.comparar_com}.")
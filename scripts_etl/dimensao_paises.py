@@ -0,0 +1,84 @@
+"""Dimensão de países: nome em português, marcação de agregado e coordenadas por LOCATION.
+
+A dimensão é montada a partir de arquivos em `data_raw/`, todos com a coluna
+LOCATION: `country_names.csv` (Pais_Nome, Agregado) e arquivos de atributos
+como `country_geodata.csv` (latitude, longitude). Para incluir um país ou um
+atributo novo basta editar ou acrescentar um CSV, sem mudar o código.
+
+As engines do ETL juntam a dimensão aos dados por hash join (broadcast no
+Spark), e o ETL grava em `data_processed/dim_paises.parquet` a dimensão dos
+países presentes na saída. O load_mongo.py sincroniza esse arquivo na coleção
+`dim_paises`, que o dashboard lê em vez de refazer o mapeamento.
+"""
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv
+
+PATH_NOMES_PAISES = "data_raw/country_names.csv"
+PATHS_ATRIBUTOS_PAISES = ["data_raw/country_geodata.csv"]
+PATH_DIMENSAO = "data_processed/dim_paises.parquet"
+
+TIPOS_CONHECIDOS = {
+    "LOCATION": pa.string(),
+    "Pais_Nome": pa.string(),
+    "Agregado": pa.bool_(),
+    "latitude": pa.float64(),
+    "longitude": pa.float64(),
+}
+
+
+def _ler_csv_dimensao(path):
+    return csv.read_csv(path, convert_options=csv.ConvertOptions(column_types=TIPOS_CONHECIDOS))
+
+
+def _completar(dimensao):
+    """Países sem nome ficam com o próprio código; sem marcação, não são agregados."""
+    return dimensao.set_column(
+        dimensao.schema.get_field_index("Pais_Nome"), "Pais_Nome",
+        pc.coalesce(dimensao["Pais_Nome"], dimensao["LOCATION"])
+    ).set_column(
+        dimensao.schema.get_field_index("Agregado"), "Agregado",
+        pc.coalesce(dimensao["Agregado"], pa.scalar(False))
+    )
+
+
+def caminhos_fonte(path_nomes=PATH_NOMES_PAISES, paths_atributos=None):
+    """Arquivos que compõem a dimensão (entram no fingerprint do ETL)."""
+    if paths_atributos is None:
+        paths_atributos = PATHS_ATRIBUTOS_PAISES
+    return [path_nomes] + [path for path in paths_atributos if os.path.exists(path)]
+
+
+def ler_dimensao(path_nomes=PATH_NOMES_PAISES, paths_atributos=None):
+    """Dimensão completa (uma linha por LOCATION) a partir dos CSVs de `data_raw/`.
+
+    Os arquivos de atributos entram por full outer join em LOCATION: um país
+    que só tem coordenadas também aparece, com o código como nome.
+    """
+    caminhos = caminhos_fonte(path_nomes, paths_atributos)
+    dimensao = _ler_csv_dimensao(caminhos[0])
+    for path in caminhos[1:]:
+        dimensao = dimensao.join(_ler_csv_dimensao(path), "LOCATION", join_type="full outer")
+    return _completar(dimensao).sort_by("LOCATION")
+
+
+def agregados(dimensao):
+    """LOCATIONs marcados como agregados (Mundo, OCDE, BRICS...), que não entram na saída."""
+    return dimensao.filter(dimensao["Agregado"])["LOCATION"].to_pylist()
+
+
+def dimensao_para(dimensao, locations):
+    """Dimensão restrita a `locations`, incluindo os que não estão nos CSVs (nome = código)."""
+    presentes = pa.table({"LOCATION": pa.array(sorted(set(locations)), pa.string())})
+    return _completar(presentes.join(dimensao, "LOCATION", join_type="left outer")) \
+        .sort_by("LOCATION") \
+        .cast(dimensao.schema)
+
+
+def salvar_dimensao(dimensao, path_dimensao=PATH_DIMENSAO):
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(path_dimensao) or ".", exist_ok=True)
+    pq.write_table(dimensao, path_dimensao)
@@ -0,0 +1,130 @@
+"""Leitura em blocos de CSVs brutos arbitrariamente grandes (engine "streaming" do ETL).
+
+O pivot precisa ver juntas todas as linhas de um mesmo (LOCATION, SUBJECT,
+TIME), que podem estar espalhadas pelo arquivo e por vários arquivos. Em vez
+de carregar tudo, a leitura é feita em duas passadas:
+
+1. os CSVs (comprimidos ou não) são lidos em blocos de `tamanho_bloco` bytes e
+   cada linha vai para um "balde" em disco (Arrow IPC), escolhido pelo
+   LOCATION. Assim cada país fica inteiro em um único balde;
+2. os baldes são lidos um de cada vez, e cada um cabe na memória.
+
+A memória usada depende do bloco de leitura e do tamanho de um balde, não do
+tamanho total da entrada.
+"""
+import math
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv
+
+COLUNA_ORIGEM = "_ORIGEM"
+TAMANHO_BLOCO_LEITURA = 16 * 2**20
+# Volume de CSV (descomprimido) por balde; um balde pivotado cabe folgadamente na memória.
+BYTES_POR_BALDE = 256 * 2**20
+# Estimativa conservadora da taxa de compressão de CSVs numéricos.
+FATOR_COMPRESSAO = {".gz": 8, ".zst": 8, ".bz2": 8}
+
+
+def estimar_baldes(caminhos, bytes_por_balde=BYTES_POR_BALDE):
+    """Número de baldes para que cada um tenha ~`bytes_por_balde` de CSV descomprimido."""
+    total = sum(os.path.getsize(caminho) * FATOR_COMPRESSAO.get(os.path.splitext(caminho)[1], 1)
+                for caminho in caminhos)
+    return max(1, math.ceil(total / bytes_por_balde))
+
+
+def abrir_csv(caminho, schema, tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+    """Leitor em lotes com os tipos de `schema`; .gz/.zst/.bz2 são descomprimidos pela extensão."""
+    return csv.open_csv(
+        caminho,
+        read_options=csv.ReadOptions(block_size=tamanho_bloco),
+        convert_options=csv.ConvertOptions(column_types=schema, include_columns=schema.names)
+    )
+
+
+def distribuir_em_baldes(caminhos, schema, dir_baldes, n_baldes, excluir_locations=(),
+                         tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+    """Primeira passada: lê os CSVs em lotes e grava cada linha no balde do seu LOCATION.
+
+    As linhas ganham a coluna _ORIGEM com a posição do arquivo em `caminhos`,
+    usada por `manter_ultima_origem`. Os LOCATIONs em `excluir_locations` são
+    descartados já na leitura. Retorna os arquivos dos baldes não vazios e
+    estatísticas da leitura.
+    """
+    excluir = pa.array(list(excluir_locations), pa.string())
+    schema_balde = schema.append(pa.field(COLUNA_ORIGEM, pa.int16()))
+    balde_por_location = {}
+    escritores = {}
+    linhas_lidas = 0
+    linhas_gravadas = 0
+
+    try:
+        for origem, caminho in enumerate(caminhos):
+            with abrir_csv(caminho, schema, tamanho_bloco) as leitor:
+                for lote in leitor:
+                    linhas_lidas += lote.num_rows
+                    if len(excluir):
+                        lote = lote.filter(pc.invert(pc.is_in(lote["LOCATION"], value_set=excluir)))
+                    if lote.num_rows == 0:
+                        continue
+                    lote = pa.RecordBatch.from_arrays(
+                        lote.columns + [pa.array(np.full(lote.num_rows, origem, dtype="int16"))],
+                        schema=schema_balde
+                    )
+
+                    for location in pc.unique(lote["LOCATION"]).to_pylist():
+                        balde_por_location.setdefault(location, len(balde_por_location) % n_baldes)
+                    baldes = pc.take(
+                        pa.array(list(balde_por_location.values()), pa.int32()),
+                        pc.index_in(lote["LOCATION"], value_set=pa.array(list(balde_por_location), pa.string()))
+                    )
+
+                    for balde in pc.unique(baldes).to_pylist():
+                        if balde not in escritores:
+                            escritores[balde] = pa.ipc.new_file(
+                                os.path.join(dir_baldes, f"balde_{balde:05d}.arrow"), schema_balde)
+                        parte = lote.filter(pc.equal(baldes, balde))
+                        escritores[balde].write_batch(parte)
+                        linhas_gravadas += parte.num_rows
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+
+    arquivos = [os.path.join(dir_baldes, f"balde_{balde:05d}.arrow") for balde in sorted(escritores)]
+    return arquivos, {
+        "arquivos": len(caminhos),
+        "baldes": len(arquivos),
+        "linhas_lidas": linhas_lidas,
+        "linhas_gravadas": linhas_gravadas,
+        "locations": len(balde_por_location),
+    }
+
+
+def ler_baldes(arquivos):
+    """Segunda passada: uma tabela por balde."""
+    for arquivo in arquivos:
+        with pa.OSFile(arquivo) as origem:
+            tabela = pa.ipc.open_file(origem).read_all()
+        yield tabela
+
+
+def manter_ultima_origem(tabela, chaves):
+    """Para cada chave, mantém só as linhas do último arquivo em que ela aparece.
+
+    Com várias edições da OCDE na entrada, a mais recente (a última da lista)
+    substitui os valores das anteriores em vez de somar com eles. Linhas
+    repetidas dentro de um mesmo arquivo continuam somadas pelo pivot, como
+    nas demais engines.
+    """
+    extremos = pc.min_max(tabela[COLUNA_ORIGEM])
+    if extremos["min"].as_py() == extremos["max"].as_py():
+        return tabela.drop_columns([COLUNA_ORIGEM])
+
+    maximos = tabela.group_by(chaves, use_threads=False) \
+        .aggregate([(COLUNA_ORIGEM, "max")]) \
+        .rename_columns(chaves + ["_ORIGEM_MAX"])
+    tabela = tabela.join(maximos, chaves)
+    return tabela.filter(pc.equal(tabela[COLUNA_ORIGEM], tabela["_ORIGEM_MAX"])) \
+        .drop_columns([COLUNA_ORIGEM, "_ORIGEM_MAX"])
@@ -1,57 +1,373 @@
+import argparse
+import hashlib
+import time
+from datetime import datetime, timezone
+import bson
+import numpy as np
 import pandas as pd
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne
+import os
 import sys
 
-def carregar_dados_mongo():
-    path_parquet = "data_processed/consumo_processado.parquet"
-    connection_string = "mongodb+srv://user:<password>6@cluster0.v3meszt.mongodb.net/?appName=Cluster0"
-    db_name = "consumo_carne"
-    collection_name = "dados_processados"
+import carga_assincrona
+from cubo import PATH_CUBO
+from dimensao_paises import PATH_DIMENSAO
+from instrumentacao import configurar, etapa, registrar
+from manifesto import hash_objeto, limpar_locations_pendentes, locations_pendentes
 
-    try:
-        print(f"Lendo dados do Parquet em {path_parquet}...")
-        df = pd.read_parquet(path_parquet)
-    except Exception as e:
-        print(f"Erro ao ler o arquivo Parquet: {e}")
-        print("Certifique-se de que executou 'python scripts_etl/data_process.py' primeiro.")
-        sys.exit(1)
+PATH_PARQUET = "data_processed/consumo_processado.parquet"
+MODOS_CARGA = ["upsert", "recriar", "backfill"]
+INDICES_DADOS = ["registros_consumo.ano", "registros_consumo.carnes.tipo"]
+# Layout alternativo: um documento por (país, carne, década), com tamanho limitado.
+LAYOUTS = ["aninhado", "buckets"]
+COLECOES_LAYOUT = {"aninhado": "dados_processados", "buckets": "consumo_buckets"}
+ANOS_POR_BUCKET = 10
+INDICES_BUCKETS = [[("tipo", 1), ("registros.ano", 1), ("_id", 1)], "pais_codigo"]
+INDICES_LAYOUT = {"aninhado": INDICES_DADOS, "buckets": INDICES_BUCKETS}
+TAMANHO_LOTE_PADRAO = 500
+# _ids por delete_many: um $in/$nin com todos os _ids de uma coleção grande passa do limite de 16 MiB do BSON.
+LOTE_REMOCAO = 10000
+INDICES_CUBO = ["LOCATION", "TIME"]
+PAISES_POR_LEITURA = 200
+CONNECTION_STRING = "mongodb+srv://user:<password>6@cluster0.v3meszt.mongodb.net/?appName=Cluster0"
 
-    print("Iniciando transformação para o schema aninhado (Pandas)...")
-    
-    df = df.rename(columns={
-        "SUBJECT": "tipo",
-        "KG_CAP": "consumo_per_capita_kg",
-        "THND_TONNE": "consumo_total_thnd_tonne",
-        "TIME": "ano",
-        "Pais_Nome": "pais"
-    })
-    
-    documentos_mongo = []
-
-    for location, group_pais in df.groupby("LOCATION"):
-        
-        registros_consumo = []
-        
-        for ano, group_ano in group_pais.groupby("ano"):
-            carnes = group_ano[[
-                "tipo", 
-                "consumo_per_capita_kg", 
-                "consumo_total_thnd_tonne"
-            ]].to_dict('records')
-            
-            registros_consumo.append({
-                "ano": int(ano), 
-                "carnes": carnes
-            })
-            
-        documento = {
-            "_id": location,
-            "pais": group_pais.iloc[0]['pais'], 
+def _valores_ou_nulo(serie):
+    """Lista de valores com NaN trocado por None, gravado como null no MongoDB (filtrável com $ifNull)."""
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+def gerar_documentos(df):
+    """Gera um documento aninhado por país a partir do Parquet plano.
+
+    Faz uma única ordenação e localiza as fronteiras de país e de ano com
+    operações vetorizadas; os documentos são entregues um a um (gerador), sem
+    montar a lista inteira em memória.
+    """
+    if df.empty:
+        return
+
+    df = df.sort_values(["LOCATION", "TIME", "SUBJECT"], kind="stable")
+    locations = df["LOCATION"].to_numpy()
+    anos = df["TIME"].to_numpy()
+
+    muda_pais = np.r_[True, locations[1:] != locations[:-1]]
+    muda_ano = muda_pais | np.r_[True, anos[1:] != anos[:-1]]
+    inicios_pais = np.flatnonzero(muda_pais)
+    inicios_ano = np.flatnonzero(muda_ano)
+    fins_ano = np.r_[inicios_ano[1:], len(df)]
+    # Para cada país, o intervalo [primeiro, último) de índices em inicios_ano.
+    limites_pais = np.searchsorted(inicios_ano, np.r_[inicios_pais, len(df)])
+
+    tipos = df["SUBJECT"].tolist()
+    per_capita = _valores_ou_nulo(df["KG_CAP"])
+    total = _valores_ou_nulo(df["THND_TONNE"])
+    paises = df["Pais_Nome"].to_numpy()
+    anos_inicio = anos[inicios_ano].tolist()
+    inicios_ano = inicios_ano.tolist()
+    fins_ano = fins_ano.tolist()
+
+    for i, inicio_pais in enumerate(inicios_pais.tolist()):
+        registros_consumo = [
+            {
+                "ano": anos_inicio[j],
+                "carnes": [
+                    {
+                        "tipo": tipos[k],
+                        "consumo_per_capita_kg": per_capita[k],
+                        "consumo_total_thnd_tonne": total[k]
+                    }
+                    for k in range(inicios_ano[j], fins_ano[j])
+                ]
+            }
+            for j in range(limites_pais[i], limites_pais[i + 1])
+        ]
+        yield {
+            "_id": locations[inicio_pais],
+            "pais": paises[inicio_pais],
             "registros_consumo": registros_consumo
         }
-        documentos_mongo.append(documento)
 
-    print(f"Transformação concluída. {len(documentos_mongo)} documentos de países prontos.")
+def gerar_documentos_buckets(df, anos_por_bucket=ANOS_POR_BUCKET):
+    """Gera um documento por (país, carne, década) a partir do Parquet plano.
+
+    Cada documento tem no máximo `anos_por_bucket` anos, então não cresce com a
+    série, e uma consulta de uma carne em poucos anos lê só os buckets dela
+    nesse período (índice (tipo, registros.ano, _id)).
+    """
+    if df.empty:
+        return
+
+    df = df.assign(decada=df["TIME"] // anos_por_bucket * anos_por_bucket) \
+        .sort_values(["LOCATION", "SUBJECT", "TIME"], kind="stable")
+    locations = df["LOCATION"].to_numpy()
+    tipos = df["SUBJECT"].to_numpy()
+    decadas = df["decada"].to_numpy()
+
+    muda_bucket = np.r_[True, (locations[1:] != locations[:-1]) | (tipos[1:] != tipos[:-1])
+                        | (decadas[1:] != decadas[:-1])]
+    inicios = np.flatnonzero(muda_bucket).tolist()
+    fins = inicios[1:] + [len(df)]
+
+    anos = df["TIME"].tolist()
+    per_capita = _valores_ou_nulo(df["KG_CAP"])
+    total = _valores_ou_nulo(df["THND_TONNE"])
+    paises = df["Pais_Nome"].to_numpy()
+
+    for inicio, fim in zip(inicios, fins):
+        yield {
+            "_id": f"{locations[inicio]}|{tipos[inicio]}|{decadas[inicio]}",
+            "pais_codigo": locations[inicio],
+            "pais": paises[inicio],
+            "tipo": tipos[inicio],
+            "decada": int(decadas[inicio]),
+            "registros": [
+                {
+                    "ano": anos[k],
+                    "consumo_per_capita_kg": per_capita[k],
+                    "consumo_total_thnd_tonne": total[k]
+                }
+                for k in range(inicio, fim)
+            ]
+        }
+
+GERADORES_LAYOUT = {"aninhado": gerar_documentos, "buckets": gerar_documentos_buckets}
+
+def gerar_documentos_parquet(path_parquet, locations, paises_por_leitura=PAISES_POR_LEITURA, layout="aninhado"):
+    """Lê o Parquet em blocos de países e gera os documentos de cada bloco.
+
+    A memória usada depende do tamanho do bloco, não do número total de países.
+    """
+    gerar = GERADORES_LAYOUT[layout]
+    for i in range(0, len(locations), paises_por_leitura):
+        bloco = locations[i:i + paises_por_leitura]
+        df = pd.read_parquet(path_parquet, filters=[("LOCATION", "in", bloco)])
+        yield from gerar(df)
+
+def gravar_documentos_bson(documentos, path_saida):
+    """Grava os documentos, um após o outro, em um arquivo BSON e retorna os `_id`s.
+
+    Permite montar os documentos uma vez e reenviá-los (ex.: numa nova tentativa
+    da carga) sem reler o Parquet.
+    """
+    ids = []
+    with open(path_saida, "wb") as arquivo:
+        for documento in documentos:
+            arquivo.write(bson.encode(documento))
+            ids.append(documento["_id"])
+    return ids
+
+def ler_documentos_bson(path_documentos):
+    with open(path_documentos, "rb") as arquivo:
+        yield from bson.decode_file_iter(arquivo)
+
+def em_lotes(documentos, tamanho_lote):
+    lote = []
+    for documento in documentos:
+        lote.append(documento)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def hash_documento(documento):
+    """Hash do conteúdo BSON do documento (sem o próprio campo de hash)."""
+    conteudo = {chave: valor for chave, valor in documento.items() if chave != "hash_documento"}
+    return hashlib.sha256(bson.encode(conteudo)).hexdigest()
+
+def upsert_documentos(collection, documentos, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """Substitui (ou cria) os documentos por `_id` em lotes `bulk_write` não ordenados.
+
+    Aceita qualquer iterável (inclusive geradores): os documentos são
+    processados lote a lote. Documentos cujo hash é igual ao já gravado no
+    MongoDB não são enviados, então uma recarga sem mudanças não reescreve
+    nada. Retorna estatísticas da carga e os `_id` processados.
+
+    O tempo gasto no MongoDB (consulta de hashes + bulk_write) é registrado
+    como "mongo.escrita"; o restante (leitura do Parquet, montagem e hash dos
+    documentos) como "mongo.montar_documentos".
+    """
+    inicio = time.perf_counter()
+    segundos_mongo = 0.0
+    ids = []
+    enviados = 0
+    bytes_enviados = 0
+
+    for lote in em_lotes(documentos, tamanho_lote):
+        for documento in lote:
+            documento["hash_documento"] = hash_documento(documento)
+        ids_lote = [documento["_id"] for documento in lote]
+        ids.extend(ids_lote)
+
+        inicio_mongo = time.perf_counter()
+        hashes_atuais = {
+            doc["_id"]: doc.get("hash_documento")
+            for doc in collection.find({"_id": {"$in": ids_lote}}, {"hash_documento": 1})
+        }
+        segundos_mongo += time.perf_counter() - inicio_mongo
+        alterados = [d for d in lote if hashes_atuais.get(d["_id"]) != d["hash_documento"]]
+        if not alterados:
+            continue
+
+        bytes_enviados += sum(len(bson.encode(documento)) for documento in alterados)
+        operacoes = [ReplaceOne({"_id": documento["_id"]}, documento, upsert=True) for documento in alterados]
+        inicio_mongo = time.perf_counter()
+        collection.bulk_write(operacoes, ordered=False)
+        segundos_mongo += time.perf_counter() - inicio_mongo
+        enviados += len(alterados)
+
+    duracao = time.perf_counter() - inicio
+    registrar("mongo.montar_documentos", duracao - segundos_mongo, colecao=collection.name, linhas_saida=len(ids))
+    registrar("mongo.escrita", segundos_mongo, colecao=collection.name, linhas_entrada=len(ids),
+              linhas_saida=enviados, bytes_escritos=bytes_enviados)
+    return {
+        "ids": ids,
+        "documentos": len(ids),
+        "enviados": enviados,
+        "ignorados": len(ids) - enviados,
+        "bytes_enviados": bytes_enviados,
+        "segundos": duracao,
+        "docs_por_segundo": enviados / duracao if duracao > 0 else 0.0,
+    }
+
+def remover_ausentes(collection, ids_mantidos, filtro=None, tamanho_lote=LOTE_REMOCAO):
+    """Remove os documentos de `filtro` cujo _id não está em `ids_mantidos`. Retorna quantos foram removidos.
+
+    A diferença é calculada aqui, contra os _ids já gravados, e removida em
+    lotes de `$in`, em vez de mandar um `$nin` com todos os _ids carregados.
+    """
+    mantidos = set(ids_mantidos)
+    ausentes = [doc["_id"] for doc in collection.find(filtro or {}, {"_id": 1}) if doc["_id"] not in mantidos]
+    removidos = 0
+    for lote in em_lotes(ausentes, tamanho_lote):
+        removidos += collection.delete_many({"_id": {"$in": lote}}).deleted_count
+    return removidos
+
+def gerar_documentos_cubo(path_cubo=PATH_CUBO, locations=None):
+    """Um documento plano por linha do cubo (país, carne, ano) gerado pelo ETL (só de `locations`, se informado)."""
+    filtros = None if locations is None else [("LOCATION", "in", list(locations))]
+    cubo = pd.read_parquet(path_cubo, filters=filtros)
+    for medida in ["KG_CAP", "THND_TONNE"]:
+        cubo[medida] = cubo[medida].astype(object).where(cubo[medida].notna(), None)
+    for registro in cubo.to_dict("records"):
+        registro["_id"] = f"{registro['LOCATION']}|{registro['SUBJECT']}|{registro['TIME']}"
+        yield registro
+
+def _faixa_anos_cubo_mongo(collection):
+    primeiro = collection.find_one({}, {"TIME": 1}, sort=[("TIME", 1)])
+    ultimo = collection.find_one({}, {"TIME": 1}, sort=[("TIME", -1)])
+    return None if primeiro is None else (int(primeiro["TIME"]), int(ultimo["TIME"]))
+
+def _faixa_anos_cubo_parquet(path_cubo):
+    anos = pd.read_parquet(path_cubo, columns=["TIME"])["TIME"]
+    return None if anos.empty else (int(anos.min()), int(anos.max()))
+
+def carregar_cubo_mongo(db, collection_name="cubo_consumo", tamanho_lote=TAMANHO_LOTE_PADRAO, locations=None,
+                        path_cubo=PATH_CUBO):
+    """Sincroniza a coleção do cubo com o Parquet do ETL (upsert com verificação de hash).
+
+    Com `locations`, só as linhas desses países são lidas, enviadas e removidas.
+    Cada país tem uma linha por ano da faixa global do cubo, então, se a faixa
+    mudou, todos os países são sincronizados.
+    """
+    collection = db[collection_name]
+    garantir_indices(collection, INDICES_CUBO)
+    if locations is not None and _faixa_anos_cubo_mongo(collection) != _faixa_anos_cubo_parquet(path_cubo):
+        print("A faixa de anos do cubo mudou: sincronizando o cubo de todos os países.")
+        locations = None
+    filtro = None if locations is None else {"LOCATION": {"$in": list(locations)}}
+    estatisticas = upsert_documentos(collection, gerar_documentos_cubo(path_cubo, locations), tamanho_lote=tamanho_lote)
+    remover_ausentes(collection, estatisticas["ids"], filtro)
+    return estatisticas
+
+def gerar_documentos_dimensao(path_dimensao=PATH_DIMENSAO):
+    """Um documento por país da dimensão gravada pelo ETL: {_id: LOCATION, pais, latitude, longitude...}."""
+    dimensao = pd.read_parquet(path_dimensao).rename(columns={"LOCATION": "_id", "Pais_Nome": "pais"})
+    dimensao = dimensao.astype(object).where(dimensao.notna(), None)
+    yield from dimensao.to_dict("records")
+
+def carregar_dimensao_mongo(db, collection_name="dim_paises", tamanho_lote=TAMANHO_LOTE_PADRAO,
+                            path_dimensao=PATH_DIMENSAO):
+    """Sincroniza a coleção da dimensão de países com o Parquet do ETL."""
+    collection = db[collection_name]
+    estatisticas = upsert_documentos(collection, gerar_documentos_dimensao(path_dimensao), tamanho_lote=tamanho_lote)
+    remover_ausentes(collection, estatisticas["ids"])
+    return estatisticas
+
+def registrar_versao_dataset(db, collection_names, layout="aninhado"):
+    """Grava em 'metadados' uma versão derivada dos hashes dos documentos carregados.
+
+    O dashboard usa essa versão como chave do cache em disco: ela só muda quando
+    algum documento muda de fato. O `layout` diz ao dashboard qual coleção ler.
+    """
+    hashes = []
+    for collection_name in collection_names:
+        hashes.extend(
+            [collection_name, doc["_id"], doc.get("hash_documento")]
+            for doc in db[collection_name].find({}, {"hash_documento": 1}).sort("_id", 1)
+        )
+    versao = hash_objeto(hashes)[:16]
+    db["metadados"].replace_one(
+        {"_id": "versao_dataset"},
+        {"_id": "versao_dataset", "versao": versao, "layout": layout, "atualizado_em": datetime.now(timezone.utc)},
+        upsert=True
+    )
+    return versao
+
+def layout_registrado(db):
+    """Layout da última carga registrada em 'metadados' (None se o banco nunca foi carregado)."""
+    metadados = db["metadados"].find_one({"_id": "versao_dataset"}, {"layout": 1})
+    # Cargas anteriores ao layout em buckets não gravavam o campo.
+    return None if metadados is None else metadados.get("layout", "aninhado")
+
+def garantir_indices(collection, indices=INDICES_DADOS):
+    """Índices usados pelos pipelines de agregação do dashboard (create_index é idempotente)."""
+    for campo in indices:
+        collection.create_index(campo)
+
+def com_hash(documentos):
+    """Acrescenta o `hash_documento` que o modo upsert compara nas cargas seguintes."""
+    for documento in documentos:
+        documento["hash_documento"] = hash_documento(documento)
+        yield documento
+
+def carregar_dados_mongo(locations=None, modo="upsert", tamanho_lote=TAMANHO_LOTE_PADRAO, path_documentos=None,
+                         connection_string=CONNECTION_STRING, janela=carga_assincrona.JANELA_PADRAO,
+                         bytes_lote=carga_assincrona.BYTES_LOTE_PADRAO, layout="aninhado"):
+    """Carrega o Parquet processado no MongoDB.
+
+    Com `locations=None` todos os países são carregados; com uma lista de
+    LOCATIONs apenas os documentos desses países são atualizados (ou removidos,
+    se o país deixou de existir no Parquet). Com `path_documentos`, os
+    documentos vêm do arquivo de `gravar_documentos_bson` (já montados para
+    esses países) em vez do Parquet.
+
+    No modo "upsert" (padrão) a coleção nunca fica vazia: os documentos são
+    substituídos por `_id` e só os que mudaram são enviados. O modo "recriar"
+    mantém a carga antiga (delete_many + insert_many). O modo "backfill" recria
+    a coleção inteira com a carga assíncrona (`carga_assincrona`): lotes de até
+    `bytes_lote` bytes, `janela` lotes em voo e índices criados só no final.
+
+    `layout="buckets"` grava na coleção 'consumo_buckets' um documento por
+    (país, carne, década) em vez de um por país; o dashboard lê os dois. Uma
+    carga só de `locations` num layout diferente do da última carga vira uma
+    carga completa: a coleção desse layout pode estar vazia ou defasada, e o
+    dashboard passa a lê-la.
+    """
+    if modo not in MODOS_CARGA:
+        raise ValueError(f"Modo de carga desconhecido: '{modo}'. Opções: {', '.join(MODOS_CARGA)}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Layout desconhecido: '{layout}'. Opções: {', '.join(LAYOUTS)}")
+    if modo == "backfill" and locations is not None:
+        raise ValueError("O modo 'backfill' recarrega a coleção inteira; não combina com uma lista de países.")
+    if path_documentos is not None and layout != "aninhado":
+        raise ValueError("Os documentos de `path_documentos` estão no layout aninhado.")
+
+    path_parquet = PATH_PARQUET
+    db_name = "consumo_carne"
+    collection_name = COLECOES_LAYOUT[layout]
+    indices = INDICES_LAYOUT[layout]
+    # Campo com o código do país: no layout aninhado é o próprio _id.
+    campo_pais = "_id" if layout == "aninhado" else "pais_codigo"
 
     try:
         print(f"Conectando ao MongoDB Atlas (Modo Simples)...")
@@ -63,12 +379,87 @@ def carregar_dados_mongo():
         print("Enviando 'ping' para o servidor...")
         db.command('ping')
         print("Conexão bem-sucedida.")
+
+        if locations is not None and layout_registrado(db) != layout:
+            print(f"A última carga não foi no layout {layout}: executando carga completa em vez da incremental...")
+            locations = None
+            # Os documentos já montados são só dos países pendentes.
+            path_documentos = None
+
+        if path_documentos is not None:
+            print(f"Lendo documentos já montados de {path_documentos}...")
+            locations_parquet = [documento["_id"] for documento in ler_documentos_bson(path_documentos)]
+            documentos_mongo = ler_documentos_bson(path_documentos)
+        else:
+            try:
+                print(f"Lendo países disponíveis no Parquet em {path_parquet}...")
+                locations_parquet = sorted(pd.read_parquet(path_parquet, columns=["LOCATION"])["LOCATION"].unique())
+            except Exception as e:
+                print(f"Erro ao ler o arquivo Parquet: {e}")
+                print("Certifique-se de que executou 'python scripts_etl/data_process.py' primeiro.")
+                sys.exit(1)
+
+            if locations is not None:
+                selecionadas = set(locations)
+                locations_parquet = [location for location in locations_parquet if location in selecionadas]
+
+            print(f"{len(locations_parquet)} países serão transformados para o layout {layout} (em blocos de {PAISES_POR_LEITURA})...")
+            documentos_mongo = gerar_documentos_parquet(path_parquet, locations_parquet, layout=layout)
+        
+        if modo == "backfill":
+            print(f"Backfill dos documentos de {len(locations_parquet)} países ({janela} lotes em voo, "
+                  f"até {bytes_lote / 2**20:.0f} MiB por lote)...")
+            with etapa("mongo.backfill", colecao=collection_name, linhas_entrada=len(locations_parquet)) as registro:
+                estatisticas = carga_assincrona.backfill(
+                    connection_string, db_name, collection_name, com_hash(documentos_mongo),
+                    indices=indices, janela=janela, bytes_lote=bytes_lote)
+                registro.update(linhas_saida=estatisticas["documentos"], bytes_escritos=estatisticas["bytes_enviados"])
+            print(f"{estatisticas['documentos']} documentos em {estatisticas['lotes']} lotes, "
+                  f"{estatisticas['bytes_enviados'] / 2**20:.1f} MiB em {estatisticas['segundos']:.2f}s "
+                  f"({estatisticas['docs_por_segundo']:.0f} docs/s, {estatisticas['mb_por_segundo']:.1f} MiB/s); "
+                  f"índices em {estatisticas['segundos_indices']:.2f}s.")
+        else:
+            garantir_indices(collection, indices)
+        
+        if modo == "recriar":
+            if locations is None:
+                print(f"Limpando a coleção '{collection_name}'...")
+                collection.delete_many({}) 
+            else:
+                print(f"Removendo {len(locations)} documentos alterados da coleção '{collection_name}'...")
+                collection.delete_many({campo_pais: {"$in": list(locations)}})
+            
+            print(f"Inserindo os documentos de {len(locations_parquet)} países...")
+            with etapa("mongo.recriar", colecao=collection_name, linhas_entrada=len(locations_parquet)):
+                for lote in em_lotes(com_hash(documentos_mongo), tamanho_lote):
+                    collection.insert_many(lote)
+        elif modo == "upsert":
+            print(f"Atualizando os documentos de {len(locations_parquet)} países (lotes de {tamanho_lote})...")
+            estatisticas = upsert_documentos(collection, documentos_mongo, tamanho_lote=tamanho_lote)
+            ids_carregados = estatisticas["ids"]
+            print(f"{estatisticas['enviados']} documentos enviados, {estatisticas['ignorados']} inalterados, "
+                  f"{estatisticas['bytes_enviados'] / 1024:.1f} KiB em {estatisticas['segundos']:.2f}s "
+                  f"({estatisticas['docs_por_segundo']:.0f} docs/s).")
+            
+            filtro_remocao = None if locations is None else {campo_pais: {"$in": list(locations)}}
+            removidos = remover_ausentes(collection, ids_carregados, filtro_remocao)
+            if removidos:
+                print(f"{removidos} documentos que não existem mais no Parquet foram removidos.")
         
-        print(f"Limpando a coleção '{collection_name}'...")
-        collection.delete_many({}) 
+        if os.path.exists(PATH_CUBO):
+            print("Sincronizando a coleção 'cubo_consumo'...")
+            estatisticas_cubo = carregar_cubo_mongo(db, tamanho_lote=tamanho_lote, locations=locations,
+                                                    path_cubo=PATH_CUBO)
+            print(f"{estatisticas_cubo['enviados']} linhas do cubo enviadas, {estatisticas_cubo['ignorados']} inalteradas.")
         
-        print(f"Inserindo {len(documentos_mongo)} novos documentos...")
-        collection.insert_many(documentos_mongo)
+        if os.path.exists(PATH_DIMENSAO):
+            print("Sincronizando a coleção 'dim_paises'...")
+            estatisticas_dimensao = carregar_dimensao_mongo(db, tamanho_lote=tamanho_lote, path_dimensao=PATH_DIMENSAO)
+            print(f"{estatisticas_dimensao['enviados']} países da dimensão enviados, "
+                  f"{estatisticas_dimensao['ignorados']} inalterados.")
+        
+        versao = registrar_versao_dataset(db, [collection_name, "cubo_consumo", "dim_paises"], layout=layout)
+        print(f"Versão do dataset: {versao}")
         
         print("Carga no MongoDB concluída com sucesso!")
         client.close()
@@ -79,4 +470,45 @@ def carregar_dados_mongo():
         sys.exit(1)
 
 if __name__ == "__main__":
-    carregar_dados_mongo()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Carga do Parquet processado no MongoDB.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Envia apenas os países alterados desde a última carga (segundo o manifesto do ETL).")
+    parser.add_argument("--modo", choices=MODOS_CARGA, default="upsert",
+                        help="upsert: substitui por _id só o que mudou (padrão); recriar: delete_many + insert_many; "
+                             "backfill: recria a coleção com carga assíncrona concorrente (requer motor).")
+    parser.add_argument("--layout", choices=LAYOUTS, default="aninhado",
+                        help="aninhado: um documento por país (padrão); buckets: um por (país, carne, década), "
+                             "na coleção 'consumo_buckets'.")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_PADRAO,
+                        help=f"Documentos por bulk_write no modo upsert (padrão: {TAMANHO_LOTE_PADRAO}).")
+    parser.add_argument("--janela", type=int, default=carga_assincrona.JANELA_PADRAO,
+                        help=f"Modo backfill: lotes enviados ao mesmo tempo (padrão: {carga_assincrona.JANELA_PADRAO}).")
+    parser.add_argument("--bytes-lote", type=int, default=carga_assincrona.BYTES_LOTE_PADRAO,
+                        help="Modo backfill: tamanho máximo de cada lote em bytes (padrão: 8 MiB).")
+    parser.add_argument("--metricas", metavar="ARQUIVO",
+                        help="Grava as métricas de cada etapa neste arquivo (JSON Lines).")
+    parser.add_argument("--perfil", metavar="DIR",
+                        help="Perfila a execução com cProfile e grava o .prof neste diretório.")
+    args = parser.parse_args()
+    if args.incremental and args.modo == "backfill":
+        parser.error("--modo backfill recarrega a coleção inteira; não use com --incremental.")
+    opcoes_carga = {"modo": args.modo, "tamanho_lote": args.tamanho_lote, "janela": args.janela,
+                    "bytes_lote": args.bytes_lote, "layout": args.layout}
+    configurar(arquivo=args.metricas, perfil=args.perfil)
+
+    with etapa("mongo", modo=args.modo):
+        if args.incremental:
+            pendentes = locations_pendentes(PATH_PARQUET)
+            if pendentes is None:
+                print("Manifesto do ETL não encontrado. Executando carga completa...")
+                carregar_dados_mongo(**opcoes_carga)
+            elif not pendentes:
+                print("Nenhum país alterado desde a última carga. Nada a enviar.")
+            else:
+                carregar_dados_mongo(locations=pendentes, **opcoes_carga)
+                limpar_locations_pendentes(PATH_PARQUET, pendentes)
+        else:
+            carregar_dados_mongo(**opcoes_carga)
+            pendentes = locations_pendentes(PATH_PARQUET)
+            if pendentes:
+                limpar_locations_pendentes(PATH_PARQUET, pendentes)
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+NOME_MANIFESTO = "_manifesto.json"
+VERSAO_LAYOUT = 3
+
+
+def path_manifesto(path_data_processed):
+    # O prefixo "_" faz o pyarrow/pandas ignorar o arquivo ao ler o diretório Parquet.
+    return os.path.join(path_data_processed, NOME_MANIFESTO)
+
+
+def hash_arquivo(path, tamanho_bloco=1 << 20):
+    sha = hashlib.sha256()
+    with open(path, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def hash_objeto(objeto):
+    """Hash estável de qualquer objeto serializável em JSON (ex.: mapeamentos de configuração)."""
+    conteudo = json.dumps(objeto, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def fingerprint_particao(df_particao):
+    """Fingerprint do conteúdo de uma partição (LOCATION, SUBJECT) já pivotada."""
+    import pandas as pd
+
+    df_ordenado = df_particao.sort_values("TIME").reset_index(drop=True)
+    hashes_linhas = pd.util.hash_pandas_object(df_ordenado, index=False)
+    return hashlib.sha256(hashes_linhas.to_numpy().tobytes()).hexdigest()
+
+
+def chave_particao(location, subject):
+    return f"{subject}/{location}"
+
+
+def carregar_manifesto(path_data_processed):
+    path = path_manifesto(path_data_processed)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as arquivo:
+        manifesto = json.load(arquivo)
+    if manifesto.get("versao_layout") != VERSAO_LAYOUT:
+        return None
+    return manifesto
+
+
+def salvar_manifesto(path_data_processed, manifesto):
+    manifesto["versao_layout"] = VERSAO_LAYOUT
+    manifesto["atualizado_em"] = datetime.now(timezone.utc).isoformat()
+    path = path_manifesto(path_data_processed)
+    path_temp = path + ".tmp"
+    with open(path_temp, "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(path_temp, path)
+
+
+def locations_pendentes(path_data_processed):
+    """LOCATIONs alteradas pelo ETL que ainda não foram enviadas ao MongoDB.
+
+    Retorna None quando não há manifesto (carga completa necessária).
+    """
+    manifesto = carregar_manifesto(path_data_processed)
+    if manifesto is None:
+        return None
+    return sorted(manifesto.get("locations_pendentes", []))
+
+
+def limpar_locations_pendentes(path_data_processed, locations_carregadas):
+    manifesto = carregar_manifesto(path_data_processed)
+    if manifesto is None:
+        return
+    restantes = set(manifesto.get("locations_pendentes", [])) - set(locations_carregadas)
+    manifesto["locations_pendentes"] = sorted(restantes)
+    salvar_manifesto(path_data_processed, manifesto)
@@ -0,0 +1,414 @@
+"""Orquestrador local do pipeline: ETL, carga no MongoDB e aquecimento do cache como um DAG de tarefas.
+
+Tarefas (e suas dependências):
+
+    ingestao:<arquivo>   uma por CSV de entrada: lê e grava as linhas tipadas em Arrow IPC
+    dimensao             dimensão de países (data_raw/country_names.csv + atributos)
+    pivot                (ingestao:*, dimensao) pivot, partições, dimensão de saída e manifesto
+    cubo                 (pivot) cubo pré-agregado
+    documentos           (pivot) documentos aninhados dos países pendentes, em BSON
+    carga_mongo          (cubo, documentos) upsert no MongoDB
+    aquecimento_cache    (carga_mongo) cache em disco da tela inicial do dashboard
+
+Tarefas independentes (as ingestões entre si e com a dimensão; o cubo com os
+documentos) rodam ao mesmo tempo: as de CPU num pool de processos, as de rede
+num pool de threads. Cada tarefa tem até `--tentativas` tentativas, com espera
+exponencial entre elas. O estado de cada tarefa vai para
+`data_processed/_pipeline_estado.json`; com `--retomar`, as que terminaram bem
+na execução anterior (com os mesmos parâmetros e as mesmas dependências) são
+puladas e as demais rodam de novo. `--dry-run` mostra o plano sem executar.
+
+Uso (a partir da raiz do repositório):
+
+    python scripts_etl/orquestrador.py --dry-run
+    python scripts_etl/orquestrador.py --mongo-uri "mongodb+srv://..."
+    python scripts_etl/orquestrador.py --entrada data_raw/oecd_2023.csv.gz data_raw/oecd_2024.csv.gz --ate cubo
+    python scripts_etl/orquestrador.py --retomar
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from instrumentacao import configuracao, configurar, etapa
+from manifesto import hash_objeto
+
+PATH_ESTADO = "data_processed/_pipeline_estado.json"
+DIR_INTERMEDIARIOS = "data_processed/_pipeline"
+ETAPAS = ["pivot", "cubo", "documentos", "carga_mongo", "aquecimento_cache"]
+TENTATIVAS_PADRAO = 3
+ESPERA_PADRAO_SEGUNDOS = 2.0
+
+
+# --- Tarefas --------------------------------------------------------------------
+# Cada uma recebe os resultados das suas dependências ({nome: resultado}) e
+# devolve um dicionário serializável em JSON, guardado no estado da execução.
+
+def _ingestao(resultados, caminho, path_saida, origem):
+    from data_process import ingerir_csv
+
+    return {"arquivo": path_saida, "linhas": ingerir_csv(caminho, path_saida, origem)}
+
+
+def _dimensao(resultados, path_saida):
+    from dimensao_paises import ler_dimensao, salvar_dimensao
+
+    dimensao = ler_dimensao()
+    salvar_dimensao(dimensao, path_saida)
+    return {"arquivo": path_saida, "paises": dimensao.num_rows}
+
+
+def _pivot(resultados, entradas, ingestoes, incremental):
+    from data_process import pivotar_ingeridos
+
+    alteradas = pivotar_ingeridos([resultados[nome]["arquivo"] for nome in ingestoes],
+                                  resultados["dimensao"]["arquivo"], path_data_raw=entradas, incremental=incremental)
+    return {"inalterado": alteradas is None, "locations_alteradas": alteradas or []}
+
+
+def _cubo(resultados):
+    from cubo import PATH_CUBO
+    from data_process import construir_cubo_processado
+
+    if resultados["pivot"]["inalterado"] and os.path.exists(PATH_CUBO):
+        print("Dados inalterados; o cubo atual continua válido.")
+        return {"linhas": None}
+    return {"linhas": construir_cubo_processado()}
+
+
+def _documentos(resultados, path_saida, completo):
+    import pandas as pd
+
+    from load_mongo import PATH_PARQUET, gerar_documentos_parquet, gravar_documentos_bson
+    from manifesto import locations_pendentes
+
+    pendentes = None if completo else locations_pendentes(PATH_PARQUET)
+    if pendentes is None:
+        locations = sorted(pd.read_parquet(PATH_PARQUET, columns=["LOCATION"])["LOCATION"].unique())
+    else:
+        existentes = set(pd.read_parquet(PATH_PARQUET, columns=["LOCATION"])["LOCATION"].unique())
+        locations = [location for location in pendentes if location in existentes]
+
+    ids = gravar_documentos_bson(gerar_documentos_parquet(PATH_PARQUET, locations), path_saida)
+    print(f"{len(ids)} documentos montados em {path_saida}.")
+    return {"arquivo": path_saida, "documentos": len(ids), "pendentes": pendentes}
+
+
+def _carga_mongo(resultados, mongo_uri, modo, tamanho_lote):
+    from load_mongo import PATH_PARQUET, carregar_dados_mongo
+    from manifesto import limpar_locations_pendentes, locations_pendentes
+
+    pendentes = resultados["documentos"]["pendentes"]
+    if pendentes is not None and not pendentes:
+        print("Nenhum país alterado desde a última carga. Nada a enviar.")
+        return {"paises": 0}
+
+    # O backfill recria a coleção inteira: não aceita lista de países (só roda com --completo).
+    carregar_dados_mongo(locations=None if modo == "backfill" else pendentes, modo=modo, tamanho_lote=tamanho_lote,
+                         path_documentos=resultados["documentos"]["arquivo"], connection_string=mongo_uri)
+    carregados = pendentes if pendentes is not None else locations_pendentes(PATH_PARQUET) or []
+    limpar_locations_pendentes(PATH_PARQUET, carregados)
+    return {"paises": resultados["documentos"]["documentos"]}
+
+
+def _aquecimento_cache(resultados, mongo_uri):
+    from pymongo import MongoClient
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dashboard"))
+    from aquecimento_cache import aquecer
+
+    client = MongoClient(mongo_uri)
+    try:
+        return {"chaves": aquecer(client["consumo_carne"])}
+    finally:
+        client.close()
+
+
+def tarefa(nome, funcao, dependencias=(), pool="processo", versao=None, **parametros):
+    """Descrição de uma tarefa do DAG. `versao` entra na assinatura (ex.: tamanho e mtime do arquivo lido)."""
+    return {
+        "nome": nome,
+        "funcao": funcao,
+        "dependencias": list(dependencias),
+        "pool": pool,
+        "parametros": parametros,
+        "versao": versao,
+    }
+
+
+def _versao_arquivo(caminho):
+    estatisticas = os.stat(caminho)
+    return [estatisticas.st_size, estatisticas.st_mtime_ns]
+
+
+def montar_tarefas(entradas, ate="aquecimento_cache", completo=False, mongo_uri=None, modo="upsert",
+                   tamanho_lote=500, dir_intermediarios=DIR_INTERMEDIARIOS):
+    """DAG do pipeline para os CSVs `entradas`, só com o necessário para chegar à etapa `ate`."""
+    from dimensao_paises import caminhos_fonte
+
+    if modo == "backfill" and not completo:
+        raise ValueError("O modo 'backfill' recria a coleção inteira; use com completo=True.")
+    ingestoes = [f"ingestao:{os.path.basename(caminho)}" for caminho in entradas]
+    if len(set(ingestoes)) != len(ingestoes):
+        ingestoes = [f"ingestao:{i}:{os.path.basename(caminho)}" for i, caminho in enumerate(entradas)]
+
+    tarefas = [
+        tarefa(nome, _ingestao, caminho=caminho, origem=i, versao=_versao_arquivo(caminho),
+               path_saida=os.path.join(dir_intermediarios, f"ingestao_{i:03d}.arrow"))
+        for i, (nome, caminho) in enumerate(zip(ingestoes, entradas))
+    ]
+    tarefas += [
+        tarefa("dimensao", _dimensao, path_saida=os.path.join(dir_intermediarios, "dimensao.parquet"),
+               versao={caminho: _versao_arquivo(caminho) for caminho in caminhos_fonte()}),
+        tarefa("pivot", _pivot, ingestoes + ["dimensao"], entradas=list(entradas), ingestoes=ingestoes,
+               incremental=not completo),
+        tarefa("cubo", _cubo, ["pivot"]),
+        tarefa("documentos", _documentos, ["pivot"], completo=completo,
+               path_saida=os.path.join(dir_intermediarios, "documentos.bson")),
+        tarefa("carga_mongo", _carga_mongo, ["cubo", "documentos"], pool="thread",
+               mongo_uri=mongo_uri, modo=modo, tamanho_lote=tamanho_lote),
+        tarefa("aquecimento_cache", _aquecimento_cache, ["carga_mongo"], pool="thread", mongo_uri=mongo_uri),
+    ]
+    return selecionar(tarefas, ate)
+
+
+# --- Execução --------------------------------------------------------------------
+
+def ordenar(tarefas):
+    """Ordem topológica (estável) dos nomes; ValueError para dependência desconhecida ou ciclo."""
+    por_nome = {t["nome"]: t for t in tarefas}
+    ordem, visitando, visitadas = [], set(), set()
+
+    def visitar(nome):
+        if nome in visitadas:
+            return
+        if nome in visitando:
+            raise ValueError(f"Ciclo de dependências envolvendo '{nome}'.")
+        if nome not in por_nome:
+            raise ValueError(f"Dependência desconhecida: '{nome}'.")
+        visitando.add(nome)
+        for dependencia in por_nome[nome]["dependencias"]:
+            visitar(dependencia)
+        visitando.discard(nome)
+        visitadas.add(nome)
+        ordem.append(nome)
+
+    for t in tarefas:
+        visitar(t["nome"])
+    return ordem
+
+
+def selecionar(tarefas, alvo):
+    """Só `alvo` e as tarefas de que ele depende, direta ou indiretamente."""
+    por_nome = {t["nome"]: t for t in tarefas}
+    necessarias, pilha = set(), [alvo]
+    while pilha:
+        nome = pilha.pop()
+        if nome not in necessarias:
+            necessarias.add(nome)
+            pilha.extend(por_nome[nome]["dependencias"])
+    return [t for t in tarefas if t["nome"] in necessarias]
+
+
+def assinatura(t):
+    return hash_objeto({
+        "funcao": t["funcao"].__name__,
+        "dependencias": t["dependencias"],
+        "parametros": t["parametros"],
+        "versao": t["versao"],
+    })
+
+
+def carregar_estado(path_estado=PATH_ESTADO):
+    if not os.path.exists(path_estado):
+        return None
+    with open(path_estado, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def _salvar_estado(path_estado, estado):
+    os.makedirs(os.path.dirname(path_estado) or ".", exist_ok=True)
+    path_temp = f"{path_estado}.tmp"
+    with open(path_temp, "w", encoding="utf-8") as arquivo:
+        json.dump(estado, arquivo, indent=2, ensure_ascii=False, default=str)
+    os.replace(path_temp, path_estado)
+
+
+def tarefas_concluidas(tarefas, estado_anterior):
+    """Tarefas que `--retomar` pode pular: terminaram bem antes, com a mesma assinatura,
+    os arquivos que produziram ainda existem e todas as dependências também são puladas."""
+    if not estado_anterior:
+        return set()
+    anteriores = estado_anterior.get("tarefas", {})
+    por_nome = {t["nome"]: t for t in tarefas}
+    concluidas = set()
+    for nome in ordenar(tarefas):
+        anterior = anteriores.get(nome, {})
+        arquivo = (anterior.get("resultado") or {}).get("arquivo")
+        if anterior.get("status") == "ok" \
+                and anterior.get("assinatura") == assinatura(por_nome[nome]) \
+                and (arquivo is None or os.path.exists(arquivo)) \
+                and all(dependencia in concluidas for dependencia in por_nome[nome]["dependencias"]):
+            concluidas.add(nome)
+    return concluidas
+
+
+def ondas(tarefas):
+    """Agrupa as tarefas pela profundidade no DAG: as de uma mesma onda podem rodar juntas."""
+    por_nome = {t["nome"]: t for t in tarefas}
+    nivel = {}
+    for nome in ordenar(tarefas):
+        nivel[nome] = 1 + max((nivel[d] for d in por_nome[nome]["dependencias"]), default=-1)
+    return [[nome for nome in nivel if nivel[nome] == i] for i in range(max(nivel.values(), default=-1) + 1)]
+
+
+def imprimir_plano(tarefas, concluidas=()):
+    por_nome = {t["nome"]: t for t in tarefas}
+    print(f"Plano: {len(tarefas)} tarefas.")
+    for i, nomes in enumerate(ondas(tarefas), start=1):
+        print(f"Onda {i}:")
+        for nome in nomes:
+            t = por_nome[nome]
+            dependencias = f" <- {', '.join(t['dependencias'])}" if t["dependencias"] else ""
+            situacao = " [pula: concluída na execução anterior]" if nome in concluidas else ""
+            print(f"  {nome} ({t['pool']}){dependencias}{situacao}")
+
+
+def _executar_com_tentativas(nome, funcao, resultados, parametros, tentativas, espera, config_metricas):
+    """Roda no worker: a tarefa, com novas tentativas e espera exponencial entre elas."""
+    configurar(**config_metricas)
+    for tentativa in range(1, tentativas + 1):
+        try:
+            with etapa(f"pipeline.{nome}", tentativa=tentativa):
+                return funcao(resultados, **parametros), tentativa
+        # O load_mongo.py encerra com sys.exit quando não consegue conectar.
+        except (Exception, SystemExit) as e:
+            if tentativa == tentativas:
+                raise
+            segundos = espera * 2 ** (tentativa - 1)
+            print(f"[{nome}] tentativa {tentativa} de {tentativas} falhou ({e!r}); nova tentativa em {segundos:.1f}s.")
+            time.sleep(segundos)
+
+
+def executar(tarefas, workers=None, retomar=False, tentativas=TENTATIVAS_PADRAO, espera=ESPERA_PADRAO_SEGUNDOS,
+             path_estado=PATH_ESTADO):
+    """Executa o DAG e retorna o estado final ({"tarefas": {nome: {status, resultado...}}}).
+
+    O status de cada tarefa é "ok", "falhou" ou "bloqueada" (alguma dependência
+    falhou); tarefas que não dependem da que falhou continuam rodando. O estado
+    é gravado em `path_estado` a cada tarefa concluída.
+    """
+    por_nome = {t["nome"]: t for t in tarefas}
+    ordem = ordenar(tarefas)
+    estado_anterior = carregar_estado(path_estado) if retomar else None
+    concluidas = tarefas_concluidas(tarefas, estado_anterior)
+
+    estado = {"inicio": datetime.now(timezone.utc).isoformat(timespec="seconds"), "tarefas": {}}
+    resultados = {}
+    for nome in (nome for nome in ordem if nome in concluidas):
+        estado["tarefas"][nome] = {**estado_anterior["tarefas"][nome], "retomada": True}
+        resultados[nome] = estado_anterior["tarefas"][nome]["resultado"]
+        print(f"[{nome}] concluída na execução anterior; pulando.")
+
+    a_executar = [nome for nome in ordem if nome not in concluidas]
+    config_metricas = configuracao()
+    # "spawn" também no Linux: os workers não herdam as threads (e conexões) do processo principal.
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=contexto) as processos, ThreadPoolExecutor(workers) as threads:
+        pools = {"processo": processos, "thread": threads}
+        em_execucao = {}
+        while True:
+            for nome in list(a_executar):
+                t = por_nome[nome]
+                situacoes = [estado["tarefas"].get(d, {}).get("status") for d in t["dependencias"]]
+                if any(situacao in ("falhou", "bloqueada") for situacao in situacoes):
+                    estado["tarefas"][nome] = {"status": "bloqueada", "assinatura": assinatura(t)}
+                    a_executar.remove(nome)
+                    print(f"[{nome}] bloqueada: uma dependência falhou.")
+                elif all(situacao == "ok" for situacao in situacoes):
+                    print(f"[{nome}] iniciando...")
+                    futuro = pools[t["pool"]].submit(
+                        _executar_com_tentativas, nome, t["funcao"], {d: resultados[d] for d in t["dependencias"]},
+                        t["parametros"], tentativas, espera, config_metricas)
+                    em_execucao[futuro] = (nome, time.perf_counter())
+                    a_executar.remove(nome)
+
+            if not em_execucao:
+                break
+            feitos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in feitos:
+                nome, inicio = em_execucao.pop(futuro)
+                registro = {"assinatura": assinatura(por_nome[nome]), "segundos": time.perf_counter() - inicio}
+                try:
+                    resultados[nome], registro["tentativas"] = futuro.result()
+                    registro.update(status="ok", resultado=resultados[nome])
+                    print(f"[{nome}] ok em {registro['segundos']:.1f}s.")
+                except (Exception, SystemExit) as e:
+                    registro.update(status="falhou", erro=repr(e))
+                    print(f"[{nome}] falhou: {e!r}")
+                estado["tarefas"][nome] = registro
+                _salvar_estado(path_estado, estado)
+
+    estado["fim"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    _salvar_estado(path_estado, estado)
+    return estado
+
+
+def limpar_ingestoes(estado):
+    """Remove as cópias tipadas da entrada (grandes), desnecessárias depois de um pivot bem-sucedido."""
+    for nome, registro in estado["tarefas"].items():
+        arquivo = (registro.get("resultado") or {}).get("arquivo")
+        if nome.startswith("ingestao:") and arquivo and os.path.exists(arquivo):
+            os.remove(arquivo)
+
+
+if __name__ == "__main__":
+    from data_process import PATH_DATA_RAW
+    from load_mongo import CONNECTION_STRING, MODOS_CARGA, TAMANHO_LOTE_PADRAO
+
+    parser = argparse.ArgumentParser(description="Executa o pipeline completo como um DAG de tarefas.")
+    parser.add_argument("--entrada", nargs="+", default=[PATH_DATA_RAW], metavar="CSV",
+                        help="CSV(s) brutos, opcionalmente .gz/.zst (da edição mais antiga para a mais recente).")
+    parser.add_argument("--ate", choices=ETAPAS, default=ETAPAS[-1],
+                        help="Última etapa a executar (padrão: todas).")
+    parser.add_argument("--completo", action="store_true",
+                        help="Ignora o manifesto: reprocessa tudo e recarrega todos os países.")
+    parser.add_argument("--mongo-uri", default=CONNECTION_STRING)
+    parser.add_argument("--modo", choices=MODOS_CARGA, default="upsert")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_PADRAO)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Tamanho de cada pool (processos e threads); padrão: número de CPUs.")
+    parser.add_argument("--tentativas", type=int, default=TENTATIVAS_PADRAO)
+    parser.add_argument("--espera", type=float, default=ESPERA_PADRAO_SEGUNDOS,
+                        help="Espera antes da 2ª tentativa, dobrada a cada nova falha (segundos).")
+    parser.add_argument("--retomar", action="store_true",
+                        help="Pula as tarefas concluídas na execução anterior.")
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra o plano.")
+    parser.add_argument("--metricas", metavar="ARQUIVO",
+                        help="Grava as métricas de cada etapa neste arquivo (JSON Lines).")
+    parser.add_argument("--perfil", metavar="DIR",
+                        help="Perfila cada tarefa com cProfile e grava os .prof neste diretório.")
+    args = parser.parse_args()
+    if args.modo == "backfill" and not args.completo:
+        parser.error("--modo backfill recria a coleção inteira; use junto com --completo.")
+    configurar(arquivo=args.metricas, perfil=args.perfil)
+
+    tarefas = montar_tarefas(args.entrada, ate=args.ate, completo=args.completo, mongo_uri=args.mongo_uri,
+                             modo=args.modo, tamanho_lote=args.tamanho_lote)
+    if args.dry_run:
+        imprimir_plano(tarefas, tarefas_concluidas(tarefas, carregar_estado()) if args.retomar else ())
+        sys.exit(0)
+
+    os.makedirs(DIR_INTERMEDIARIOS, exist_ok=True)
+    estado = executar(tarefas, workers=args.workers, retomar=args.retomar, tentativas=args.tentativas,
+                      espera=args.espera)
+    falhas = [nome for nome, registro in estado["tarefas"].items() if registro["status"] != "ok"]
+    if falhas:
+        print(f"Pipeline incompleto: {', '.join(falhas)}. Corrija e rode de novo com --retomar.")
+        sys.exit(1)
+    limpar_ingestoes(estado)
+    print("Pipeline concluído com sucesso!")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "scripts_etl"))
+sys.path.insert(0, os.path.join(RAIZ, "dashboard"))
+# Sem `pip install -e .`, o código compartilhado vem direto de comum/.
+sys.path.insert(0, os.path.join(RAIZ, "comum"))
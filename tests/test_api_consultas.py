@@ -0,0 +1,89 @@
+"""API HTTP do motor_consultas.py sobre um Parquet processado a partir da amostra do CSV."""
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import api_consultas
+import motor_consultas
+from conftest import RAIZ
+from data_process import processar_dados_etl
+from test_paridade_engines import PATH_AMOSTRA
+
+
+@pytest.fixture
+def url_base(tmp_path, monkeypatch):
+    saida = tmp_path / "data_processed"
+    monkeypatch.chdir(RAIZ)
+    processar_dados_etl(engine="pandas", path_data_raw=PATH_AMOSTRA, path_data_processed=str(saida / "consumo"),
+                        incremental=False, path_cubo=str(saida / "cubo.parquet"),
+                        path_dimensao=str(saida / "dim_paises.parquet"))
+    fonte = motor_consultas.abrir_parquet(str(saida / "consumo"), str(saida / "cubo.parquet"),
+                                          str(saida / "dim_paises.parquet"))
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), api_consultas.criar_handler(fonte, api_consultas.criar_cache()))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_port}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def requisitar(url, corpo=None):
+    dados = None if corpo is None else json.dumps(corpo).encode("utf-8")
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=dados), timeout=30) as resposta:
+            return resposta.status, json.loads(resposta.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_consulta_e_cache(url_base):
+    status, top = requisitar(f"{url_base}/consulta/top20?carne=BEEF&n=2&ano_inicio=1990&ano_fim=1992")
+    assert status == 200
+    assert [linha["Pais_Codigo"] for linha in top] == ["USA", "BRA"]
+    assert requisitar(f"{url_base}/consulta/top20?carne=BEEF&n=2&ano_inicio=1990&ano_fim=1992") == (200, top)
+
+
+def test_versao_acompanha_a_dimensao(url_base, tmp_path, monkeypatch):
+    monkeypatch.setattr(motor_consultas, "INTERVALO_VERSAO_SEGUNDOS", 0)
+    _, antes = requisitar(f"{url_base}/saude")
+    (tmp_path / "data_processed" / "dim_paises.parquet").touch()
+    _, depois = requisitar(f"{url_base}/saude")
+    assert antes["versao"] != depois["versao"]
+
+
+@pytest.mark.parametrize("query", ["n=0", "n=-1", "ano_inicio=abc", "carne=FISH", "paises=ZZZ"])
+def test_parametro_invalido_e_400(url_base, query):
+    status, resposta = requisitar(f"{url_base}/consulta/top20?{query}")
+    assert status == 400 and "erro" in resposta
+
+
+def test_lote_isola_erros_por_item(url_base):
+    status, respostas = requisitar(f"{url_base}/lote", [
+        {"consulta": "destaques", "parametros": {"carne": "POULTRY"}},
+        {"consulta": "mapa", "parametros": {"ano_inicio": "2000"}},
+        {"consulta": "composicao", "parametros": {"paises": [1]}},
+        {"consulta": "top20", "parametros": {"n": -1}},
+        {"consulta": ["mapa"]},
+        {"consulta": "destaques", "parametros": {"carne": "POULTRY"}},
+    ])
+    assert status == 200
+    assert [list(resposta) for resposta in respostas] == [["resultado"], ["erro"], ["erro"], ["erro"], ["erro"],
+                                                          ["resultado"]]
+    assert respostas[0] == respostas[-1]
+
+
+def test_erro_inesperado_e_500(url_base, monkeypatch):
+    def falhar(fonte, **parametros):
+        raise RuntimeError("servidor indisponível")
+
+    monkeypatch.setitem(motor_consultas.CONSULTAS, "mapa", falhar)
+    status, resposta = requisitar(f"{url_base}/consulta/mapa")
+    assert status == 500 and "servidor indisponível" in resposta["erro"]
+
+    status, respostas = requisitar(f"{url_base}/lote", [{"consulta": "mapa"}, {"consulta": "dimensoes"}])
+    assert status == 200
+    assert "servidor indisponível" in respostas[0]["erro"] and "resultado" in respostas[1]
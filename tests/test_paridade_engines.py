@@ -0,0 +1,49 @@
+"""Paridade da saída do ETL entre as engines, numa amostra pequena do CSV da OCDE.
+
+A amostra tem um agregado (OECD, que deve sair), um país sem nome na dimensão
+(XYZ, que fica com o próprio código) e um (país, carne, ano) sem THND_TONNE.
+"""
+import importlib.util
+import os
+
+import pytest
+
+from conftest import RAIZ
+from data_process import comparar_saidas, processar_dados_etl
+
+PATH_AMOSTRA = os.path.join(RAIZ, "tests", "dados", "consumo_amostra.csv")
+
+
+def processar(engine, diretorio):
+    saida = os.path.join(diretorio, engine)
+    processar_dados_etl(engine=engine, path_data_raw=PATH_AMOSTRA, path_data_processed=os.path.join(saida, "consumo"),
+                        incremental=False, path_cubo=os.path.join(saida, "cubo.parquet"),
+                        path_dimensao=os.path.join(saida, "dim_paises.parquet"))
+    return os.path.join(saida, "consumo")
+
+
+@pytest.fixture
+def referencia_pandas(tmp_path, monkeypatch):
+    # A dimensão de países é lida de data_raw/, relativo à raiz do repositório.
+    monkeypatch.chdir(RAIZ)
+    return processar("pandas", str(tmp_path))
+
+
+def test_referencia_pandas(referencia_pandas):
+    import pandas as pd
+
+    df = pd.read_parquet(referencia_pandas)
+    assert "OECD" not in set(df["LOCATION"])
+    assert set(df.loc[df["LOCATION"] == "XYZ", "Pais_Nome"]) == {"XYZ"}
+    linha = df[(df["LOCATION"] == "USA") & (df["SUBJECT"] == "BEEF") & (df["TIME"] == 1991)]
+    assert len(linha) == 1 and linha["THND_TONNE"].isna().all()
+
+
+@pytest.mark.parametrize("engine", [
+    "arrow",
+    "streaming",
+    pytest.param("spark", marks=pytest.mark.skipif(importlib.util.find_spec("pyspark") is None,
+                                                   reason="pyspark não instalado")),
+])
+def test_paridade_com_pandas(engine, referencia_pandas, tmp_path):
+    assert comparar_saidas(referencia_pandas, processar(engine, str(tmp_path))) == []
@@ -0,0 +1,135 @@
+"""Carga no MongoDB em modo upsert (load_mongo.py), sobre o mongomock."""
+import pandas as pd
+import pytest
+
+import load_mongo
+from cubo import construir_cubo, salvar_cubo
+
+mongomock = pytest.importorskip("mongomock")
+
+
+def parquet_processado(path, paises):
+    """Parquet no formato do ETL com duas carnes e dois anos para cada país."""
+    linhas = [
+        {"LOCATION": codigo, "Pais_Nome": nome, "SUBJECT": subject, "TIME": ano,
+         "KG_CAP": 10.0 + ano - 2000, "THND_TONNE": 100.0}
+        for codigo, nome in paises.items() for subject in ["BEEF", "POULTRY"] for ano in [2000, 2001]
+    ]
+    pd.DataFrame(linhas).to_parquet(path, index=False)
+
+
+@pytest.fixture
+def client():
+    return mongomock.MongoClient()
+
+
+@pytest.fixture
+def carga(client, tmp_path, monkeypatch):
+    """carregar_dados_mongo apontando para o mongomock e para um Parquet em tmp_path (sem cubo nem dimensão)."""
+    monkeypatch.setattr(load_mongo, "MongoClient", lambda *args, **kwargs: client)
+    monkeypatch.setattr(load_mongo, "PATH_PARQUET", str(tmp_path / "consumo.parquet"))
+    monkeypatch.setattr(load_mongo, "PATH_CUBO", str(tmp_path / "sem_cubo.parquet"))
+    monkeypatch.setattr(load_mongo, "PATH_DIMENSAO", str(tmp_path / "sem_dimensao.parquet"))
+    return load_mongo.carregar_dados_mongo
+
+
+def documentos(paises, path):
+    parquet_processado(path, paises)
+    return list(load_mongo.gerar_documentos(pd.read_parquet(path)))
+
+
+def test_recarga_sem_mudancas_nao_envia_nada(client, tmp_path):
+    collection = client["teste"]["dados_processados"]
+    path = tmp_path / "consumo.parquet"
+    paises = {"BRA": "Brasil", "USA": "Estados Unidos"}
+
+    primeira = load_mongo.upsert_documentos(collection, documentos(paises, path))
+    gravados = {doc["_id"]: doc["hash_documento"] for doc in collection.find()}
+    segunda = load_mongo.upsert_documentos(collection, documentos(paises, path))
+
+    assert (primeira["enviados"], primeira["ignorados"]) == (2, 0)
+    assert (segunda["enviados"], segunda["ignorados"]) == (0, 2)
+    assert {doc["_id"]: doc["hash_documento"] for doc in collection.find()} == gravados
+
+
+def test_pais_alterado_e_substituido(client, tmp_path):
+    collection = client["teste"]["dados_processados"]
+    load_mongo.upsert_documentos(collection, documentos({"BRA": "Brasil", "USA": "Estados Unidos"},
+                                                        tmp_path / "consumo.parquet"))
+
+    estatisticas = load_mongo.upsert_documentos(collection, documentos({"BRA": "Brasil", "USA": "EUA"},
+                                                                       tmp_path / "consumo.parquet"))
+
+    assert (estatisticas["enviados"], estatisticas["ignorados"]) == (1, 1)
+    assert collection.find_one({"_id": "USA"})["pais"] == "EUA"
+    assert collection.count_documents({}) == 2
+
+
+@pytest.mark.parametrize("layout", load_mongo.LAYOUTS)
+def test_pais_removido_do_parquet_e_apagado(carga, client, layout):
+    collection = client["consumo_carne"][load_mongo.COLECOES_LAYOUT[layout]]
+    campo_pais = "_id" if layout == "aninhado" else "pais_codigo"
+
+    parquet_processado(load_mongo.PATH_PARQUET, {"ARG": "Argentina", "BRA": "Brasil", "USA": "Estados Unidos"})
+    carga(layout=layout)
+    assert set(collection.distinct(campo_pais)) == {"ARG", "BRA", "USA"}
+
+    # Carga completa: some quem não está mais no Parquet.
+    parquet_processado(load_mongo.PATH_PARQUET, {"BRA": "Brasil", "USA": "Estados Unidos"})
+    carga(layout=layout)
+    assert set(collection.distinct(campo_pais)) == {"BRA", "USA"}
+
+    # Carga incremental: só os países pedidos são sincronizados.
+    parquet_processado(load_mongo.PATH_PARQUET, {"BRA": "Brasil"})
+    carga(locations=["USA"], layout=layout)
+    assert set(collection.distinct(campo_pais)) == {"BRA"}
+
+
+def test_upsert_depois_de_recriar_nao_envia_nada(carga, client, capsys):
+    collection = client["consumo_carne"][load_mongo.COLECOES_LAYOUT["aninhado"]]
+    parquet_processado(load_mongo.PATH_PARQUET, {"BRA": "Brasil", "USA": "Estados Unidos"})
+    carga(modo="recriar")
+    assert all("hash_documento" in doc for doc in collection.find())
+
+    capsys.readouterr()
+    carga(modo="upsert")
+    assert "0 documentos enviados, 2 inalterados" in capsys.readouterr().out
+
+
+def test_carga_incremental_em_outro_layout_vira_completa(carga, client):
+    db = client["consumo_carne"]
+    parquet_processado(load_mongo.PATH_PARQUET, {"ARG": "Argentina", "BRA": "Brasil", "USA": "Estados Unidos"})
+    carga(layout="aninhado")
+
+    carga(locations=["BRA"], layout="buckets")
+
+    assert set(db["consumo_buckets"].distinct("pais_codigo")) == {"ARG", "BRA", "USA"}
+    assert load_mongo.layout_registrado(db) == "buckets"
+
+
+def test_remocao_em_lotes(client):
+    collection = client["teste"]["dados_processados"]
+    collection.insert_many([{"_id": f"P{i:02d}", "grupo": i % 2} for i in range(25)])
+
+    removidos = load_mongo.remover_ausentes(collection, ["P00", "P01", "P02"], {"grupo": 0}, tamanho_lote=4)
+
+    assert removidos == 11
+    assert sorted(collection.distinct("_id", {"grupo": 0})) == ["P00", "P02"]
+    assert collection.count_documents({"grupo": 1}) == 12
+
+
+def test_cubo_incremental_so_envia_os_paises_pedidos(client, tmp_path):
+    db = client["teste"]
+    path_consumo, path_cubo = tmp_path / "consumo.parquet", str(tmp_path / "cubo.parquet")
+    parquet_processado(path_consumo, {"ARG": "Argentina", "BRA": "Brasil", "USA": "Estados Unidos"})
+    salvar_cubo(construir_cubo(pd.read_parquet(path_consumo)), path_cubo)
+    completo = load_mongo.carregar_cubo_mongo(db, path_cubo=path_cubo)
+
+    parquet_processado(path_consumo, {"ARG": "Argentina", "BRA": "Brasil", "USA": "EUA"})
+    salvar_cubo(construir_cubo(pd.read_parquet(path_consumo)), path_cubo)
+    incremental = load_mongo.carregar_cubo_mongo(db, path_cubo=path_cubo, locations=["ARG", "USA"])
+
+    assert (completo["documentos"], incremental["documentos"]) == (12, 8)
+    assert (incremental["enviados"], incremental["ignorados"]) == (4, 4)
+    assert set(db["cubo_consumo"].distinct("Pais_Nome", {"LOCATION": "USA"})) == {"EUA"}
+    assert db["cubo_consumo"].count_documents({}) == 12